@@ -0,0 +1,12 @@
+"""Django settings for benchmark runs on SQLite (the file is BENCH_SQLITE_PATH)"""
+import os
+
+from legislators_api.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['BENCH_SQLITE_PATH'],
+        'OPTIONS': {'timeout': 30},
+    }
+}
@@ -0,0 +1,36 @@
+"""Local stand-in for OpenWeatherMap's current weather endpoint"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class FakeOpenWeatherMapHandler(BaseHTTPRequestHandler):
+    """Answers every ?q=<city> after ``server.latency`` seconds"""
+
+    def do_GET(self):
+        capital = parse_qs(urlsplit(self.path).query).get('q', ['?'])[0]
+        time.sleep(self.server.latency)
+        body = json.dumps({
+            'main': {'temp': 71.5, 'humidity': 40},
+            'wind': {'speed': 3.2},
+            'weather': [{'description': f'clear sky over {capital}'}],
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_weather(latency=0.05):
+    """Serve in a daemon thread; returns (server, WEATHER_API_URL)"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOpenWeatherMapHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/data/2.5/weather'
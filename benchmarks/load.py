@@ -0,0 +1,55 @@
+"""Concurrent HTTP load against one running server"""
+import asyncio
+import itertools
+import time
+
+import httpx
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def drive(base_url, requests, concurrency, timeout):
+    """Send ``requests`` ((method, path, json body or None) tuples) from
+    ``concurrency`` clients; any answer other than 2xx/3xx counts as an error"""
+    latencies = []
+    errors = 0
+    counter = itertools.count()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        async def worker():
+            nonlocal errors
+            while (i := next(counter)) < len(requests):
+                method, path, body = requests[i]
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    await response.aread()
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                errors += not ok
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(requests),
+        'errors': errors,
+        'rps': round(len(requests) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def run_load(base_url, requests, concurrency=16, timeout=60.0):
+    return asyncio.run(drive(base_url, requests, concurrency, timeout))
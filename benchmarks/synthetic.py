@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Generate synthetic legislators in the layout of legislators-current.csv.
+
+Same header as the upstream file, so both ingesters read the output as they
+read the real thing. States follow House apportionment, plus two senators per
+state. Party, gender and birthdays follow the current Congress. The output is
+the same for the same seed, and it is written as it is generated, so millions
+of rows need no memory:
+
+    python benchmarks/synthetic.py --rows 1000000 --seed 1 --malformed-rate 0.01 -o legislators-1m.csv
+
+``--malformed-rate`` mixes in rows that every ingester must skip: missing or
+non-numeric govtrack_id, a blank required field, a bad or missing birthday, or
+a truncated line. ``--messy-rate`` mixes in valid rows written the long way:
+other date formats, and padding the ingesters have to strip.
+"""
+import argparse
+import csv
+import itertools
+import random
+import sys
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+# Header of https://unitedstates.github.io/congress-legislators/legislators-current.csv
+HEADER = (
+    'last_name', 'first_name', 'middle_name', 'suffix', 'nickname', 'full_name', 'birthday', 'gender', 'type',
+    'state', 'district', 'senate_class', 'party', 'url', 'address', 'phone', 'contact_form', 'rss_url',
+    'twitter', 'twitter_id', 'facebook', 'youtube', 'youtube_id', 'mastodon', 'bioguide_id', 'thomas_id',
+    'opensecrets_id', 'lis_id', 'fec_ids', 'cspan_id', 'govtrack_id', 'votesmart_id', 'ballotpedia_id',
+    'washington_post_id', 'icpsr_id', 'wikipedia_id'
+)
+
+# House seats after the 2020 apportionment; at-large seats are district 0 upstream
+HOUSE_SEATS = {
+    'AL': 7, 'AK': 1, 'AZ': 9, 'AR': 4, 'CA': 52, 'CO': 8, 'CT': 5, 'DE': 1, 'FL': 28, 'GA': 14,
+    'HI': 2, 'ID': 2, 'IL': 17, 'IN': 9, 'IA': 4, 'KS': 4, 'KY': 6, 'LA': 6, 'ME': 2, 'MD': 8,
+    'MA': 9, 'MI': 13, 'MN': 8, 'MS': 4, 'MO': 8, 'MT': 2, 'NE': 3, 'NV': 4, 'NH': 2, 'NJ': 12,
+    'NM': 3, 'NY': 26, 'NC': 14, 'ND': 1, 'OH': 15, 'OK': 5, 'OR': 6, 'PA': 17, 'RI': 2, 'SC': 7,
+    'SD': 1, 'TN': 9, 'TX': 38, 'UT': 4, 'VT': 1, 'VA': 11, 'WA': 10, 'WV': 2, 'WI': 8, 'WY': 1,
+}
+# Non-voting delegates; territories have no capital in the weather endpoints, so they are opt-in
+DELEGATES = ('DC',)
+TERRITORIES = ('AS', 'GU', 'MP', 'PR', 'VI')
+STATES = tuple(HOUSE_SEATS) + DELEGATES
+
+SENATE_SHARE = 100 / (100 + 435 + len(DELEGATES))
+PARTY_WEIGHTS = {
+    'rep': (('Republican', 0.51), ('Democrat', 0.49)),
+    'sen': (('Republican', 0.49), ('Democrat', 0.47), ('Independent', 0.04)),
+}
+FEMALE_SHARE = 0.28
+MEAN_AGE, AGE_SD = 59, 11
+
+FIRST_NAMES = (
+    'John', 'Mary', 'James', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+    'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+    'Christopher', 'Nancy', 'Daniel', 'Lisa', 'Mark', 'Betty', 'Donald', 'Sandra', 'Steven', 'Ashley',
+    'Andrew', 'Kimberly', 'Kevin', 'Donna', 'Brian', 'Michelle', 'Gregory', 'Carol', 'Timothy', 'Amanda',
+)
+LAST_NAMES = (
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson',
+    'Walker', 'Young', 'Allen', 'King', 'Wright', 'Scott', 'Torres', 'Nguyen', 'Hill', 'Flores',
+)
+SUFFIXES = ('Jr.', 'Sr.', 'II', 'III')
+
+FIRST_GOVTRACK_ID = 400000
+REQUIRED_FIELDS = ('first_name', 'last_name', 'gender', 'type', 'state', 'party')
+MALFORMED_KINDS = (
+    'missing_govtrack_id', 'bad_govtrack_id', 'missing_field', 'bad_birthday', 'missing_birthday', 'truncated'
+)
+
+
+class LegislatorGenerator:
+    """Rows (lists in HEADER order) for consecutive govtrack_ids from one seed"""
+
+    def __init__(self, seed=0, as_of=date(2025, 1, 3), min_age=25, max_age=95, territories=False):
+        self.rng = random.Random(seed)
+        self.as_of = as_of
+        self.min_age = min_age
+        self.max_age = max_age
+        house = dict(HOUSE_SEATS, **{state: 1 for state in DELEGATES})
+        if territories:
+            house.update({state: 1 for state in TERRITORIES})
+        self.house_states = list(house)
+        self.house_cum_weights = list(itertools.accumulate(house[state] for state in self.house_states))
+        self.seats = house
+        self.parties = {
+            kind: ([party for party, _ in weighted], list(itertools.accumulate(weight for _, weight in weighted)))
+            for kind, weighted in PARTY_WEIGHTS.items()
+        }
+        self.senate_states = list(HOUSE_SEATS)
+        self.index = {column: i for i, column in enumerate(HEADER)}
+
+    def birthday(self, senator):
+        age = self.rng.gauss(MEAN_AGE + (4 if senator else 0), AGE_SD)
+        age = min(max(age, 30 if senator else self.min_age), self.max_age)
+        return self.as_of - timedelta(days=int(age * 365.25))
+
+    def row(self, govtrack_id):
+        rng = self.rng
+        random = rng.random
+        senator = random() < SENATE_SHARE
+        if senator:
+            state = rng.choice(self.senate_states)
+            district = ''
+            senate_class = str(1 + int(random() * 3))
+        else:
+            state, = rng.choices(self.house_states, cum_weights=self.house_cum_weights)
+            seats = self.seats[state]
+            district = '0' if seats == 1 else str(1 + int(random() * seats))
+            senate_class = ''
+        if state in DELEGATES or state in TERRITORIES and random() < 0.6:
+            party = 'Democrat'
+        else:
+            parties, cum_weights = self.parties['sen' if senator else 'rep']
+            party, = rng.choices(parties, cum_weights=cum_weights)
+        gender = 'F' if random() < FEMALE_SHARE else 'M'
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        bioguide_id = f'{last_name[0]}{govtrack_id % 1000000:06d}'
+        chamber = 'senate' if senator else 'house'
+        handle = f'{chamber[:3].capitalize()}{last_name}{govtrack_id % 1000}'
+
+        values = dict.fromkeys(HEADER, '')
+        values.update({
+            'last_name': last_name,
+            'first_name': first_name,
+            'middle_name': rng.choice('ABCDEFGHJKLMNPRSTW') + '.' if random() < 0.3 else '',
+            'suffix': rng.choice(SUFFIXES) if random() < 0.03 else '',
+            'full_name': f'{first_name} {last_name}',
+            'birthday': self.birthday(senator).isoformat(),
+            'gender': gender,
+            'type': 'sen' if senator else 'rep',
+            'state': state,
+            'district': district,
+            'senate_class': senate_class,
+            'party': party,
+            'url': f'https://{last_name.lower()}.{chamber}.gov',
+            'address': f'{100 + int(random() * 2369)} {"Hart" if senator else "Rayburn"} Office Building, Washington DC',
+            'phone': f'202-{"224" if senator else "225"}-{1000 + int(random() * 9000)}',
+            'contact_form': f'https://{last_name.lower()}.{chamber}.gov/contact' if random() < 0.6 else '',
+            'twitter': handle if random() < 0.7 else '',
+            'facebook': handle if random() < 0.5 else '',
+            'bioguide_id': bioguide_id,
+            # The other ids only need to look right, so they come from govtrack_id rather than the rng
+            'opensecrets_id': f'N{govtrack_id * 7919 % 100000000:08d}',
+            'lis_id': f'S{govtrack_id % 1000:03d}' if senator else '',
+            'fec_ids': f'{"S" if senator else "H"}{govtrack_id % 10}{state}{govtrack_id % 100000:05d}',
+            'cspan_id': str(govtrack_id * 31 % 2000000),
+            'govtrack_id': str(govtrack_id),
+            'votesmart_id': str(govtrack_id * 13 % 200000),
+            'ballotpedia_id': f'{first_name} {last_name}',
+            'icpsr_id': str(10000 + govtrack_id % 90000),
+            'wikipedia_id': f'{first_name} {last_name} (politician)',
+        })
+        return values
+
+    def make_malformed(self, values):
+        """Break ``values`` in a way every ingester skips; returns (kind, row list)"""
+        rng = self.rng
+        kind = rng.choice(MALFORMED_KINDS)
+        if kind == 'missing_govtrack_id':
+            values['govtrack_id'] = ''
+        elif kind == 'bad_govtrack_id':
+            values['govtrack_id'] = rng.choice((f'{values["govtrack_id"]}x', 'N/A', f'gt-{values["govtrack_id"]}'))
+        elif kind == 'missing_field':
+            values[rng.choice(REQUIRED_FIELDS)] = rng.choice(('', '   '))
+        elif kind == 'bad_birthday':
+            values['birthday'] = rng.choice(('1960-13-45', '31/12/1960', 'unknown', '1960-02-30'))
+        elif kind == 'missing_birthday':
+            values['birthday'] = ''
+        row = [values[column] for column in HEADER]
+        if kind == 'truncated':
+            # Cut before party (and govtrack_id), like a line lost mid-write
+            row = row[:rng.randrange(1, self.index['party'])]
+        return kind, row
+
+    def make_messy(self, values):
+        """Valid, but through the slow paths: other date formats and padded fields"""
+        rng = self.rng
+        birthday = date.fromisoformat(values['birthday'])
+        values['birthday'] = rng.choice((birthday.strftime('%m/%d/%Y'), f'{birthday.isoformat()} 00:00:00'))
+        for column in ('first_name', 'last_name', 'state', 'party'):
+            if rng.random() < 0.5:
+                values[column] = f' {values[column]}  '
+        return [values[column] for column in HEADER]
+
+    def rows(self, count, malformed_rate=0.0, messy_rate=0.0, stats=None):
+        """``count`` rows; ``stats`` (a Counter) receives valid/messy/malformed kinds"""
+        stats = Counter() if stats is None else stats
+        for i in range(count):
+            values = self.row(FIRST_GOVTRACK_ID + i)
+            draw = self.rng.random()
+            if draw < malformed_rate:
+                kind, row = self.make_malformed(values)
+                stats[kind] += 1
+                yield row
+                continue
+            if draw < malformed_rate + messy_rate:
+                stats['messy'] += 1
+                yield self.make_messy(values)
+            else:
+                yield [values[column] for column in HEADER]
+            stats['valid'] += 1
+
+
+def write_rows(f, count, seed=0, malformed_rate=0.0, messy_rate=0.0, **options):
+    """Write a header plus ``count`` rows to ``f``; returns the Counter of row kinds"""
+    stats = Counter()
+    writer = csv.writer(f, lineterminator='\n')
+    writer.writerow(HEADER)
+    writer.writerows(LegislatorGenerator(seed, **options).rows(count, malformed_rate, messy_rate, stats))
+    return stats
+
+
+def write_csv(path, count, seed=0, malformed_rate=0.0, messy_rate=0.0, **options):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        return write_rows(f, count, seed, malformed_rate, messy_rate, **options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=538, help='data rows to write (malformed ones included)')
+    parser.add_argument('--seed', type=int, default=0, help='same seed, same file')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='share of rows the ingesters must skip')
+    parser.add_argument('--messy-rate', type=float, default=0.0,
+                        help='share of valid rows with other date formats and padded fields')
+    parser.add_argument('--territories', action='store_true', help='include delegates of AS, GU, MP, PR and VI')
+    parser.add_argument('--as-of', type=date.fromisoformat, default=date(2025, 1, 3),
+                        help='date the ages are drawn for (YYYY-MM-DD)')
+    parser.add_argument('--min-age', type=int, default=25)
+    parser.add_argument('--max-age', type=int, default=95)
+    parser.add_argument('-o', '--output', default='-', help='CSV path, or - for stdout')
+    args = parser.parse_args()
+    if not 0 <= args.malformed_rate + args.messy_rate <= 1:
+        parser.error('--malformed-rate plus --messy-rate must be between 0 and 1')
+
+    options = {'territories': args.territories, 'as_of': args.as_of, 'min_age': args.min_age, 'max_age': args.max_age}
+    started = time.perf_counter()
+    if args.output == '-':
+        stats = write_rows(sys.stdout, args.rows, args.seed, args.malformed_rate, args.messy_rate, **options)
+    else:
+        stats = write_csv(args.output, args.rows, args.seed, args.malformed_rate, args.messy_rate, **options)
+
+    malformed = {kind: stats[kind] for kind in MALFORMED_KINDS if stats[kind]}
+    print(f'{args.rows} rows in {time.perf_counter() - started:.1f}s: {stats["valid"]} valid '
+          f'({stats["messy"]} messy), {sum(malformed.values())} malformed {malformed or ""}'.rstrip(),
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,51 @@
+"""Smoke test for the load-test harness: ``python -m unittest tests`` from benchmarks/.
+
+Runs one short scenario against both apps on SQLite (Django through
+django_sqlite_settings.py) and checks the shape of the JSON report, so a
+change to the apps' entry points, ingesters or routes that breaks run.py
+shows up without a full benchmark run. Needs both apps' requirements.
+"""
+import importlib.util
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+
+RESULT_KEYS = {'app', 'scale', 'scenario', 'requests', 'errors', 'rps', 'p50_ms', 'p95_ms', 'p99_ms'}
+
+
+@unittest.skipUnless(importlib.util.find_spec('gunicorn'), 'gunicorn is not installed')
+class RunSmokeTests(unittest.TestCase):
+    def test_short_run_writes_a_report(self):
+        workdir = Path(tempfile.mkdtemp(prefix='legislators-bench-test-'))
+        output = workdir / 'results.json'
+        command = [
+            sys.executable, 'run.py', '--app', 'flask', '--app', 'django', '--scale', '30', '--scenario', 'detail',
+            '--requests', '20', '--warmup', '2', '--workers', '1', '--concurrency', '2',
+            '--workdir', str(workdir), '--output', str(output),
+        ]
+        result = subprocess.run(command, cwd=BENCHMARKS_DIR, capture_output=True, text=True, timeout=300)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn('scale 30 - req/s and p50/p95/p99 ms', result.stdout)
+
+        with open(output) as f:
+            report = json.load(f)
+        self.assertLessEqual({'created', 'commit', 'python', 'platform', 'config', 'results'}, set(report))
+        self.assertEqual(report['config']['database'], 'sqlite')
+        self.assertEqual(report['config']['requests'], 20)
+        self.assertEqual([(r['app'], r['scenario']) for r in report['results']], [('flask', 'detail'), ('django', 'detail')])
+        for row in report['results']:
+            with self.subTest(app=row['app']):
+                self.assertEqual(set(row), RESULT_KEYS)
+                self.assertEqual((row['scale'], row['requests'], row['errors']), (30, 20, 0))
+                self.assertGreater(row['rps'], 0)
+                self.assertLessEqual(row['p50_ms'], row['p95_ms'])
+                self.assertLessEqual(row['p95_ms'], row['p99_ms'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,279 @@
+"""Async versions of the list, detail, stats and weather views.
+
+Served instead of the DRF views when DJANGO_ASYNC_VIEWS=true, under an ASGI
+server (uvicorn). Query-string handling, response bodies, ETags and the
+response cache match the sync views. Weather misses go upstream through httpx, so a single worker can have
+hundreds of weather requests in flight without a thread for each.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from functools import partial, wraps
+from itertools import islice
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from legislators_common.upstream import upstream
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.settings import api_settings
+
+from . import views
+from .cache import cached_response, detail_tags, list_tags, stats_tags
+from .conditional import dataset_condition, dataset_validators, representation
+from .metrics import timed_serialization
+from .models import Legislator
+from .renderers import NDJSONRenderer
+from .serializers import LegislatorSerializer, iter_legislator_rows
+from .weather import STATE_CAPITALS, weather_cache, weather_prefetcher
+
+json_renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+
+_per_loop = {}      # event loop -> {'http': httpx.AsyncClient, 'db': asyncio.Semaphore}
+_inflight = {}      # capital -> asyncio.Task fetching it
+
+
+def loop_resources():
+    """HTTP client and database semaphore for the running event loop"""
+    loop = asyncio.get_running_loop()
+    resources = _per_loop.get(loop)
+    if resources is None:
+        for closed in [other for other in _per_loop if other.is_closed()]:
+            del _per_loop[closed]
+        resources = _per_loop[loop] = {
+            'http': httpx.AsyncClient(
+                timeout=httpx.Timeout(upstream.timeout[1], connect=upstream.timeout[0]),
+                limits=httpx.Limits(max_connections=upstream.pool_maxsize),
+            ),
+            'db': asyncio.Semaphore(settings.ASYNC_DB_CONCURRENCY),
+        }
+    return resources
+
+
+@asynccontextmanager
+async def db_slot():
+    """Bound how much database work this worker's requests run at once"""
+    async with loop_resources()['db']:
+        yield
+
+
+def dataset_conditional(renderer_classes):
+    """``conditional.dataset_condition`` for async views, negotiating among the
+    sync view's ``renderer_classes``: the version is read beforehand, since the
+    ETag is worked out on the event loop"""
+    def decorator(view):
+        conditional_view = dataset_condition(view, renderer_classes)
+
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            if representation(request, renderer_classes) is None:
+                return json_response({'detail': NotAcceptable.default_detail}, status=406)
+            request.dataset_validators = dataset_validators.cached()
+            if request.dataset_validators is None:
+                async with db_slot():
+                    request.dataset_validators = await sync_to_async(dataset_validators.get)()
+            return await conditional_view(request, *args, **kwargs)
+        return inner
+    return decorator
+
+
+def json_response(data, status=200):
+    with timed_serialization():
+        content = json_renderer.render(data)
+    return HttpResponse(content, status=status, content_type='application/json')
+
+
+def not_found():
+    return json_response({'detail': 'Not found.'}, status=404)
+
+
+def astream_legislators(queryset, fields, ndjson):
+    # Same output as views.stream_legislators: its rows are read in a worker
+    # thread a batch at a time, the way QuerySet.aiterator() reads chunks
+    renderer = NDJSONRenderer()
+    rows = iter_legislator_rows(queryset, fields, chunk_size=views.STREAM_BATCH_SIZE)
+    next_batch = sync_to_async(lambda: list(islice(rows, views.STREAM_BATCH_SIZE)))
+
+    async def generate():
+        if not ndjson:
+            yield b'['
+        first = True
+        while True:
+            async with db_slot():
+                batch = await next_batch()
+            if not batch:
+                break
+            chunk = []
+            for row in batch:
+                if ndjson:
+                    chunk.append(renderer.render_item(row))
+                else:
+                    chunk.append(renderer.render(row) if first else b',' + renderer.render(row))
+                first = False
+            yield b''.join(chunk)
+        if not ndjson:
+            yield b']'
+
+    content_type = NDJSONRenderer.media_type if ndjson else 'application/json'
+    return StreamingHttpResponse(generate(), content_type=content_type)
+
+
+@require_GET
+@dataset_conditional(views.legislators_list.cls.renderer_classes)
+@cached_response(list_tags, views.legislators_list.cls.renderer_classes)
+async def legislators_list(request):
+    state = request.GET.get('state')
+    party = request.GET.get('party')
+    type_val = request.GET.get('type')
+
+    params, error = views.parse_list_params(request.GET)
+    if error:
+        return json_response({'error': error}, status=400)
+
+    fields = params.get('fields')
+    if fields and 'govtrack_id' not in fields:
+        params['fields'] = ['govtrack_id'] + fields
+
+    ndjson = request.representation.partition(';')[0] == NDJSONRenderer.format
+    if ndjson or request.GET.get('stream') in ('1', 'true'):
+        queryset = views.build_legislators_queryset(state, party, type_val, **params)
+        return astream_legislators(queryset, fields, ndjson)
+
+    async with db_slot():
+        if settings.LEGISLATORS_SNAPSHOT:
+            # Reloads (rarely) go through the sync ORM in a worker thread
+            legislators = await sync_to_async(views.query_legislators_snapshot)(
+                state, party, type_val, version=request.dataset_validators[0], **params)
+        else:
+            legislators = await sync_to_async(views.query_legislators_orm)(state, party, type_val, **params)
+
+    next_after = None
+    if params.get('limit') and len(legislators) == params['limit']:
+        next_after = legislators[-1]['govtrack_id']
+    if fields and 'govtrack_id' not in fields:
+        legislators = [{field: row[field] for field in fields} for row in legislators]
+
+    response = json_response(legislators)
+    if next_after is not None:
+        next_params = request.GET.copy()
+        next_params['after'] = next_after
+        response['Link'] = f'<{request.path}?{next_params.urlencode()}>; rel="next"'
+    return response
+
+
+@require_GET
+@dataset_conditional(views.legislator_detail.cls.renderer_classes)
+@cached_response(detail_tags, views.legislator_detail.cls.renderer_classes)
+async def legislator_detail(request, govtrack_id):
+    async with db_slot():
+        legislator = await Legislator.objects.filter(govtrack_id=govtrack_id).afirst()
+    if legislator is None:
+        return not_found()
+    return json_response(LegislatorSerializer(legislator).data)
+
+
+@require_GET
+@dataset_conditional(views.age_stats.cls.renderer_classes)
+@cached_response(stats_tags, views.age_stats.cls.renderer_classes)
+async def age_stats(request):
+    backend = request.GET.get('backend', settings.AGE_STATS_BACKEND)
+    if backend not in views.AGE_STATS_BACKENDS:
+        return json_response({'error': f'Unknown age stats backend: {backend}'}, status=400)
+
+    # Raw SQL and the snapshot reload have no async ORM equivalent; run them in a worker thread
+    if backend == 'engine' and settings.LEGISLATORS_SNAPSHOT:
+        compute = partial(views.age_stats_from_engine, request.dataset_validators[0])
+    elif backend == 'sql':
+        compute = views.age_stats_from_sql
+    else:
+        compute = views.age_stats_from_python
+    async with db_slot():
+        result = await sync_to_async(compute)()
+    return json_response(result.data, status=result.status_code)
+
+
+async def upstream_get(url, **kwargs):
+    """Async ``upstream.get`` over httpx: same RetryingCall policy, breaker and latency histogram"""
+    call = upstream.call(url)
+    for delay in call.delays():
+        await asyncio.sleep(delay)
+        started = time.monotonic()
+        try:
+            response = await loop_resources()['http'].get(url, **kwargs)
+        except Exception as error:
+            if call.retry_after_error(time.monotonic() - started, isinstance(error, httpx.TransportError)):
+                continue
+            raise
+        if call.done(time.monotonic() - started, response.status_code):
+            return response
+
+
+async def fetch_capital_weather(capital):
+    params = {
+        'q': capital,
+        'appid': os.getenv('WEATHER_API_KEY'),
+        'units': 'imperial'
+    }
+    response = await upstream_get(os.getenv('WEATHER_API_URL'), params=params)
+    response.raise_for_status()
+    weather_data = response.json()
+    weather = {
+        'temperature': weather_data['main']['temp'],
+        'humidity': weather_data['main']['humidity'],
+        'wind_speed': weather_data['wind']['speed'],
+        'description': weather_data['weather'][0]['description']
+    }
+    weather_cache.put(capital, weather)
+    return weather
+
+
+async def capital_weather(capital):
+    """(weather, age) like weather.capital_weather, but misses are awaited on the
+    event loop and concurrent misses for one capital share a single task"""
+    if weather_prefetcher is not None and weather_prefetcher.running:
+        cached = weather_cache.last_known(capital)
+    else:
+        cached = weather_cache.get_nowait(capital)
+    if cached is not None:
+        return cached
+
+    task = _inflight.get(capital)
+    if task is None:
+        task = _inflight[capital] = asyncio.create_task(fetch_capital_weather(capital))
+        task.add_done_callback(lambda _: _inflight.pop(capital, None))
+    return await asyncio.shield(task), 0.0
+
+
+@require_GET
+async def weather_info(request, govtrack_id):
+    # The connection is released before waiting on OpenWeatherMap
+    async with db_slot():
+        legislator = await Legislator.objects.filter(govtrack_id=govtrack_id).afirst()
+    if legislator is None:
+        return not_found()
+
+    capital = STATE_CAPITALS.get(legislator.state)
+    if not capital:
+        return json_response({'error': f'Capital city not found for state: {legislator.state}'}, status=404)
+
+    if not os.getenv('WEATHER_API_KEY'):
+        return json_response({'error': 'Weather API key not configured'}, status=500)
+
+    if not os.getenv('WEATHER_API_URL'):
+        return json_response({'error': 'Weather API URL not configured'}, status=500)
+
+    try:
+        weather, age = await capital_weather(capital)
+
+        return json_response({
+            'legislator': LegislatorSerializer(legislator).data,
+            'state_capital': capital,
+            'weather': weather,
+            'weather_age': round(age, 1)
+        })
+
+    except Exception as e:
+        return json_response({'error': str(e)}, status=500)
@@ -0,0 +1,139 @@
+"""Response cache shared by every worker: the ``default`` cache, i.e. Redis when
+REDIS_URL is set, with tag-based invalidation (see legislators_common.cache).
+
+A write bumps exactly the tags it affects: the legislator's detail, the list
+slices for its state and party, the slices without either filter (UNFILTERED)
+and the age stats.
+"""
+import hashlib
+from datetime import date
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from legislators_common.cache import ALL, MAX_TARGETED_ROWS, STATS, UNFILTERED, LookupCounter, new_tag_version, tag_digest
+
+from .conditional import representation
+
+lookups = LookupCounter()  # this worker's lookups
+
+
+def tag_key(tag):
+    return f'tag:{tag_digest(tag)}'
+
+
+def tag_versions(tags):
+    keys = [tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, new_tag_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_tags(tags):
+    for tag in set(tags):
+        try:
+            cache.incr(tag_key(tag))
+        except ValueError:
+            cache.add(tag_key(tag), new_tag_version(), timeout=None)
+
+
+def invalidate_legislators(govtrack_ids, groups):
+    """Drop what a write to these legislators affects; ``groups`` holds the
+    (state, party) pairs the rows were in before and after the write"""
+    if not settings.RESPONSE_CACHE_TTL:
+        return
+    if len(govtrack_ids) > MAX_TARGETED_ROWS:
+        return invalidate_all()
+    tags = [f'legislator:{govtrack_id}' for govtrack_id in govtrack_ids]
+    for state, party in groups:
+        tags += [f'state:{state}', f'party:{party}']
+    bump_tags(tags + [UNFILTERED, STATS])
+
+
+def invalidate_all():
+    if settings.RESPONSE_CACHE_TTL:
+        bump_tags([ALL])
+
+
+def cache_stats():
+    return lookups.stats()
+
+
+def request_key(request, renderer_classes):
+    # Bodies carry ages, so the date is part of the key like it is of the ETag;
+    # the representation is the one content negotiation picks, as for the ETag
+    query = '&'.join(sorted(f'{name}={value}' for name, values in request.GET.lists() for value in values))
+    digest = hashlib.sha1(f'{request.path}?{query}'.encode()).hexdigest()
+    return f'response:{digest}:{date.today().isoformat()}:{representation(request, renderer_classes)}'
+
+
+def cached_response(tags, renderer_classes=None):
+    """Serve a view's 200 JSON responses from the shared cache.
+
+    ``tags(request, *args, **kwargs)`` names what the response depends on
+    (besides ALL); streamed responses are never cached. Keys use the
+    representation negotiated among ``renderer_classes`` (by default the DRF
+    view's own). Async views do their cache round trips in a worker thread.
+    """
+    def decorator(view):
+        renderers = renderer_classes or view.cls.renderer_classes
+
+        def lookup(request, *args, **kwargs):
+            """(entry key, cached response or None); no key when caching is off"""
+            if not settings.RESPONSE_CACHE_TTL or request.method != 'GET':
+                return None, None
+            entry_tags = [ALL] + tags(request, *args, **kwargs)
+            versions = ':'.join(str(version) for version in tag_versions(entry_tags))
+            key = f'{request_key(request, renderers)}:{versions}'
+            cached = cache.get(key)
+            lookups.record(cached is not None)
+            if cached is None:
+                return key, None
+            content, headers = cached
+            return key, HttpResponse(content, headers=headers)
+
+        def store(key, response):
+            if key is not None and response.status_code == 200 and not isinstance(response, StreamingHttpResponse):
+                if hasattr(response, 'render'):
+                    response.render()
+                cache.set(key, (response.content, dict(response.items())), timeout=settings.RESPONSE_CACHE_TTL)
+            return response
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def inner(request, *args, **kwargs):
+                key, cached = await sync_to_async(lookup)(request, *args, **kwargs)
+                if cached is not None:
+                    return cached
+                return await sync_to_async(store)(key, await view(request, *args, **kwargs))
+        else:
+            @wraps(view)
+            def inner(request, *args, **kwargs):
+                key, cached = lookup(request, *args, **kwargs)
+                if cached is not None:
+                    return cached
+                return store(key, view(request, *args, **kwargs))
+        return inner
+    return decorator
+
+
+def list_tags(request):
+    state, party = request.GET.get('state'), request.GET.get('party')
+    if state:
+        return [f'state:{state}']
+    if party:
+        return [f'party:{party}']
+    return [UNFILTERED]
+
+
+def detail_tags(request, govtrack_id):
+    return [f'legislator:{govtrack_id}']
+
+
+def stats_tags(request):
+    return [STATS]
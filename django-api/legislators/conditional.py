@@ -0,0 +1,134 @@
+import threading
+import time
+from datetime import date, datetime
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_header_parameters
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .models import DatasetVersion
+
+
+class DatasetValidators:
+    """Cached (version, updated_at) of the DatasetVersion row.
+
+    Re-read at most every ``check_interval`` seconds (0 = on every request),
+    so with an interval a conditional request that matches is answered
+    without touching the database at all.
+    """
+
+    def __init__(self, check_interval=0.0):
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded_at = 0.0
+
+    def cached(self):
+        """(version, updated_at) if read less than check_interval ago, else None"""
+        with self._lock:
+            if self._value is not None and time.monotonic() - self._loaded_at < self._check_interval:
+                return self._value
+        return None
+
+    def get(self):
+        cached = self.cached()
+        if cached is not None:
+            return cached
+        value = DatasetVersion.objects.filter(pk=1).values_list('version', 'updated_at').first() or (0, None)
+        with self._lock:
+            self._value, self._loaded_at = value, time.monotonic()
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+
+
+dataset_validators = DatasetValidators(check_interval=settings.SNAPSHOT_CHECK_INTERVAL)
+
+
+def request_validators(request):
+    # Read once per request: condition() asks for the ETag and Last-Modified separately
+    if not hasattr(request, 'dataset_validators'):
+        request.dataset_validators = dataset_validators.get()
+    return request.dataset_validators
+
+
+def representation(request, renderer_classes):
+    """Name of the representation DRF's content negotiation picks for ``request``
+    among ``renderer_classes``: the renderer's format plus any media type
+    parameters ('json', 'ndjson', 'json;indent=4'), or None when none is
+    acceptable. Worked out once per request for the ETag and the cache key."""
+    if not hasattr(request, 'representation'):
+        negotiator = api_settings.DEFAULT_CONTENT_NEGOTIATION_CLASS()
+        try:
+            renderer, media_type = negotiator.select_renderer(
+                Request(request), [renderer_class() for renderer_class in renderer_classes])
+        except NotAcceptable:
+            request.representation = None
+        else:
+            _, params = parse_header_parameters(media_type)
+            request.representation = ';'.join(
+                [renderer.format] + [f'{name}={value}' for name, value in sorted(params.items()) if name != 'q'])
+    return request.representation
+
+
+def dataset_etag(request, renderer_classes):
+    # Serialized legislators carry their age, so every body also depends on the date
+    version, _ = request_validators(request)
+    return f'"v{version}-{date.today().isoformat()}-{representation(request, renderer_classes)}"'
+
+
+def dataset_last_modified(request):
+    _, updated_at = request_validators(request)
+    midnight = timezone.make_aware(datetime.combine(date.today(), datetime.min.time()))
+    return max(updated_at, midnight) if updated_at else midnight
+
+
+def dataset_condition(view, renderer_classes=None):
+    """Strong ETag and Last-Modified for a read view, from the dataset version.
+
+    A matching If-None-Match (or If-Modified-Since) gets a 304 before the view
+    runs. The ETag names the representation content negotiation picks among
+    ``renderer_classes`` (by default the DRF view's own), the same one the view
+    renders, so 200 and 304 responses also carry ``Vary: Accept``. Other
+    responses (400, 404, 406) get no validators.
+    """
+    renderer_classes = renderer_classes or view.cls.renderer_classes
+
+    def check(request):
+        """(304 response or None, ETag, Last-Modified timestamp)"""
+        if request.method not in ('GET', 'HEAD') or representation(request, renderer_classes) is None:
+            return None, None, None
+        etag = dataset_etag(request, renderer_classes)
+        last_modified = int(dataset_last_modified(request).timestamp())
+        return get_conditional_response(request, etag=etag, last_modified=last_modified), etag, last_modified
+
+    def finish(response, etag, last_modified):
+        if etag is not None and response.status_code in (200, 304):
+            response.headers.setdefault('ETag', etag)
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+            patch_vary_headers(response, ['Accept'])
+        return response
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            response, etag, last_modified = check(request)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            return finish(response, etag, last_modified)
+    else:
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            response, etag, last_modified = check(request)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return finish(response, etag, last_modified)
+    return inner
@@ -0,0 +1,41 @@
+"""Database connection settings and server-side connection counts, for /api/health/db/.
+
+Django keeps one connection per worker thread (for CONN_MAX_AGE seconds), so a
+deployment holds about ``workers * threads`` connections, plus up to
+ASYNC_DB_CONCURRENCY per uvicorn worker; the report sets that against the
+server's max_connections. Connections kept between requests show up as idle.
+"""
+from django.conf import settings
+from django.db import connection
+
+SERVER_CONNECTIONS_SQL = """
+    SELECT current_setting('max_connections')::integer AS max_connections,
+           COUNT(*) AS connections,
+           COUNT(*) FILTER (WHERE datname = current_database()) AS database_connections,
+           COUNT(*) FILTER (WHERE datname = current_database() AND state = 'active') AS active,
+           COUNT(*) FILTER (WHERE datname = current_database() AND state = 'idle') AS idle
+    FROM pg_stat_activity
+    WHERE backend_type = 'client backend'
+"""
+
+
+def connection_settings():
+    database = settings.DATABASES['default']
+    return {
+        'conn_max_age': database.get('CONN_MAX_AGE', 0),
+        'conn_health_checks': database.get('CONN_HEALTH_CHECKS', False),
+        'server_side_cursors': not database.get('DISABLE_SERVER_SIDE_CURSORS', False),
+        'async_db_concurrency': settings.ASYNC_DB_CONCURRENCY if settings.ASYNC_VIEWS else None,
+    }
+
+
+def server_stats():
+    """max_connections and current client connections (None off Postgres);
+    raises DatabaseError when the database can't be reached"""
+    connection.ensure_connection()
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(SERVER_CONNECTIONS_SQL)
+        columns = [col[0] for col in cursor.description]
+        return dict(zip(columns, cursor.fetchone()))
@@ -0,0 +1,36 @@
+from collections import defaultdict
+
+
+class LegislatorIndex:
+    """Inverted indexes (state, party, type -> govtrack ids) over serialized rows.
+
+    Lookups are exact, matching the ``filter(state=..., party=...)`` semantics
+    of the ORM path, and combined filters intersect the id sets.
+    """
+
+    def __init__(self, rows):
+        self.by_state = defaultdict(set)
+        self.by_party = defaultdict(set)
+        self.by_type = defaultdict(set)
+        self.all_ids = set()
+        for row in rows:
+            govtrack_id = row['govtrack_id']
+            self.all_ids.add(govtrack_id)
+            self.by_state[row['state']].add(govtrack_id)
+            self.by_party[row['party']].add(govtrack_id)
+            self.by_type[row['type']].add(govtrack_id)
+
+    def filter(self, state=None, party=None, type=None):
+        """Return the sorted ids matching every given filter"""
+        candidates = []
+        if state:
+            candidates.append(self.by_state.get(state, set()))
+        if party:
+            candidates.append(self.by_party.get(party, set()))
+        if type:
+            candidates.append(self.by_type.get(type, set()))
+
+        if not candidates:
+            return sorted(self.all_ids)
+        candidates.sort(key=len)
+        return sorted(candidates[0].intersection(*candidates[1:]))
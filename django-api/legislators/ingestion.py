@@ -0,0 +1,110 @@
+"""Django's side of the CSV ingest: rows become Legislator field values and
+are written through the ORM (the shared reading and validation code is in
+legislators_common.legislator_csv)"""
+import django
+from legislators_common import legislator_csv
+from legislators_common.legislator_csv import InvalidRow, parse_date, row_hash
+
+from .models import Legislator
+
+# Columns refreshed from the CSV on upsert; notes are never in the CSV, so existing ones are kept
+UPSERT_FIELDS = ["first_name", "last_name", "birthday", "gender", "type", "state", "district", "party", "url"]
+
+# Columns that come from the CSV, compared by the differential ingest (never notes)
+HASH_FIELDS = ["govtrack_id", "first_name", "last_name", "birthday", "gender", "type", "state", "district", "party", "url"]
+
+
+def clean_row(row):
+    """Validate one csv.DictReader row and return its Legislator field values"""
+    try:
+        govtrack_id = int(row.get("govtrack_id") or 0)
+    except ValueError as e:
+        raise InvalidRow(f"Invalid govtrack_id: {e}")
+    if not govtrack_id:
+        raise InvalidRow("Missing govtrack_id")
+
+    fields = {
+        "govtrack_id": govtrack_id,
+        "first_name": (row.get("first_name") or "").strip(),
+        "last_name": (row.get("last_name") or "").strip(),
+        "birthday": parse_date((row.get("birthday") or "").strip()),
+        "gender": (row.get("gender") or "").strip(),
+        "type": (row.get("type") or "").strip(),
+        "state": (row.get("state") or "").strip(),
+        "district": (row.get("district") or "").strip() or None,
+        "party": (row.get("party") or "").strip(),
+        "url": (row.get("url") or "").strip(),
+        "notes": None,
+    }
+
+    # required fields
+    if not all([fields["first_name"], fields["last_name"], fields["birthday"], fields["gender"],
+                fields["type"], fields["state"], fields["party"]]):
+        raise InvalidRow(f"Legislator {govtrack_id}: missing required fields")
+    return fields
+
+
+def validate_row(row):
+    """Validate one csv.DictReader row and return an unsaved Legislator"""
+    return Legislator(**clean_row(row))
+
+
+def validate_shards(path, workers):
+    """Validate ``path`` across ``workers`` processes, yielding (report, rows) per
+    shard in file order; rows are clean_row() field values"""
+    # Workers started with spawn/forkserver import this module fresh and need the app registry
+    return legislator_csv.validate_shards(path, workers, clean_row, initializer=django.setup)
+
+
+def upsert_batch(legislators):
+    """Insert or update a batch of legislators with one INSERT ... ON CONFLICT statement"""
+    # A repeated govtrack_id would hit the same row twice in one statement; last one wins
+    unique = list({legislator.govtrack_id: legislator for legislator in legislators}.values())
+    Legislator.objects.bulk_create(
+        unique,
+        update_conflicts=True,
+        unique_fields=["govtrack_id"],
+        update_fields=UPSERT_FIELDS,
+    )
+    return len(unique)
+
+
+def apply_diff(legislators, batch_size):
+    """Write only the inserts, updates and deletes needed to match ``legislators``.
+
+    Stored rows are hashed over HASH_FIELDS and compared with the incoming
+    ones, so unchanged rows are not touched and notes are always preserved.
+    Returns (inserted, updated, deleted) govtrack_id lists and the set of
+    (state, party) pairs the changed rows were or are now in.
+    """
+    stored_hashes = {}
+    stored_groups = {}
+    for values in Legislator.objects.values_list(*HASH_FIELDS).iterator():
+        stored_hashes[values[0]] = row_hash(values)
+        stored_groups[values[0]] = (values[HASH_FIELDS.index("state")], values[HASH_FIELDS.index("party")])
+    # A repeated govtrack_id keeps the last occurrence
+    incoming = {legislator.govtrack_id: legislator for legislator in legislators}
+
+    inserts, updates = [], []
+    for govtrack_id, legislator in incoming.items():
+        stored = stored_hashes.get(govtrack_id)
+        if stored is None:
+            inserts.append(legislator)
+        elif stored != row_hash([getattr(legislator, field) for field in HASH_FIELDS]):
+            updates.append(legislator)
+    deletes = [govtrack_id for govtrack_id in stored_hashes if govtrack_id not in incoming]
+
+    Legislator.objects.bulk_create(inserts, batch_size=batch_size)
+    Legislator.objects.bulk_update(updates, HASH_FIELDS[1:], batch_size=batch_size)
+    for start in range(0, len(deletes), batch_size):
+        Legislator.objects.filter(govtrack_id__in=deletes[start:start + batch_size]).delete()
+
+    groups = {stored_groups[govtrack_id] for govtrack_id in deletes}
+    groups.update(stored_groups[legislator.govtrack_id] for legislator in updates)
+    groups.update((legislator.state, legislator.party) for legislator in inserts + updates)
+    return (
+        [legislator.govtrack_id for legislator in inserts],
+        [legislator.govtrack_id for legislator in updates],
+        deletes,
+        groups,
+    )
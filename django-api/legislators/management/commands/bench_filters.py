@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from legislators.views import query_legislators_orm, query_legislators_snapshot
+import time
+
+FILTERS = [
+    {},
+    {"state": "CA"},
+    {"party": "Democrat"},
+    {"party": "Republican"},
+    {"state": "TX", "party": "Republican"},
+    {"state": "NY", "party": "Democrat", "type": "rep"},
+    {"type": "sen"},
+]
+
+def time_call(func, filters, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(**filters)
+    elapsed = time.perf_counter() - start
+    return result, elapsed / repeat * 1000
+
+class Command(BaseCommand):
+    help = "Benchmark legislators list filtering: ORM queries vs in-memory indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=100, help="Iterations per filter combination")
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        # Warm the snapshot so its load is not counted against the index path
+        query_legislators_snapshot()
+
+        self.stdout.write(f"{'filters':<45} {'rows':>6} {'orm ms':>10} {'index ms':>10} {'speedup':>8}")
+        for filters in FILTERS:
+            orm_rows, orm_ms = time_call(query_legislators_orm, filters, repeat)
+            index_rows, index_ms = time_call(query_legislators_snapshot, filters, repeat)
+
+            orm_ids = sorted(row["govtrack_id"] for row in orm_rows)
+            index_ids = [row["govtrack_id"] for row in index_rows]
+            if orm_ids != index_ids:
+                self.stderr.write(self.style.ERROR(f"Mismatch for {filters}: orm={len(orm_ids)} index={len(index_ids)}"))
+                return
+
+            label = ", ".join(f"{key}={value}" for key, value in filters.items()) or "(none)"
+            self.stdout.write(f"{label:<45} {len(index_rows):>6} {orm_ms:>10.3f} {index_ms:>10.3f} {orm_ms / index_ms:>7.1f}x")
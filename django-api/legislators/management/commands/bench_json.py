@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+from legislators.renderers import ORJSONRenderer, orjson
+import time
+
+QUERIES = [
+    "",
+    "?fields=govtrack_id,first_name,last_name,state",
+    "?limit=100",
+    "?state=CA",
+]
+
+def time_request(client, path, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        response = client.get(path)
+    elapsed = time.perf_counter() - start
+    return response.content, elapsed / repeat * 1000
+
+class Command(BaseCommand):
+    help = "Benchmark /api/legislators/ latency with the stdlib JSONRenderer vs ORJSONRenderer (same output)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50, help="Requests per query and encoder")
+
+    def handle(self, *args, **options):
+        if orjson is None or settings.JSON_BACKEND != "orjson":
+            self.stderr.write(self.style.ERROR("Needs orjson installed and JSON_BACKEND=orjson"))
+            return
+
+        repeat = options["repeat"]
+        client = Client()
+        use_orjson = ORJSONRenderer.use_orjson
+
+        self.stdout.write(f"{'query':<50} {'bytes':>9} {'stdlib ms':>10} {'orjson ms':>10} {'speedup':>8}")
+        try:
+            for query in QUERIES:
+                path = f"/api/legislators/{query}"
+                client.get(path)  # warm the snapshot
+
+                ORJSONRenderer.use_orjson = False
+                stdlib_body, stdlib_ms = time_request(client, path, repeat)
+                ORJSONRenderer.use_orjson = True
+                orjson_body, orjson_ms = time_request(client, path, repeat)
+
+                if stdlib_body != orjson_body:
+                    self.stderr.write(self.style.ERROR(f"Output differs for {path}"))
+                    return
+
+                self.stdout.write(
+                    f"{query or '(all)':<50} {len(orjson_body):>9} {stdlib_ms:>10.2f} {orjson_ms:>10.2f} "
+                    f"{stdlib_ms / orjson_ms:>7.1f}x"
+                )
+        finally:
+            ORJSONRenderer.use_orjson = use_orjson
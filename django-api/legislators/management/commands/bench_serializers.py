@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from legislators.models import Legislator
+from legislators.serializers import LegislatorSerializer, serialize_legislators
+from rest_framework.renderers import JSONRenderer
+import time
+
+FIELD_SETS = [
+    None,
+    ["govtrack_id", "first_name", "last_name", "state"],
+    ["govtrack_id", "age"],
+]
+
+def per_row_us(func, rows, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = time.perf_counter() - start
+    return result, elapsed / repeat / max(rows, 1) * 1_000_000
+
+class Command(BaseCommand):
+    help = "Benchmark LegislatorSerializer vs the serialize_legislators fast path (per-row cost, same output)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20, help="Iterations per field set")
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        queryset = Legislator.objects.order_by("govtrack_id")
+        rows = queryset.count()
+        renderer = JSONRenderer()
+
+        self.stdout.write(f"{rows} rows, {repeat} iterations (times include the query)")
+        self.stdout.write(f"{'fields':<45} {'drf us/row':>11} {'fast us/row':>12} {'speedup':>8}")
+        for fields in FIELD_SETS:
+            drf_rows, drf_us = per_row_us(
+                lambda: LegislatorSerializer(queryset, many=True, fields=fields).data, rows, repeat
+            )
+            fast_rows, fast_us = per_row_us(lambda: serialize_legislators(queryset, fields), rows, repeat)
+
+            if renderer.render(drf_rows) != renderer.render(fast_rows):
+                self.stderr.write(self.style.ERROR(f"Output differs for fields={fields}"))
+                return
+
+            label = ",".join(fields) if fields else "(all)"
+            self.stdout.write(f"{label:<45} {drf_us:>11.2f} {fast_us:>12.2f} {drf_us / fast_us:>7.1f}x")
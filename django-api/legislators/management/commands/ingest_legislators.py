@@ -1,37 +1,98 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from legislators.models import Legislator
-import requests
+from legislators_common.legislator_csv import InvalidRow, fetch_csv_lines
+from legislators.cache import invalidate_all, invalidate_legislators
+from legislators.ingestion import apply_diff, upsert_batch, validate_row, validate_shards
+from legislators.models import DatasetVersion, IngestSource, Legislator
 import csv
-from io import StringIO
 import os
-from datetime import datetime
-
-def parse_date(date_str):
-    if not date_str:
-        return None
-    for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%Y-%m-%d %H:%M:%S"):
-        try:
-            return datetime.strptime(date_str, fmt).date()
-        except ValueError:
-            continue
-    return None
+
+def read_lines(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        yield from f
 
 class Command(BaseCommand):
     help = "Ingest legislators data into the legislators table"
 
     def add_arguments(self, parser):
         parser.add_argument("--truncate", action="store_true", help="Clear existing data before ingesting")
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows per INSERT ... ON CONFLICT statement")
+        parser.add_argument("--csv-path", help="Read a local CSV instead of downloading LEGISLATORS_CSV_URL")
+        parser.add_argument("--diff", action="store_true",
+                            help="Write only inserted/changed/removed rows and keep existing notes")
+        parser.add_argument("--force", action="store_true",
+                            help="Ignore the stored ETag/Last-Modified and always download")
+        parser.add_argument("--workers", type=int, default=1,
+                            help="Validate --csv-path in byte-range shards across this many processes")
+
+    def read_csv(self, options):
+        """Return (lines, source). lines is None when the upstream file is unchanged.
+
+        Downloads are streamed and parsed as chunks arrive; ``source`` carries
+        the response validators to store once the load has succeeded.
+        """
+        if options.get("csv_path"):
+            self.stdout.write(self.style.NOTICE(f"Reading: {options['csv_path']}"))
+            return read_lines(options["csv_path"]), None
 
-    def handle(self, *args, **options):
         csv_url = os.environ.get("LEGISLATORS_CSV_URL")
+        source = None if options["force"] else IngestSource.objects.filter(url=csv_url).first()
 
         self.stdout.write(self.style.NOTICE(f"Downloading: {csv_url}"))
-        resp = requests.get(csv_url, timeout=30)
-        resp.raise_for_status()
+        lines, validators = fetch_csv_lines(
+            csv_url,
+            etag=source.etag if source else None,
+            last_modified=source.last_modified if source else None,
+        )
+        if lines is None:
+            return None, None
+        return lines, IngestSource(url=csv_url, **validators)
+
+    def read_legislators(self, lines, options, counts):
+        """Yield validated Legislators in file order, counting skips in ``counts``.
+
+        With --workers the CSV is validated in shards by a process pool and
+        each shard's skipped lines are reported as it arrives.
+        """
+        if options["workers"] == 1:
+            for row in csv.DictReader(lines):
+                try:
+                    yield validate_row(row)
+                except InvalidRow:
+                    counts["skipped"] += 1
+            return
+
+        for index, (report, rows) in enumerate(validate_shards(options["csv_path"], options["workers"]), 1):
+            self.stdout.write(self.style.NOTICE(
+                f"Shard {index}: lines {report['first_line']}-{report['last_line']}, "
+                f"{report['valid']} valid, {report['skipped']} skipped"
+            ))
+            if options["verbosity"] > 1:
+                for line, error in report["skips"]:
+                    self.stdout.write(f"  line {line}: {error}")
+            counts["skipped"] += report["skipped"]
+            for fields in rows:
+                yield Legislator(**fields)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+        if options["diff"] and options["truncate"]:
+            raise CommandError("--diff and --truncate are mutually exclusive")
+        if options["workers"] < 1:
+            raise CommandError("--workers must be at least 1")
+        if options["workers"] > 1 and not options.get("csv_path"):
+            raise CommandError("--workers needs a local file (--csv-path)")
+        lines, source = self.read_csv(options)
+        if lines is None:
+            self.stdout.write(self.style.SUCCESS("Upstream CSV not modified since the last load, nothing to do"))
+            return
+        counts = {"skipped": 0}
+        legislators = self.read_legislators(lines, options, counts)
 
-        f = StringIO(resp.text)
-        reader = csv.DictReader(f)
+        if options["diff"]:
+            return self.handle_diff(legislators, counts, batch_size, source)
 
         with transaction.atomic():
             if options.get("truncate"):
@@ -39,53 +100,39 @@ class Command(BaseCommand):
                 Legislator.objects.all().delete()
 
             added = 0
-            skipped = 0
+            batch = []
 
-            for row in reader:
-                try:
-                    govtrack_id = int(row.get("govtrack_id", 0))
-                    if not govtrack_id:
-                        skipped += 1
-                        continue
-
-                    first_name = (row.get("first_name") or "").strip()
-                    last_name = (row.get("last_name") or "").strip()
-                    birthday = parse_date((row.get("birthday") or "").strip())
-                    gender = (row.get("gender") or "").strip()
-                    type_val = (row.get("type") or "").strip()
-                    state = (row.get("state") or "").strip()
-                    district = (row.get("district") or "").strip() or None
-                    party = (row.get("party") or "").strip()
-                    url = (row.get("url") or "").strip()
-
-                    # required fields
-                    if not all([first_name, last_name, birthday, gender, type_val, state, party]):
-                        skipped += 1
-                        continue
-
-                    # Upsert
-                    Legislator.objects.update_or_create(
-                        govtrack_id=govtrack_id,
-                        defaults={
-                            "first_name": first_name,
-                            "last_name": last_name,
-                            "birthday": birthday,
-                            "gender": gender,
-                            "type": type_val,
-                            "state": state,
-                            "district": district,
-                            "party": party,
-                            "url": url or "",
-                            "notes": None,
-                        },
-                    )
-                    added += 1
-
-                    if added % 100 == 0:
-                        self.stdout.write(self.style.NOTICE(f"Processed {added} records..."))
-
-                except Exception as e:
-                    skipped += 1
-                    continue
-
-        self.stdout.write(self.style.SUCCESS(f"Ingestion complete. Added/Updated: {added}, Skipped: {skipped}"))
\ No newline at end of file
+            for legislator in legislators:
+                batch.append(legislator)
+                if len(batch) >= batch_size:
+                    added += upsert_batch(batch)
+                    batch = []
+                    self.stdout.write(self.style.NOTICE(f"Processed {added} records..."))
+
+            if batch:
+                added += upsert_batch(batch)
+
+            DatasetVersion.bump()
+            if source:
+                source.save()
+        invalidate_all()
+
+        self.stdout.write(self.style.SUCCESS(f"Ingestion complete. Added/Updated: {added}, Skipped: {counts['skipped']}"))
+
+    def handle_diff(self, legislators, counts, batch_size, source):
+        legislators = list(legislators)
+
+        with transaction.atomic():
+            inserted, updated, deleted, groups = apply_diff(legislators, batch_size)
+            # Nothing changed: leave the dataset version (and every cache keyed on it) alone
+            if inserted or updated or deleted:
+                DatasetVersion.bump()
+            if source:
+                source.save()
+        if inserted or updated or deleted:
+            invalidate_legislators(inserted + updated + deleted, groups)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Differential ingestion complete. Inserted: {len(inserted)}, Updated: {len(updated)}, "
+            f"Deleted: {len(deleted)}, Skipped: {counts['skipped']}"
+        ))
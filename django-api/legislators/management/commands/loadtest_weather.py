@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+import asyncio
+import itertools
+import time
+
+import httpx
+from legislators.weather import STATE_CAPITALS
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+async def run_load(base_url, paths, total, concurrency, timeout):
+    latencies = []
+    errors = 0
+    counter = itertools.count()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        async def worker():
+            nonlocal errors
+            while (i := next(counter)) < total:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(paths[i % len(paths)])
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                errors += not ok
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "errors": errors,
+    }
+
+class Command(BaseCommand):
+    help = ("Load-test the weather endpoint of running deployments, e.g. gunicorn (WSGI) vs uvicorn "
+            "with DJANGO_ASYNC_VIEWS=true (ASGI); run the servers with WEATHER_CACHE_TTL=0 to measure upstream waits")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", action="append", required=True, metavar="NAME=URL",
+                            help="Deployment to test, e.g. wsgi=http://localhost:8001 (repeatable)")
+        parser.add_argument("--requests", type=int, default=2000, help="Requests per target")
+        parser.add_argument("--concurrency", type=int, default=200, help="Concurrent clients")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options["target"]:
+            name, sep, url = target.partition("=")
+            if not sep:
+                raise CommandError(f"--target must look like NAME=URL, got {target!r}")
+            targets.append((name, url.rstrip("/")))
+
+        # One weather path per legislator (with a known capital), so every capital gets requested
+        rows = httpx.get(f"{targets[0][1]}/api/legislators/?fields=govtrack_id,state", timeout=options["timeout"]).json()
+        paths = [f"/api/legislators/{row['govtrack_id']}/weather/" for row in rows if row["state"] in STATE_CAPITALS]
+        if not paths:
+            raise CommandError("No legislators found; load data first")
+
+        self.stdout.write(f"{'target':<12} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for name, url in targets:
+            result = asyncio.run(run_load(url, paths, options["requests"], options["concurrency"], options["timeout"]))
+            self.stdout.write(
+                f"{name:<12} {result['rps']:>9.1f} {result['p50']:>9.1f} {result['p95']:>9.1f} "
+                f"{result['p99']:>9.1f} {result['errors']:>7}"
+            )
@@ -0,0 +1,113 @@
+"""Per-request metrics, exposed in the Prometheus text format on /api/metrics/.
+
+For every route: response time, database queries and the time spent in them
+(an execute wrapper on every connection), and time spent rendering JSON. The
+histograms and the exposition format are in ``legislators_common.metrics``;
+this module hooks them into Django.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connection
+from django.db.backends.signals import connection_created
+from legislators_common.metrics import request_metrics
+
+
+# Counters of the request being handled; a context variable, so that queries
+# run through sync_to_async by the async views are counted too
+_current = ContextVar('request_metrics', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    state = _current.get()
+    if state is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        state['db_queries'] += 1
+        state['db_time'] += time.perf_counter() - started
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    # Wrappers live on the thread's DatabaseWrapper and survive reconnects
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def timed_serialization():
+    """Add the time spent in the block to the current request's serialization time"""
+    state = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if state is not None:
+            state['serialization'] = (state['serialization'] or 0.0) + time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """Record every request in ``request_metrics`` (first in MIDDLEWARE).
+
+    DRF responses are rendered after the view returns; that rendering is the
+    serialization time. Streamed bodies are produced after the response is
+    recorded, so their duration covers the time to the first byte only.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_wrapper, dispatch_uid='legislators.metrics')
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, state)
+        return response
+
+    async def __acall__(self, request):
+        state, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, state)
+        return response
+
+    def start(self):
+        # Connections opened before the middleware was loaded never sent connection_created
+        install_query_wrapper(None, connection)
+        state = {'started': time.perf_counter(), 'db_queries': 0, 'db_time': 0.0, 'serialization': None}
+        return state, _current.set(state)
+
+    def process_template_response(self, request, response):
+        state = _current.get()
+        if state is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                state['serialization'] = (state['serialization'] or 0.0) + time.perf_counter() - started
+            response.add_post_render_callback(rendered)
+        return response
+
+    def record(self, request, response, state):
+        match = request.resolver_match
+        route = '/' + match.route if match is not None and match.route else 'unmatched'
+        request_metrics.record(
+            request.method, route, response.status_code, time.perf_counter() - state['started'],
+            state['db_queries'], state['db_time'], state['serialization']
+        )
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def create_version_row(apps, schema_editor):
+    DatasetVersion = apps.get_model("legislators", "DatasetVersion")
+    DatasetVersion.objects.get_or_create(pk=1, defaults={"version": 0})
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("legislators", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DatasetVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.BigIntegerField(default=0)),
+                (
+                    "updated_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "db_table": "dataset_version",
+            },
+        ),
+        migrations.RunPython(create_version_row, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("legislators", "0002_datasetversion"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="legislator",
+            name="district",
+            field=models.CharField(blank=True, max_length=10, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("legislators", "0003_alter_legislator_district"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngestSource",
+            fields=[
+                ("url", models.CharField(max_length=500, primary_key=True, serialize=False)),
+                ("etag", models.CharField(blank=True, max_length=200, null=True)),
+                ("last_modified", models.CharField(blank=True, max_length=100, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "ingest_source",
+            },
+        ),
+    ]
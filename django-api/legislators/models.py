@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
 from datetime import date
 
 class Legislator(models.Model):
@@ -28,4 +30,36 @@ class Legislator(models.Model):
 
     def calculate_age(self):
         today = date.today()
-        return today.year - self.birthday.year - ((today.month, today.day) < (self.birthday.month, self.birthday.day))
\ No newline at end of file
+        return today.year - self.birthday.year - ((today.month, today.day) < (self.birthday.month, self.birthday.day))
+
+class DatasetVersion(models.Model):
+    """Single-row counter bumped on every write to the legislators table"""
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'dataset_version'
+
+    @classmethod
+    def current(cls):
+        return cls.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls):
+        """Increment the version; call inside the transaction making the write"""
+        updated = cls.objects.filter(pk=1).update(version=F('version') + 1, updated_at=timezone.now())
+        if not updated:
+            cls.objects.create(pk=1, version=1)
+        return cls.current()
+
+
+
+class IngestSource(models.Model):
+    """HTTP validators of the last CSV loaded from a URL, for conditional GETs"""
+    url = models.CharField(max_length=500, primary_key=True)
+    etag = models.CharField(max_length=200, null=True, blank=True)
+    last_modified = models.CharField(max_length=100, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'ingest_source'
@@ -0,0 +1,58 @@
+import re
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+EXPONENT = re.compile(rb'e[-0-9]')
+
+
+def float_mismatch(ret):
+    """Whether ret may hold a float orjson writes differently from repr()
+    (1e-7 vs 1e-07, 1e16 vs 1e+16, 0.00001 vs 1e-05)"""
+    if b'0.0000' in ret:
+        return True
+    # A bare 'e' regex scans far faster than one that also matches the digit before it
+    return any(ret[match.start() - 1:match.start()].isdigit() for match in EXPONENT.finditer(ret))
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer encoding with orjson (optional dependency), same bytes.
+
+    Covers the compact UTF-8 output the API uses; indented output (Accept:
+    application/json; indent=N), non-string keys and anything else orjson
+    can't reproduce exactly go through JSONRenderer. Dates are encoded
+    natively; datetimes and other types use DRF's encoder.
+    """
+    use_orjson = orjson is not None and settings.JSON_BACKEND == 'orjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (not self.use_orjson or data is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if float_mismatch(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        # JSONRenderer escapes U+2028/U+2029 so the output is valid JavaScript too
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class NDJSONRenderer(ORJSONRenderer):
+    """Newline-delimited JSON: one compact JSON document per list item"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, list):
+            return super().render(data, accepted_media_type, renderer_context)
+        return b''.join(self.render_item(item) for item in data)
+
+    def render_item(self, item):
+        return super().render(item) + b'\n'
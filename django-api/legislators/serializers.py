@@ -1,3 +1,4 @@
+from datetime import date
 from rest_framework import serializers
 from .models import Legislator
 
@@ -8,9 +9,61 @@ class LegislatorSerializer(serializers.ModelSerializer):
         model = Legislator
         fields = '__all__'
 
+    def __init__(self, *args, **kwargs):
+        # Optional ``fields`` kwarg restricts output to a subset of fields
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     def get_age(self, obj):
         return obj.calculate_age()
 
+# LegislatorSerializer's output keys, in its order: primary key, declared fields, model fields
+SERIALIZED_FIELDS = (
+    'govtrack_id', 'age', 'first_name', 'last_name', 'birthday', 'gender', 'type',
+    'state', 'district', 'party', 'url', 'notes'
+)
+
+def iter_legislator_rows(queryset, fields=None, today=None, chunk_size=None):
+    """Read-only fast path for LegislatorSerializer(queryset, many=True, fields=fields).data.
+
+    Reads ``values_list()`` tuples and builds each dict directly, skipping
+    model instances and per-field DRF dispatch. Yields the same keys, order
+    and values (ISO birthday, age computed once per call for ``today``).
+    With ``chunk_size`` rows are read through a server-side cursor.
+    """
+    today = today or date.today()
+    output = [field for field in SERIALIZED_FIELDS if fields is None or field in fields]
+    fetch = [field for field in output if field != 'age']
+    if 'age' in output and 'birthday' not in fetch:
+        fetch.append('birthday')  # needed for the age, dropped from the output
+    age_at = output.index('age') if 'age' in output else None
+    birthday_at = fetch.index('birthday') if 'birthday' in fetch else None
+    today_key = (today.month, today.day)
+
+    tuples = queryset.values_list(*fetch)
+    if chunk_size:
+        tuples = tuples.iterator(chunk_size=chunk_size)
+    for values in tuples:
+        values = list(values)
+        if birthday_at is not None:
+            birthday = values[birthday_at]
+            if birthday is not None:
+                values[birthday_at] = birthday.isoformat()
+                if age_at is not None:
+                    age = today.year - birthday.year - (today_key < (birthday.month, birthday.day))
+            elif age_at is not None:
+                age = None
+        if age_at is not None:
+            values.insert(age_at, age)
+        # zip() stops at the output fields, dropping a birthday fetched only for the age
+        yield dict(zip(output, values))
+
+def serialize_legislators(queryset, fields=None, today=None):
+    return list(iter_legislator_rows(queryset, fields, today))
+
 class NotesUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Legislator
@@ -0,0 +1,93 @@
+import threading
+import time
+from datetime import date
+
+from django.conf import settings
+from legislators_common.age_stats import AgeStatsEngine
+
+from .index import LegislatorIndex
+from .models import DatasetVersion, Legislator
+from .serializers import serialize_legislators
+
+
+class SnapshotState:
+    """Serialized legislators plus their indexes at one dataset version"""
+
+    def __init__(self, key, rows):
+        self.key = key
+        self.rows = rows
+        self.by_id = {row['govtrack_id']: row for row in rows}
+        self.index = LegislatorIndex(rows)
+
+    def filter(self, state=None, party=None, type=None):
+        if not (state or party or type):
+            return self.rows
+        return [self.by_id[govtrack_id] for govtrack_id in self.index.filter(state, party, type)]
+
+
+class LegislatorSnapshot:
+    """Per-process cache of the serialized legislators table (LegislatorSerializer
+    output, built with the ``serialize_legislators`` fast path).
+
+    Reloaded when DatasetVersion moves on (ingestion, notes updates) or when
+    the date rolls over, since serialized rows carry each legislator's age.
+    Each reload is fed to ``age_stats``, which only applies the rows that changed.
+    """
+
+    def __init__(self, check_interval=0.0):
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._state = None
+        self._checked_at = 0.0
+        self.age_stats = AgeStatsEngine()
+
+    def _load(self, key):
+        legislators = Legislator.objects.order_by('govtrack_id')
+        return SnapshotState(key, serialize_legislators(legislators, today=key[1]))
+
+    def get(self, version=None):
+        """The current SnapshotState; ``version`` is the DatasetVersion the caller
+        already read for this request (read here when None)"""
+        state = self._state
+        now = time.monotonic()
+        if state is not None and now - self._checked_at < self._check_interval and state.key[1] == date.today():
+            return state
+
+        key = (DatasetVersion.current() if version is None else version, date.today())
+        self._checked_at = now
+        if state is not None and state.key == key:
+            return state
+
+        with self._lock:
+            state = self._state
+            if state is None or state.key != key:
+                state = self._load(key)
+                self.age_stats.sync(state.rows)
+                self._state = state
+        return state
+
+    def get_with_age_stats(self, today=None, version=None):
+        """Return (SnapshotState, age stats) computed from the same rows.
+
+        ``age_stats`` is synced to whatever state is current under the lock,
+        so the pair is read there, and every id in the stats has a row in the
+        returned state. A state dropped by invalidate() in the meantime gets
+        its stats from a throwaway engine.
+        """
+        state = self.get(version)
+        with self._lock:
+            if self._state is not None:
+                state = self._state
+                stats = self.age_stats.stats(today)
+                if stats is None or {stats['youngest'][0], stats['oldest'][0]} <= state.by_id.keys():
+                    return state, stats
+        engine = AgeStatsEngine()
+        engine.sync(state.rows)
+        return state, engine.stats(today)
+
+    def invalidate(self):
+        with self._lock:
+            self._state = None
+
+
+legislator_snapshot = LegislatorSnapshot(check_interval=settings.SNAPSHOT_CHECK_INTERVAL)
@@ -1,3 +1,1116 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from legislators_common import legislator_csv, weather as shared_weather
+from legislators_common.age_stats import AgeStatsEngine
+from legislators_common.legislator_csv import shard_ranges
+from legislators_common.upstream import CircuitOpenError, UpstreamClient
+from legislators_common.weather import WeatherCache, WeatherPrefetcher
+from rest_framework.renderers import JSONRenderer
+
+from . import async_views, models, views, weather
+from .conditional import dataset_validators
+from .models import DatasetVersion, IngestSource, Legislator
+from .renderers import ORJSONRenderer, orjson
+from .serializers import LegislatorSerializer, serialize_legislators
+from .snapshot import LegislatorSnapshot
+from .weather import fetch_capital_weather
+
+CSV_COLUMNS = ["govtrack_id", "first_name", "last_name", "birthday", "gender", "type", "state", "district", "party", "url"]
+
+
+def write_csv(rows):
+    f = tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", delete=False)
+    with f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return f.name
+
+
+def legislator_row(govtrack_id, **overrides):
+    row = {
+        "govtrack_id": govtrack_id,
+        "first_name": f"First{govtrack_id}",
+        "last_name": f"Last{govtrack_id}",
+        "birthday": "1960-05-17",
+        "gender": "F",
+        "type": "rep",
+        "state": "CA",
+        "district": "12",
+        "party": "Democrat",
+        "url": "https://example.gov",
+    }
+    row.update(overrides)
+    return row
+
+
+def fixed_date(today):
+    """``date`` subclass whose today() is pinned, for patching a module's ``date``"""
+    class FixedDate(date):
+        @classmethod
+        def today(cls):
+            return today
+    return FixedDate
+
+
+class IngestLegislatorsCommandTests(TestCase):
+    def ingest(self, rows, *args):
+        path = write_csv(rows)
+        self.addCleanup(os.unlink, path)
+        with CaptureQueriesContext(connection) as queries:
+            call_command("ingest_legislators", "--csv-path", path, *args, stdout=StringIO())
+        return len(queries)
+
+    def test_upserts_and_skips_invalid_rows(self):
+        rows = [legislator_row(i) for i in range(1, 6)]
+        rows.append(legislator_row(6, first_name=""))
+        rows.append(legislator_row(7, birthday="not a date"))
+        rows.append(legislator_row(8, type="sen", district=""))
+        self.ingest(rows)
+
+        self.assertEqual(Legislator.objects.count(), 6)
+        self.assertIsNone(Legislator.objects.get(govtrack_id=8).district)
+
+        self.ingest([legislator_row(1, party="Independent")])
+        self.assertEqual(Legislator.objects.get(govtrack_id=1).party, "Independent")
+        self.assertEqual(Legislator.objects.count(), 6)
+
+    def test_upsert_keeps_notes(self):
+        self.ingest([legislator_row(1), legislator_row(2)])
+        Legislator.objects.filter(govtrack_id=1).update(notes="keep me")
+
+        self.ingest([legislator_row(1, party="Independent"), legislator_row(2)])
+        legislator = Legislator.objects.get(govtrack_id=1)
+        self.assertEqual((legislator.party, legislator.notes), ("Independent", "keep me"))
+
+    def test_truncate_replaces_existing_rows(self):
+        self.ingest([legislator_row(i) for i in range(1, 4)])
+        self.ingest([legislator_row(10)], "--truncate")
+
+        self.assertEqual(list(Legislator.objects.values_list("govtrack_id", flat=True)), [10])
+
+    def test_query_count_scales_with_batches_not_rows(self):
+        small = self.ingest([legislator_row(i) for i in range(1, 101)], "--batch-size", "50")
+        large = self.ingest([legislator_row(i) for i in range(1, 401)], "--batch-size", "50")
+
+        # 300 more rows at 50 rows per statement: exactly 6 more statements
+        self.assertEqual(large - small, 6)
+        self.assertLess(large, 20)
+        self.assertEqual(Legislator.objects.count(), 400)
+
+    def test_diff_writes_only_changes_and_keeps_notes(self):
+        self.ingest([legislator_row(i) for i in range(1, 6)])
+        Legislator.objects.filter(govtrack_id__in=[1, 2]).update(notes="keep me")
+        version = DatasetVersion.current()
+
+        self.ingest([legislator_row(i) for i in range(1, 6)], "--diff")
+        self.assertEqual(DatasetVersion.current(), version)
+
+        rows = [legislator_row(i) for i in range(1, 5)]
+        rows[1]["party"] = "Independent"
+        rows.append(legislator_row(9))
+        self.ingest(rows, "--diff")
+
+        self.assertEqual(DatasetVersion.current(), version + 1)
+        self.assertEqual(sorted(Legislator.objects.values_list("govtrack_id", flat=True)), [1, 2, 3, 4, 9])
+        legislator = Legislator.objects.get(govtrack_id=2)
+        self.assertEqual((legislator.party, legislator.notes), ("Independent", "keep me"))
+        self.assertEqual(Legislator.objects.get(govtrack_id=1).notes, "keep me")
+
+    @mock.patch.object(legislator_csv, "MIN_SHARD_BYTES", 1)
+    def test_workers_validate_shards_in_order(self):
+        rows = [legislator_row(i, url=f"https://example.gov/{i}\nline two") for i in range(1, 40)]
+        rows[4]["birthday"] = "not a date"
+        rows[20]["govtrack_id"] = "x21"
+        rows.append(legislator_row(3, party="Independent"))
+        path = write_csv(rows)
+        self.addCleanup(os.unlink, path)
+
+        out = StringIO()
+        call_command("ingest_legislators", "--csv-path", path, "--workers", "2", "--verbosity", "2", stdout=out)
+
+        self.assertEqual(Legislator.objects.count(), 37)
+        self.assertEqual(Legislator.objects.get(govtrack_id=3).party, "Independent")
+        self.assertEqual(Legislator.objects.get(govtrack_id=7).url, "https://example.gov/7\nline two")
+        # Every record spans two lines after the header
+        self.assertIn("line 10: Legislator 5: missing required fields", out.getvalue())
+        self.assertIn("line 42: Invalid govtrack_id", out.getvalue())
+        self.assertIn("Skipped: 2", out.getvalue())
+
+    def test_shard_ranges_cut_between_records(self):
+        rows = [legislator_row(i, url='say "hi"\n' * (i % 3)) for i in range(1, 200)]
+        path = write_csv(rows)
+        self.addCleanup(os.unlink, path)
+
+        with mock.patch.object(legislator_csv, "MIN_SHARD_BYTES", 1):
+            header, shards = shard_ranges(path, 3)
+
+        self.assertEqual(header, CSV_COLUMNS)
+        self.assertEqual(len(shards), 12)
+        with open(path, "rb") as f:
+            data = f.read()
+        ids = []
+        for start, end, _ in shards:
+            reader = csv.DictReader(StringIO(data[start:end].decode(), newline=""), fieldnames=header)
+            ids.extend(int(row["govtrack_id"]) for row in reader)
+        self.assertEqual(ids, list(range(1, 200)))
+
+
+class CSVHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the upstream CSV host, honouring If-None-Match"""
+    body = b""
+    etag = '"v1"'
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("ETag", self.etag)
+        self.end_headers()
+        # Dribble the body out in small chunks to exercise incremental parsing
+        for start in range(0, len(self.body), 64):
+            self.wfile.write(self.body[start:start + 64])
+
+    def log_message(self, *args):
+        pass
+
+
+class StreamingIngestTests(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), CSVHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/legislators-current.csv"
+        CSVHandler.requests_seen = []
+        self.serve([legislator_row(i, first_name="José") for i in range(1, 4)])
+
+    def serve(self, rows, etag='"v1"'):
+        out = StringIO()
+        writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+        CSVHandler.body = out.getvalue().encode("utf-8")
+        CSVHandler.etag = etag
+
+    def ingest(self, *args):
+        with mock.patch.dict(os.environ, {"LEGISLATORS_CSV_URL": self.url}):
+            call_command("ingest_legislators", *args, stdout=StringIO())
+
+    def test_streams_csv_and_skips_unchanged_upstream(self):
+        self.ingest()
+        self.assertEqual(Legislator.objects.count(), 3)
+        self.assertEqual(Legislator.objects.get(govtrack_id=1).first_name, "José")
+        self.assertEqual(IngestSource.objects.get(url=self.url).etag, '"v1"')
+
+        version = DatasetVersion.current()
+        self.ingest()
+        self.assertEqual(CSVHandler.requests_seen[-1].get("If-None-Match"), '"v1"')
+        self.assertEqual(DatasetVersion.current(), version)
+
+        self.serve([legislator_row(i) for i in range(1, 6)], etag='"v2"')
+        self.ingest()
+        self.assertEqual(Legislator.objects.count(), 5)
+        self.assertEqual(IngestSource.objects.get(url=self.url).etag, '"v2"')
+
+    def test_quoted_multi_line_fields_match_the_file(self):
+        rows = [
+            legislator_row(1, first_name="Zoë", last_name="Line\r\nbreak"),
+            legislator_row(2, last_name="Bare\rreturn\nand newline"),
+            legislator_row(3, last_name="Not\u2028a\x85break\x0cat all"),
+            legislator_row(4),
+        ]
+        path = write_csv(rows)
+        self.addCleanup(os.unlink, path)
+        call_command("ingest_legislators", "--csv-path", path, stdout=StringIO())
+        from_file = list(Legislator.objects.order_by("govtrack_id").values())
+        self.assertEqual(from_file[2]["last_name"], "Not\u2028a\x85break\x0cat all")
+
+        self.serve(rows)
+        # Small reads split the multi-byte characters and \r\n pairs across chunks
+        for chunk_size in (1, 3, 64 * 1024):
+            with self.subTest(chunk_size=chunk_size), mock.patch.object(legislator_csv, "FETCH_CHUNK_SIZE", chunk_size):
+                Legislator.objects.all().delete()
+                self.ingest("--force")
+                self.assertEqual(list(Legislator.objects.order_by("govtrack_id").values()), from_file)
+
+    def test_force_ignores_stored_validators(self):
+        self.ingest()
+        self.ingest("--force")
+        self.assertNotIn("If-None-Match", CSVHandler.requests_seen[-1])
+
+
+class WeatherCacheTests(SimpleTestCase):
+    def test_concurrent_misses_share_one_upstream_call(self):
+        calls = []
+        release = threading.Event()
+
+        def fetch(capital):
+            calls.append(capital)
+            release.wait(5)
+            return {"temperature": 70}
+
+        cache = WeatherCache(fetch, ttl=60)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get("Austin")[0])) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        while cache.stats()["misses"] < 8:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(calls, ["Austin"])
+        self.assertEqual(results, [{"temperature": 70}] * 8)
+        self.assertEqual(cache.get("Austin")[0], {"temperature": 70})
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["coalesced"], 7)
+
+    def test_stale_entry_is_served_while_refreshing(self):
+        values = iter([{"temperature": 70}, {"temperature": 75}])
+        cache = WeatherCache(lambda capital: next(values), ttl=0, stale_ttl=60)
+
+        self.assertEqual(cache.get("Austin"), ({"temperature": 70}, 0.0))
+        self.assertEqual(cache.get("Austin")[0], {"temperature": 70})
+        for _ in range(100):
+            if cache.peek("Austin")[0] == {"temperature": 75}:
+                break
+            time.sleep(0.01)
+        self.assertEqual(cache.peek("Austin")[0], {"temperature": 75})
+        self.assertEqual(cache.stats()["stale_hits"], 1)
+
+    def test_errors_are_not_cached(self):
+        cache = WeatherCache(lambda capital: {}["main"], ttl=60)
+        with self.assertRaises(KeyError):
+            cache.get("Austin")
+        self.assertIsNone(cache.peek("Austin"))
+        self.assertEqual(cache.stats()["errors"], 1)
+
+
+class FakeOpenWeatherMapHandler(BaseHTTPRequestHandler):
+    """Answers like OpenWeatherMap's current weather endpoint; ``fail`` makes it return 500s"""
+
+    requests = []
+    fail = False
+
+    def do_GET(self):
+        capital = parse_qs(urlparse(self.path).query)["q"][0]
+        type(self).requests.append(capital)
+        # A failing upstream still sends a weather-shaped body, which must not be served
+        body = json.dumps({
+            "main": {"temp": 0 if type(self).fail else 71.5, "humidity": 40},
+            "wind": {"speed": 3.2},
+            "weather": [{"description": f"clear sky over {capital}"}],
+        }).encode()
+        self.send_response(500 if type(self).fail else 200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOpenWeatherMapMixin:
+    """Points WEATHER_API_URL at a local FakeOpenWeatherMapHandler server"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenWeatherMapHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.env = mock.patch.dict(os.environ, {
+            "WEATHER_API_KEY": "test",
+            "WEATHER_API_URL": f"http://127.0.0.1:{cls.server.server_port}/data/2.5/weather",
+        })
+        cls.env.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.env.stop()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        FakeOpenWeatherMapHandler.requests = []
+        FakeOpenWeatherMapHandler.fail = False
+
+
+class WeatherPrefetcherTests(FakeOpenWeatherMapMixin, SimpleTestCase):
+    capitals = ["Austin", "Boston", "Denver", "Salem"]
+
+    def test_run_once_warms_every_capital(self):
+        cache = WeatherCache(fetch_capital_weather, ttl=60)
+        prefetcher = WeatherPrefetcher(cache, self.capitals, interval=60, max_workers=2, rate=0)
+
+        self.assertEqual(prefetcher.run_once()["refreshed"], 4)
+        self.assertEqual(sorted(FakeOpenWeatherMapHandler.requests), self.capitals)
+        weather, age = cache.peek("Denver")
+        self.assertEqual(weather["description"], "clear sky over Denver")
+        self.assertLess(age, 60)
+        self.assertEqual(cache.stats()["misses"], 0)
+
+    def test_upstream_failure_keeps_last_known_value(self):
+        cache = WeatherCache(fetch_capital_weather, ttl=0, stale_ttl=0)
+        prefetcher = WeatherPrefetcher(cache, self.capitals, interval=60, rate=0)
+        prefetcher.run_once()
+
+        FakeOpenWeatherMapHandler.fail = True
+        self.assertEqual(prefetcher.run_once()["failed"], 4)
+        weather, age = cache.peek("Austin")
+        self.assertEqual(weather["temperature"], 71.5)
+        self.assertGreater(age, 0)
+
+    def test_error_status_is_not_cached(self):
+        cache = WeatherCache(fetch_capital_weather, ttl=60)
+        FakeOpenWeatherMapHandler.fail = True
+
+        with mock.patch.object(weather, "upstream", UpstreamClient(retries=0)), self.assertRaises(requests.HTTPError):
+            cache.get("Austin")
+        self.assertIsNone(cache.peek("Austin"))
+        self.assertEqual(cache.stats()["errors"], 1)
+
+    def test_rate_limit_spaces_upstream_calls(self):
+        cache = WeatherCache(fetch_capital_weather, ttl=60)
+        prefetcher = WeatherPrefetcher(cache, self.capitals, interval=60, max_workers=4, rate=20)
+
+        self.assertGreaterEqual(prefetcher.run_once()["duration"], 0.15)
+
+    def test_only_the_lock_holder_prefetches(self):
+        lock_path = os.path.join(tempfile.mkdtemp(), "prefetch.lock")
+        first, second = (WeatherPrefetcher(WeatherCache(fetch_capital_weather), self.capitals, interval=60, rate=0)
+                         for _ in range(2))
+        self.addCleanup(first.stop)
+
+        self.assertTrue(first.start(lock_path=lock_path))
+        self.addCleanup(lambda: shared_weather._held_locks.pop().close())
+        self.assertFalse(second.start(lock_path=lock_path))
+        self.assertEqual((first.running, second.running), (True, False))
+
+
+class BulkWeatherViewTests(FakeOpenWeatherMapMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache = mock.patch("legislators.weather.weather_cache", WeatherCache(fetch_capital_weather, ttl=60))
+        cache.start()
+        self.addCleanup(cache.stop)
+        for govtrack_id, state in [(1, "TX"), (2, "TX"), (3, "CA"), (4, "DC")]:
+            Legislator.objects.create(
+                govtrack_id=govtrack_id, first_name="A", last_name="B", gender="F",
+                type="rep", state=state, party="Independent", birthday=date(1970, 1, 1),
+            )
+
+    def test_batch_fetches_each_capital_once(self):
+        response = self.client.post(
+            "/api/legislators/weather:batch/", {"govtrack_ids": [3, 1, 2, 4, 99, 1]}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([entry["legislator"]["govtrack_id"] for entry in data["legislators"]], [3, 1, 2, 4])
+        self.assertEqual(data["not_found"], [99])
+        self.assertEqual(data["legislators"][1]["weather"]["description"], "clear sky over Austin")
+        self.assertIn("Capital city not found", data["legislators"][3]["error"])
+        self.assertEqual(sorted(FakeOpenWeatherMapHandler.requests), ["Austin", "Sacramento"])
+
+    def test_weather_by_state(self):
+        response = self.client.get("/api/weather/?state=tx,CA,TX")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.json()["states"]), ["TX", "CA"])
+        self.assertEqual(self.client.get("/api/weather/").status_code, 400)
+        self.assertEqual(
+            self.client.post("/api/legislators/weather:batch/", {"govtrack_ids": "1"}, content_type="application/json").status_code,
+            400,
+        )
+
+
+class UpstreamClientTests(FakeOpenWeatherMapMixin, SimpleTestCase):
+    def url(self):
+        return os.environ["WEATHER_API_URL"] + "?q=Austin"
+
+    def test_retries_server_errors_then_opens_circuit(self):
+        client = UpstreamClient(retries=1, backoff=0, failure_threshold=2, reset_timeout=60)
+        FakeOpenWeatherMapHandler.fail = True
+
+        self.assertEqual(client.get(self.url()).status_code, 500)
+        self.assertEqual(client.get(self.url()).status_code, 500)
+        self.assertEqual(len(FakeOpenWeatherMapHandler.requests), 4)
+        with self.assertRaises(CircuitOpenError):
+            client.get(self.url())
+        self.assertEqual(len(FakeOpenWeatherMapHandler.requests), 4)
+
+        host_stats = next(iter(client.stats().values()))
+        self.assertEqual(host_stats["circuit"], "open")
+        self.assertEqual(host_stats["latency"]["count"], 4)
+
+    def test_half_open_trial_closes_circuit(self):
+        client = UpstreamClient(retries=0, failure_threshold=1, reset_timeout=0.05)
+        FakeOpenWeatherMapHandler.fail = True
+        client.get(self.url())
+        with self.assertRaises(CircuitOpenError):
+            client.get(self.url())
+
+        time.sleep(0.06)
+        FakeOpenWeatherMapHandler.fail = False
+        self.assertEqual(client.get(self.url()).status_code, 200)
+        self.assertEqual(next(iter(client.stats().values()))["circuit"], "closed")
+
+    async def test_async_get_follows_the_same_policy(self):
+        client = UpstreamClient(retries=1, backoff=0, failure_threshold=2, reset_timeout=60)
+        FakeOpenWeatherMapHandler.fail = True
+
+        with mock.patch.object(async_views, "upstream", client):
+            self.assertEqual((await async_views.upstream_get(self.url())).status_code, 500)
+            self.assertEqual((await async_views.upstream_get(self.url())).status_code, 500)
+            self.assertEqual(len(FakeOpenWeatherMapHandler.requests), 4)
+            with self.assertRaises(CircuitOpenError):
+                await async_views.upstream_get(self.url())
+        self.assertEqual(next(iter(client.stats().values()))["latency"]["count"], 4)
+
+        # Connection errors are retried, then re-raised
+        client = UpstreamClient(retries=1, backoff=0)
+        with mock.patch.object(async_views, "upstream", client), self.assertRaises(httpx.ConnectError):
+            await async_views.upstream_get("http://127.0.0.1:9/")
+        self.assertEqual(next(iter(client.stats().values()))["latency"]["count"], 2)
+
+
+class AsyncViewsTests(FakeOpenWeatherMapMixin, TransactionTestCase):
+    """The async views answer with the same bodies as the DRF views"""
+
+    def setUp(self):
+        super().setUp()
+        cache = mock.patch("legislators.async_views.weather_cache", WeatherCache(fetch_capital_weather, ttl=60))
+        cache.start()
+        self.addCleanup(cache.stop)
+        DatasetVersion.objects.update_or_create(id=1, defaults={"version": 1})
+        for govtrack_id, state in [(1, "TX"), (2, "CA")]:
+            Legislator.objects.create(
+                govtrack_id=govtrack_id, first_name="A", last_name="B", gender="F",
+                type="rep", state=state, party="Independent", birthday=date(1970, 1, 1),
+            )
+
+    async def assert_same(self, name, path, *args):
+        sync_response = await sync_to_async(getattr(views, name))(RequestFactory().get(path), *args)
+        await sync_to_async(sync_response.render)()
+        async_response = await getattr(async_views, name)(AsyncRequestFactory().get(path), *args)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.content, sync_response.content)
+        self.assertEqual(async_response.get("ETag"), sync_response.get("ETag"))
+
+    async def test_read_views_match(self):
+        await self.assert_same("legislators_list", "/api/legislators/?limit=1")
+        await self.assert_same("legislators_list", "/api/legislators/?fields=state")
+        await self.assert_same("legislator_detail", "/api/legislators/1/", 1)
+        await self.assert_same("legislator_detail", "/api/legislators/9/", 9)
+        await self.assert_same("age_stats", "/api/stats/age/?backend=python")
+
+    async def test_streams_match(self):
+        for path in ("/api/legislators/", "/api/legislators/?fields=state&after=1", "/api/legislators/?stream=1"):
+            with self.subTest(path=path):
+                request = RequestFactory().get(path, headers={"accept": "application/x-ndjson"})
+                sync_response = await sync_to_async(views.legislators_list)(request)
+                sync_content = await sync_to_async(b"".join)(sync_response.streaming_content)
+                async_request = AsyncRequestFactory().get(path, headers={"accept": "application/x-ndjson"})
+                async_response = await async_views.legislators_list(async_request)
+                async_content = b"".join([chunk async for chunk in async_response.streaming_content])
+                self.assertEqual(async_response["Content-Type"], sync_response["Content-Type"])
+                self.assertEqual(async_content, sync_content)
+
+    @override_settings(RESPONSE_CACHE_TTL=60)
+    async def test_read_views_use_the_response_cache(self):
+        await sync_to_async(cache.clear)()
+        paths = [("legislators_list", "/api/legislators/", ()), ("legislator_detail", "/api/legislators/1/", (1,)),
+                 ("age_stats", "/api/stats/age/?backend=python", ())]
+        first = [await getattr(async_views, name)(AsyncRequestFactory().get(path), *args) for name, path, args in paths]
+        # A write that skips invalidation shows whether a response came from the cache
+        await Legislator.objects.filter(govtrack_id=1).aupdate(first_name="Cached", birthday=date(1990, 1, 1))
+        for (name, path, args), response in zip(paths, first):
+            with self.subTest(path=path):
+                again = await getattr(async_views, name)(AsyncRequestFactory().get(path), *args)
+                self.assertEqual(again.content, response.content)
+
+    async def test_weather_misses_share_one_upstream_call(self):
+        request = AsyncRequestFactory().get("/api/legislators/1/weather/")
+        responses = await asyncio.gather(*(async_views.weather_info(request, 1) for _ in range(5)))
+
+        self.assertEqual({response.status_code for response in responses}, {200})
+        self.assertEqual(json.loads(responses[0].content)["weather"]["description"], "clear sky over Austin")
+        self.assertEqual(FakeOpenWeatherMapHandler.requests, ["Austin"])
+
+
+    async def test_weather_error_status_is_not_served(self):
+        FakeOpenWeatherMapHandler.fail = True
+        request = AsyncRequestFactory().get("/api/legislators/1/weather/")
+        with mock.patch.object(async_views, "upstream", UpstreamClient(retries=0)):
+            response = await async_views.weather_info(request, 1)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertIsNone(async_views.weather_cache.peek("Austin"))
+
+
+class FastSerializerTests(TestCase):
+    def setUp(self):
+        Legislator.objects.create(
+            govtrack_id=1, first_name="Zoë", last_name="B", gender="F", type="sen", state="TX",
+            party="Independent", birthday=date(1970, 12, 31), url="",
+        )
+        Legislator.objects.create(
+            govtrack_id=2, first_name="C", last_name="D", gender="M", type="rep", state="CA", district="12",
+            party="Democrat", birthday=date(1980, 1, 1), url="https://example.com", notes="note",
+        )
+
+    def test_output_is_byte_identical_to_drf(self):
+        renderer = JSONRenderer()
+        queryset = Legislator.objects.order_by("govtrack_id")
+        for fields in (None, ["govtrack_id", "age"], ["notes", "district", "birthday"], ["age", "state"]):
+            with self.subTest(fields=fields):
+                self.assertEqual(
+                    renderer.render(serialize_legislators(queryset, fields)),
+                    renderer.render(LegislatorSerializer(queryset, many=True, fields=fields).data),
+                )
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def test_output_is_byte_identical_to_json_renderer(self):
+        if orjson is None:
+            self.skipTest("orjson is not installed")
+        values = [
+            [{"first_name": "Zoë", "notes": "line\u2028break\u2029", "quote": "\"\\/\x00\x7f", "emoji": "\U0001f5f3"}],
+            {"birthday": date(1970, 12, 31), "updated_at": datetime(2024, 5, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)},
+            {"average_age": 58.3, "tiny": 0.00001, "small": 1.5e-7, "huge": 1e16, "big": 2 ** 70, "none": None},
+            {1: "non-string key"},
+            [],
+        ]
+        renderer = ORJSONRenderer()
+        for value in values:
+            with self.subTest(value=value):
+                self.assertEqual(renderer.render(value), JSONRenderer().render(value))
+        self.assertEqual(
+            renderer.render(values[0], "application/json; indent=2"),
+            JSONRenderer().render(values[0], "application/json; indent=2"),
+        )
+
+
+class ConditionalResponseTests(TestCase):
+    def setUp(self):
+        DatasetVersion.objects.update_or_create(id=1, defaults={"version": 7})
+        Legislator.objects.create(
+            govtrack_id=1, first_name="A", last_name="B", gender="F", type="rep", state="TX",
+            party="Independent", birthday=date(1970, 1, 1),
+        )
+        dataset_validators.invalidate()
+
+    def test_matching_etag_skips_the_view(self):
+        for path in ("/api/legislators/", "/api/legislators/1/", "/api/stats/age/"):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response["ETag"].startswith('"v7-'))
+                self.assertIn("Last-Modified", response)
+
+                # Only the version is read: no legislator query, no serialization
+                with self.assertNumQueries(1):
+                    not_modified = self.client.get(path, HTTP_IF_NONE_MATCH=response["ETag"])
+                self.assertEqual(not_modified.status_code, 304)
+                self.assertEqual(not_modified.content, b"")
+
+    def test_ndjson_has_its_own_etag(self):
+        etag = self.client.get("/api/legislators/")["ETag"]
+        response = self.client.get("/api/legislators/", HTTP_ACCEPT="application/x-ndjson", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_follows_content_negotiation(self):
+        # DRF ignores q-values: JSON is listed first, so JSON is what gets rendered
+        response = self.client.get("/api/legislators/", HTTP_ACCEPT="application/json, application/x-ndjson;q=0.1")
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertTrue(response["ETag"].endswith('-json"'))
+
+        ndjson = self.client.get(
+            "/api/legislators/", HTTP_ACCEPT="application/x-ndjson", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(ndjson.status_code, 200)
+        self.assertEqual(ndjson["Content-Type"], "application/x-ndjson")
+
+    def test_responses_vary_on_accept(self):
+        response = self.client.get("/api/legislators/")
+        self.assertIn("Accept", response["Vary"])
+        not_modified = self.client.get("/api/legislators/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertIn("Accept", not_modified["Vary"])
+
+    def test_errors_have_no_validators(self):
+        for path in ("/api/legislators/99/", "/api/legislators/?limit=0", "/api/stats/age/?backend=nope"):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertIn(response.status_code, (400, 404))
+                self.assertNotIn("ETag", response)
+                self.assertNotIn("Last-Modified", response)
+
+    def test_notes_update_changes_etag(self):
+        etag = self.client.get("/api/legislators/1/")["ETag"]
+        self.client.patch("/api/legislators/1/notes/", {"notes": "x"}, content_type="application/json")
+
+        response = self.client.get("/api/legislators/1/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["notes"], "x")
+
+    @override_settings(LEGISLATORS_SNAPSHOT=True)
+    def test_one_version_read_per_request(self):
+        views.legislator_snapshot.invalidate()
+        for path in ("/api/legislators/", "/api/stats/age/?backend=engine"):
+            with self.subTest(path=path), CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(path).status_code, 200)
+            # The ETag and the snapshot freshness check share one read
+            reads = [query["sql"] for query in queries if "dataset_version" in query["sql"]]
+            self.assertEqual(len(reads), 1)
+
+    def test_cached_version_answers_without_queries(self):
+        etag = self.client.get("/api/legislators/")["ETag"]
+        with mock.patch.object(dataset_validators, "_check_interval", 60), self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/legislators/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+@override_settings(RESPONSE_CACHE_TTL=60)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        dataset_validators.invalidate()
+        for govtrack_id, state in [(1, "TX"), (2, "CA")]:
+            Legislator.objects.create(
+                govtrack_id=govtrack_id, first_name="A", last_name="B", gender="F", type="rep", state=state,
+                party="Independent", birthday=date(1970, 1, 1),
+            )
+
+    def rename_without_invalidating(self, govtrack_id, first_name):
+        # A write that skips invalidation shows whether a response came from the cache
+        Legislator.objects.filter(govtrack_id=govtrack_id).update(first_name=first_name)
+        DatasetVersion.bump()
+
+    def first_names(self, path):
+        return [row["first_name"] for row in self.client.get(path).json()]
+
+    def test_key_follows_content_negotiation(self):
+        # Rendered as JSON (DRF ignores q-values), so it must not be cached as NDJSON
+        mixed = self.client.get("/api/legislators/", HTTP_ACCEPT="application/json, application/x-ndjson;q=0.1")
+        self.assertEqual(mixed["Content-Type"], "application/json")
+
+        ndjson = self.client.get("/api/legislators/", HTTP_ACCEPT="application/x-ndjson")
+        self.assertEqual(ndjson["Content-Type"], "application/x-ndjson")
+        self.assertEqual(len(b"".join(ndjson.streaming_content).splitlines()), 2)
+        self.assertEqual(self.client.get("/api/legislators/").content, mixed.content)
+
+    def test_notes_update_invalidates_only_affected_entries(self):
+        paths = ["/api/legislators/?state=TX", "/api/legislators/?state=CA", "/api/legislators/", "/api/legislators/2/"]
+        for path in paths:
+            self.client.get(path)
+        self.rename_without_invalidating(1, "Cached")
+        self.rename_without_invalidating(2, "Cached")
+        self.assertEqual(self.first_names("/api/legislators/"), ["A", "A"])
+
+        self.client.patch("/api/legislators/1/notes/", {"notes": "x"}, content_type="application/json")
+
+        self.assertEqual(self.first_names("/api/legislators/?state=TX"), ["Cached"])
+        self.assertEqual(self.first_names("/api/legislators/?state=CA"), ["A"])
+        self.assertEqual(self.first_names("/api/legislators/"), ["Cached", "Cached"])
+        self.assertEqual(self.client.get("/api/legislators/2/").json()["first_name"], "A")
+        self.assertEqual(self.client.get("/api/legislators/1/").json()["notes"], "x")
+
+    def test_diff_ingest_invalidates_old_and_new_groups(self):
+        self.client.get("/api/legislators/?state=CA")
+        self.client.get("/api/legislators/?party=Independent")
+        path = write_csv([legislator_row(1, state="TX", party="Independent"), legislator_row(2, state="TX")])
+        self.addCleanup(os.unlink, path)
+        call_command("ingest_legislators", "--csv-path", path, "--diff", stdout=StringIO())
+
+        # Legislator 2 moved from CA/Independent to TX/Democrat
+        self.assertEqual(self.first_names("/api/legislators/?state=CA"), [])
+        self.assertEqual(self.first_names("/api/legislators/?party=Independent"), ["First1"])
+
+
+class BulkNotesUpdateTests(TestCase):
+    def setUp(self):
+        DatasetVersion.objects.update_or_create(id=1, defaults={"version": 3})
+        for govtrack_id in (1, 2, 3):
+            Legislator.objects.create(
+                govtrack_id=govtrack_id, first_name="A", last_name="B", gender="F", type="rep", state="TX",
+                party="Independent", birthday=date(1970, 1, 1), notes="old",
+            )
+
+    def test_updates_in_one_statement_and_bumps_version_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                "/api/legislators/notes/", {"1": "one", "3": None, "99": "missing"}, content_type="application/json"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"], [
+            {"govtrack_id": 1, "status": "updated"},
+            {"govtrack_id": 3, "status": "updated"},
+            {"govtrack_id": 99, "status": "not_found"},
+        ])
+        notes = dict(Legislator.objects.values_list("govtrack_id", "notes"))
+        self.assertEqual(notes, {1: "one", 2: "old", 3: None})
+        self.assertEqual(DatasetVersion.current(), 4)
+        self.assertEqual(sum("UPDATE" in query["sql"] and "legislators" in query["sql"] for query in queries), 1)
+
+    def test_invalid_body_writes_nothing(self):
+        for body in ({}, {"1": "one", "x": "bad"}, {"1": 5}):
+            with self.subTest(body=body):
+                response = self.client.patch("/api/legislators/notes/", body, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(Legislator.objects.values_list("notes", flat=True)), {"old"})
+        self.assertEqual(DatasetVersion.current(), 3)
+
+
+class DatabaseHealthTests(TestCase):
+    def test_reports_connection_settings_and_server_counts(self):
+        response = self.client.get("/api/health/db/")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["connections"]["conn_max_age"], connection.settings_dict["CONN_MAX_AGE"])
+        if connection.vendor == "postgresql":
+            self.assertGreaterEqual(data["server"]["max_connections"], data["server"]["connections"])
+            self.assertGreaterEqual(data["server"]["database_connections"], 1)
+
+    def test_unreachable_database_is_unhealthy(self):
+        with mock.patch.object(connection, "ensure_connection", side_effect=OperationalError("down")):
+            response = self.client.get("/api/health/db/")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], "unhealthy")
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        Legislator.objects.create(
+            govtrack_id=1, first_name="A", last_name="B", gender="F", type="rep", state="TX",
+            party="Independent", birthday=date(1970, 1, 1),
+        )
+
+    def metric(self, text, line_start):
+        lines = [line for line in text.splitlines() if line.startswith(line_start)]
+        self.assertEqual(len(lines), 1, line_start)
+        return float(lines[0].rsplit(" ", 1)[1])
+
+    def test_records_queries_and_serialization_per_route(self):
+        labels = 'method="GET",route="/api/legislators/<int:govtrack_id>/"'
+        before = self.client.get("/api/metrics/").content.decode()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/legislators/1/")
+        self.client.get("/api/legislators/2/")
+        text = self.client.get("/api/metrics/").content.decode()
+
+        count = f"http_request_duration_seconds_count{{{labels}}}"
+        previous = self.metric(before, count) if count in before else 0
+        self.assertEqual(self.metric(text, count), previous + 2)
+        self.assertGreaterEqual(self.metric(text, f"http_request_db_queries_sum{{{labels}}}"), len(queries))
+        self.assertIn(f'http_responses_total{{{labels},status="404"}}', text)
+        self.assertGreater(self.metric(text, f"http_request_serialization_seconds_sum{{{labels}}}"), 0)
+        self.assertIn('cache_lookups_total{cache="weather",result="miss"}', text)
+
+
+class AgeStatsEngineTests(SimpleTestCase):
+    def member(self, govtrack_id, birthday, state="CA", party="Democrat"):
+        return {"govtrack_id": govtrack_id, "birthday": birthday, "state": state, "party": party}
+
+    def stats(self, rows, today):
+        engine = AgeStatsEngine()
+        engine.sync(rows)
+        return engine.stats(today)
+
+    def test_leap_day_birthday_ages_on_march_first_in_common_years(self):
+        rows = [self.member(1, date(1960, 2, 29))]
+        self.assertEqual(self.stats(rows, date(2001, 2, 28))["max_age"], 40)
+        self.assertEqual(self.stats(rows, date(2001, 3, 1))["max_age"], 41)
+        self.assertEqual(self.stats(rows, date(2004, 2, 29))["max_age"], 44)
+
+    def test_average_counts_birthdays_not_yet_reached(self):
+        rows = [self.member(1, date(1960, 6, 1)), self.member(2, date(1970, 1, 1))]
+        # 39 (birthday still ahead) and 30
+        self.assertEqual(self.stats(rows, date(2000, 3, 1))["average_age"], 34.5)
+
+    def test_percentiles_interpolate_between_ages(self):
+        rows = [self.member(i, date(2000 - age, 1, 1)) for i, age in enumerate((30, 40, 50, 60, 70), 1)]
+        stats = self.stats(rows, date(2000, 6, 1))
+        self.assertEqual(stats["median_age"], 50)
+        self.assertEqual(stats["percentiles"], {"p10": 34.0, "p25": 40.0, "p75": 60.0, "p90": 66.0})
+
+        stats = self.stats(rows[:4], date(2000, 6, 1))
+        self.assertEqual(stats["median_age"], 45.0)
+        self.assertEqual(stats["percentiles"]["p25"], 37.5)
+
+    def test_ties_go_to_the_lowest_govtrack_id(self):
+        rows = [self.member(i, birthday) for i, birthday in
+                ((5, date(1950, 1, 1)), (3, date(1950, 1, 1)), (9, date(1980, 1, 1)), (4, date(1980, 1, 1)))]
+        stats = self.stats(rows, date(2000, 6, 1))
+        self.assertEqual((stats["oldest"], stats["youngest"]), ((3, 50), (4, 20)))
+
+    def test_rows_without_birthday_are_ignored(self):
+        engine = AgeStatsEngine()
+        self.assertEqual(engine.sync([self.member(1, None)]), 0)
+        self.assertIsNone(engine.stats(date(2000, 1, 1)))
+        engine.sync([self.member(1, None), self.member(2, "1970-01-01")])
+        self.assertEqual(engine.stats(date(2000, 1, 1))["count"], 1)
+
+    def test_resync_applies_updates_and_deletes(self):
+        engine = AgeStatsEngine()
+        today = date(2000, 6, 1)
+        rows = [self.member(1, date(1950, 1, 1)), self.member(2, date(1960, 1, 1), state="TX", party="Republican"),
+                self.member(3, date(1970, 1, 1))]
+        self.assertEqual(engine.sync(rows), 3)
+        self.assertEqual(engine.sync(rows), 0)
+        first = engine.stats(today)
+
+        rows[1] = self.member(2, date(1990, 1, 1), state="TX", party="Republican")
+        del rows[0]
+        self.assertEqual(engine.sync(rows), 2)
+        stats = engine.stats(today)
+        self.assertIsNot(stats, first)
+        self.assertEqual((stats["count"], stats["oldest"], stats["youngest"]), (2, (3, 30), (2, 10)))
+        self.assertEqual(stats["by_state"]["CA"]["count"], 1)
+        self.assertEqual(stats["by_party"]["Republican"]["max_age"], 10)
+
+        # Moving the last member out of a group drops the group
+        rows[1] = self.member(3, date(1970, 1, 1), state="TX")
+        engine.sync(rows)
+        self.assertEqual(list(engine.stats(today)["by_state"]), ["TX"])
+
+
+class SnapshotAgeStatsTests(TestCase):
+    def setUp(self):
+        for govtrack_id, birthday in ((1, date(1950, 1, 1)), (2, date(1980, 1, 1))):
+            Legislator.objects.create(**dict(legislator_row(govtrack_id), birthday=birthday))
+        DatasetVersion.bump()
+        # Versions restart with every test's rollback, so drop what earlier tests cached
+        cache.clear()
+        dataset_validators.invalidate()
+        views.legislator_snapshot.invalidate()
+
+    def test_stats_come_from_the_returned_rows(self):
+        snapshot = LegislatorSnapshot()
+        old = snapshot.get()
+        Legislator.objects.filter(govtrack_id=2).delete()
+        DatasetVersion.bump()
+        snapshot.get()
+
+        # A request that read the old state just before the reload
+        with mock.patch.object(snapshot, "get", return_value=old):
+            state, stats = snapshot.get_with_age_stats()
+        self.assertIs(state, snapshot._state)
+        self.assertEqual(stats["youngest"][0], 1)
+
+        snapshot.invalidate()
+        with mock.patch.object(snapshot, "get", return_value=old):
+            state, stats = snapshot.get_with_age_stats()
+        self.assertIs(state, old)
+        self.assertEqual(stats["youngest"][0], 2)
+
+    @override_settings(LEGISLATORS_SNAPSHOT=True)
+    def test_engine_backend_serves_rows_from_the_snapshot(self):
+        response = self.client.get("/api/stats/age/?backend=engine")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data["youngest_legislator"]["govtrack_id"], data["oldest_legislator"]["govtrack_id"]), (2, 1))
+
+
+class AgeStatsBackendTests(TestCase):
+    # Tied oldest and youngest birthdays (inserted highest id first), a leap day and no birthday at all
+    BIRTHDAYS = {5: date(1950, 3, 1), 2: date(1950, 3, 1), 3: date(1972, 2, 29), 8: date(1980, 2, 28),
+                 6: date(1980, 2, 28), 9: None, 10: None}
+    DAYS = [date(2001, 2, 28), date(2001, 3, 1), date(2004, 2, 28), date(2004, 2, 29), date(2004, 3, 1)]
+
+    def setUp(self):
+        if connection.vendor != "postgresql":
+            self.skipTest("the sql backend uses Postgres AGE()")
+        # Rolled back with the test's transaction
+        with connection.cursor() as cursor:
+            cursor.execute("ALTER TABLE legislators ALTER COLUMN birthday DROP NOT NULL")
+        for govtrack_id, birthday in self.BIRTHDAYS.items():
+            Legislator.objects.create(**dict(legislator_row(govtrack_id), birthday=birthday))
+
+    def test_sql_and_python_backends_agree(self):
+        for today in self.DAYS:
+            FixedDate = fixed_date(today)
+            with self.subTest(today=today), mock.patch.object(views, "date", FixedDate), \
+                    mock.patch.object(models, "date", FixedDate):
+                sql = views.age_stats_from_sql().data
+                python = views.age_stats_from_python().data
+                self.assertEqual(sql, python)
+                self.assertEqual((sql["oldest_legislator"]["govtrack_id"], sql["youngest_legislator"]["govtrack_id"]),
+                                 (2, 6))
+
+
+class ListParamsTests(TestCase):
+    IDS = [3, 7, 10, 12, 20]
+
+    def setUp(self):
+        for govtrack_id in self.IDS:
+            Legislator.objects.create(**legislator_row(govtrack_id, state=("CA", "TX")[govtrack_id % 2]))
+        DatasetVersion.bump()
+        cache.clear()
+        dataset_validators.invalidate()
+        views.legislator_snapshot.invalidate()
+
+    @contextmanager
+    def backend(self, snapshot):
+        """Serve the list from the snapshot or from the ORM inside the block"""
+        with self.subTest(snapshot=snapshot), override_settings(LEGISLATORS_SNAPSHOT=snapshot):
+            yield
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def ids(self, url):
+        return [row["govtrack_id"] for row in self.get(url).json()]
+
+    def next_link(self, response):
+        match = re.fullmatch(r'<(.+)>; rel="next"', response.headers.get("Link", ""))
+        return match and match.group(1)
+
+    def test_after_boundaries(self):
+        for snapshot in (True, False):
+            with self.backend(snapshot):
+                self.assertEqual(self.ids("/api/legislators/?after=0"), self.IDS)
+                self.assertEqual(self.ids("/api/legislators/?after=7"), [10, 12, 20])
+                self.assertEqual(self.ids("/api/legislators/?after=8"), [10, 12, 20])
+                self.assertEqual(self.ids("/api/legislators/?after=20"), [])
+                self.assertEqual(self.ids("/api/legislators/?after=-5&limit=2"), [3, 7])
+
+    def test_limit_boundaries(self):
+        for snapshot in (True, False):
+            with self.backend(snapshot):
+                self.assertEqual(self.ids("/api/legislators/?limit=1"), [3])
+                self.assertEqual(self.ids(f"/api/legislators/?limit={views.MAX_PAGE_SIZE}"), self.IDS)
+                invalid = ("limit=0", f"limit={views.MAX_PAGE_SIZE + 1}", "limit=-1", "limit=two",
+                           "after=x", "after=1.5")
+                for query in invalid:
+                    response = self.client.get(f"/api/legislators/?{query}")
+                    self.assertEqual(response.status_code, 400, query)
+                    self.assertIn("after must be an integer", response.json()["error"])
+
+    def test_link_header_walks_every_page(self):
+        for snapshot in (True, False):
+            with self.backend(snapshot):
+                url, pages = "/api/legislators/?state=CA&limit=2&fields=last_name", []
+                while url:
+                    response = self.get(url)
+                    pages.append(response.json())
+                    url = self.next_link(response)
+                self.assertEqual(pages, [[{"last_name": "Last10"}, {"last_name": "Last12"}], [{"last_name": "Last20"}]])
+
+    def test_full_last_page_links_to_an_empty_one(self):
+        for snapshot in (True, False):
+            with self.backend(snapshot):
+                response = self.get("/api/legislators/?limit=5")
+                self.assertEqual(self.next_link(response), "/api/legislators/?limit=5&after=20")
+                response = self.get(self.next_link(response))
+                self.assertEqual(response.json(), [])
+                self.assertNotIn("Link", response.headers)
+
+                self.assertNotIn("Link", self.get("/api/legislators/").headers)
+
+    def test_fields_projection(self):
+        for snapshot in (True, False):
+            with self.backend(snapshot):
+                rows = self.get("/api/legislators/?fields= state ,govtrack_id,&limit=1").json()
+                self.assertEqual(rows, [{"state": "TX", "govtrack_id": 3}])
+                # Keys come in serializer order, not request order
+                self.assertEqual(list(rows[0]), ["govtrack_id", "state"])
+                rows = self.get("/api/legislators/?fields=party,state,age,state&limit=1").json()
+                self.assertEqual(list(rows[0]), ["age", "state", "party"])
+                streamed = self.client.get("/api/legislators/?fields=party,state,age&limit=1&stream=1")
+                self.assertEqual(list(json.loads(b"".join(streamed.streaming_content))[0]), ["age", "state", "party"])
+
+                rows = self.get("/api/legislators/?fields=age,birthday").json()
+                self.assertEqual(set(rows[0]), {"age", "birthday"})
+                self.assertEqual(rows[0]["birthday"], "1960-05-17")
+
+    def test_unknown_fields_are_rejected(self):
+        for query in ("fields=state,salary", "fields=State", "fields=age,salary"):
+            response = self.client.get(f"/api/legislators/?{query}")
+            self.assertEqual(response.status_code, 400, query)
+            self.assertTrue(response.json()["error"].startswith("Unknown fields: "))
+        response = self.client.get("/api/legislators/?fields=salary,bonus")
+        self.assertEqual(response.json()["error"], "Unknown fields: salary, bonus")
+
+
+class StreamingListTests(TestCase):
+    QUERIES = ["", "state=CA", "fields=last_name,age", "state=TX&fields=party&after=2&limit=3", "after=99"]
+
+    def setUp(self):
+        for govtrack_id in range(1, 8):
+            Legislator.objects.create(**legislator_row(govtrack_id, state=("CA", "TX")[govtrack_id % 2]))
+        DatasetVersion.bump()
+        cache.clear()
+        dataset_validators.invalidate()
+        views.legislator_snapshot.invalidate()
+        # Several chunks even for this small table
+        patcher = mock.patch.object(views, "STREAM_BATCH_SIZE", 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sort(self, rows):
+        # Streams are read in table order unless paginated
+        return sorted(rows, key=lambda row: json.dumps(row, sort_keys=True))
+
+    def expected(self, query):
+        return self.sort(self.client.get(f"/api/legislators/?{query}").json())
+
+    def streamed_body(self, response):
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_is_one_object_per_line(self):
+        for query in self.QUERIES:
+            with self.subTest(query=query):
+                response = self.client.get(f"/api/legislators/?{query}", HTTP_ACCEPT="application/x-ndjson")
+                self.assertEqual(response["Content-Type"], "application/x-ndjson")
+                body = self.streamed_body(response)
+                self.assertTrue(body == "" or body.endswith("\n"))
+                rows = [json.loads(line) for line in body.splitlines()]
+                self.assertTrue(all(isinstance(row, dict) for row in rows))
+                self.assertEqual(self.sort(rows), self.expected(query))
+
+    def test_stream_param_returns_a_json_array(self):
+        for query in self.QUERIES:
+            for stream in ("1", "true"):
+                with self.subTest(query=query, stream=stream):
+                    response = self.client.get(f"/api/legislators/?stream={stream}&{query}")
+                    self.assertEqual(response["Content-Type"], "application/json")
+                    self.assertEqual(self.sort(json.loads(self.streamed_body(response))), self.expected(query))
+
+    def test_paginated_stream_keeps_page_order(self):
+        response = self.client.get("/api/legislators/?after=1&limit=4", HTTP_ACCEPT="application/x-ndjson")
+        self.assertEqual([json.loads(line)["govtrack_id"] for line in self.streamed_body(response).splitlines()],
+                         [2, 3, 4, 5])
@@ -1,11 +1,23 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.ASYNC_VIEWS:
+    # Async list/detail/stats/weather for ASGI servers (uvicorn legislators_api.asgi:application)
+    from . import async_views as read_views
+else:
+    read_views = views
+
 urlpatterns = [
     path('health/', views.health_check, name='health'),
-    path('legislators/', views.legislators_list, name='legislators-list'),
-    path('legislators/<int:govtrack_id>/', views.legislator_detail, name='legislator-detail'),
+    path('health/db/', views.database_health_check, name='health-db'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('legislators/', read_views.legislators_list, name='legislators-list'),
+    path('legislators/<int:govtrack_id>/', read_views.legislator_detail, name='legislator-detail'),
+    path('legislators/notes/', views.bulk_update_notes, name='bulk-update-notes'),
     path('legislators/<int:govtrack_id>/notes/', views.update_notes, name='update-notes'),
-    path('stats/age/', views.age_stats, name='age-stats'),
-    path('legislators/<int:govtrack_id>/weather/', views.weather_info, name='weather-info'),
+    path('stats/age/', read_views.age_stats, name='age-stats'),
+    path('legislators/<int:govtrack_id>/weather/', read_views.weather_info, name='weather-info'),
+    path('legislators/weather:batch/', views.legislators_weather_batch, name='legislators-weather-batch'),
+    path('weather/', views.weather_by_state, name='weather-by-state'),
 ]
\ No newline at end of file
@@ -1,36 +1,204 @@
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from .models import Legislator
-from .serializers import LegislatorSerializer, NotesUpdateSerializer
-import requests
+from django.views.decorators.http import require_GET
+from legislators_common.metrics import render_metrics, request_metrics
+from legislators_common.upstream import upstream
+from .cache import cache_stats, cached_response, detail_tags, invalidate_legislators, list_tags, stats_tags
+from .conditional import dataset_condition, dataset_validators, request_validators
+from .db_pool import connection_settings, server_stats
+from .models import DatasetVersion, Legislator
+from .renderers import NDJSONRenderer
+from .serializers import LegislatorSerializer, NotesUpdateSerializer, iter_legislator_rows, serialize_legislators
+from .snapshot import legislator_snapshot
+from .weather import STATE_CAPITALS, capital_weather, states_weather, weather_cache, weather_prefetcher
 import os
+from bisect import bisect_right
+from datetime import date
 
 @api_view(['GET'])
 def health_check(request):
     return Response({
         'status': 'healthy',
-        'timestamp': timezone.now().isoformat()
+        'timestamp': timezone.now().isoformat(),
+        'weather_cache': weather_cache.stats(),
+        'weather_prefetch': weather_prefetcher.last_run if weather_prefetcher else None,
+        'upstream': upstream.stats()
      })
 
 @api_view(['GET'])
-def legislators_list(request):
-    legislators = Legislator.objects.all()
+def database_health_check(request):
+    """Connection settings of this worker and connection counts on the server"""
+    try:
+        server = server_stats()
+    except DatabaseError as e:
+        return Response({
+            'status': 'unhealthy',
+            'timestamp': timezone.now().isoformat(),
+            'connections': connection_settings(),
+            'error': str(e)
+        }, status=503)
+    return Response({
+        'status': 'healthy',
+        'timestamp': timezone.now().isoformat(),
+        'connections': connection_settings(),
+        'server': server
+    })
 
-    #Filtering by state and party
-    state = request.GET.get('state')
-    party = request.GET.get('party')
+@require_GET
+def metrics(request):
+    """Prometheus metrics of this worker"""
+    caches = {'weather': weather_cache.stats()}
+    if settings.RESPONSE_CACHE_TTL:
+        caches['response'] = cache_stats()
+    content = render_metrics(request_metrics, upstream.stats(), caches)
+    return HttpResponse(content, content_type='text/plain; version=0.0.4')
+
+LEGISLATOR_FIELDS = (
+    'govtrack_id', 'age', 'first_name', 'last_name', 'birthday', 'gender', 'type',
+    'state', 'district', 'party', 'url', 'notes'
+)
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+def build_legislators_queryset(state=None, party=None, type=None, after=None, limit=None, fields=None):
+    legislators = Legislator.objects.all()
 
     if state:
         legislators = legislators.filter(state=state)
     if party:
         legislators = legislators.filter(party=party)
+    if type:
+        legislators = legislators.filter(type=type)
+    if after is not None or limit is not None:
+        legislators = legislators.order_by('govtrack_id')
+    if after is not None:
+        legislators = legislators.filter(govtrack_id__gt=after)
+    if limit is not None:
+        legislators = legislators[:limit]
+    if fields:
+        # Only fetch the requested columns (age is derived from birthday)
+        columns = [field for field in fields if field != 'age']
+        if 'age' in fields:
+            columns.append('birthday')
+        legislators = legislators.only(*columns)
+    return legislators
 
-    serializer = LegislatorSerializer(legislators, many=True)
-    return Response(serializer.data)
+def query_legislators_orm(state=None, party=None, type=None, after=None, limit=None, fields=None):
+    legislators = build_legislators_queryset(state, party, type, after, limit, fields)
+    return serialize_legislators(legislators, fields)
+
+def query_legislators_snapshot(state=None, party=None, type=None, after=None, limit=None, fields=None, version=None):
+    rows = legislator_snapshot.get(version).filter(state, party, type)
+    if after is not None:
+        rows = rows[bisect_right(rows, after, key=lambda row: row['govtrack_id']):]
+    if limit is not None:
+        rows = rows[:limit]
+    if fields:
+        rows = [{field: row[field] for field in fields} for row in rows]
+    return rows
+
+def parse_list_params(query_params):
+    params = {}
+    try:
+        if query_params.get('after'):
+            params['after'] = int(query_params['after'])
+        if query_params.get('limit'):
+            params['limit'] = int(query_params['limit'])
+            if not 1 <= params['limit'] <= MAX_PAGE_SIZE:
+                raise ValueError
+    except ValueError:
+        return None, f'after must be an integer and limit between 1 and {MAX_PAGE_SIZE}'
+
+    if query_params.get('fields'):
+        fields = [field.strip() for field in query_params['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in LEGISLATOR_FIELDS]
+        if unknown:
+            return None, f'Unknown fields: {", ".join(unknown)}'
+        # Serializer order whatever the request order, so every path (snapshot, ORM, stream) agrees
+        params['fields'] = [field for field in LEGISLATOR_FIELDS if field in fields]
+    return params, None
 
+def stream_legislators(queryset, fields, ndjson):
+    # Rows are read through a server-side cursor and encoded as they arrive,
+    # so memory per request stays flat however large the table is
+    renderer = NDJSONRenderer()
+
+    def generate():
+        if not ndjson:
+            yield b'['
+        first = True
+        chunk = []
+        for row in iter_legislator_rows(queryset, fields, chunk_size=STREAM_BATCH_SIZE):
+            if ndjson:
+                chunk.append(renderer.render_item(row))
+            else:
+                chunk.append(renderer.render(row) if first else b',' + renderer.render(row))
+            first = False
+            if len(chunk) >= STREAM_BATCH_SIZE:
+                yield b''.join(chunk)
+                chunk = []
+        if not ndjson:
+            chunk.append(b']')
+        yield b''.join(chunk)
+
+    content_type = NDJSONRenderer.media_type if ndjson else 'application/json'
+    return StreamingHttpResponse(generate(), content_type=content_type)
+
+@dataset_condition
+@cached_response(list_tags)
+@api_view(['GET'])
+@renderer_classes(api_settings.DEFAULT_RENDERER_CLASSES + [NDJSONRenderer])
+def legislators_list(request):
+    #Filtering by state, party and type
+    state = request.GET.get('state')
+    party = request.GET.get('party')
+    type_val = request.GET.get('type')
+
+    #Keyset pagination (?after=<govtrack_id>&limit=) and projection (?fields=)
+    params, error = parse_list_params(request.GET)
+    if error:
+        return Response({'error': error}, status=400)
+
+    fields = params.get('fields')
+    if fields and 'govtrack_id' not in fields:
+        # govtrack_id is always fetched: it is the pagination cursor
+        params['fields'] = ['govtrack_id'] + fields
+
+    #Streaming mode: Accept: application/x-ndjson or ?stream=1
+    ndjson = request.accepted_renderer.format == NDJSONRenderer.format
+    if ndjson or request.GET.get('stream') in ('1', 'true'):
+        queryset = build_legislators_queryset(state, party, type_val, **params)
+        return stream_legislators(queryset, fields, ndjson)
+
+    if settings.LEGISLATORS_SNAPSHOT:
+        # The DatasetVersion read for the ETag also tells the snapshot whether it is current
+        version, _ = request_validators(request)
+        legislators = query_legislators_snapshot(state, party, type_val, version=version, **params)
+    else:
+        legislators = query_legislators_orm(state, party, type_val, **params)
+
+    next_after = None
+    if params.get('limit') and len(legislators) == params['limit']:
+        next_after = legislators[-1]['govtrack_id']
+    if fields and 'govtrack_id' not in fields:
+        legislators = [{field: row[field] for field in fields} for row in legislators]
+
+    response = Response(legislators)
+    if next_after is not None:
+        next_params = request.GET.copy()
+        next_params['after'] = next_after
+        response['Link'] = f'<{request.path}?{next_params.urlencode()}>; rel="next"'
+    return response
+
+@dataset_condition
+@cached_response(detail_tags)
 @api_view(['GET'])
 def legislator_detail(request, govtrack_id):
     legislator = get_object_or_404(Legislator, govtrack_id=govtrack_id)
@@ -45,15 +213,157 @@ def update_notes(request, govtrack_id):
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    serializer.save()
+    with transaction.atomic():
+        serializer.save()
+        DatasetVersion.bump()
+    dataset_validators.invalidate()
+    invalidate_legislators([legislator.govtrack_id], [(legislator.state, legislator.party)])
     
     return Response({
         'legislator': LegislatorSerializer(legislator).data,
         'message': 'Notes updated successfully'
     })
 
-@api_view(['GET'])
-def age_stats(request):
+BULK_NOTES_SQL = """
+    WITH new_notes (govtrack_id, notes) AS (VALUES {values})
+    UPDATE legislators SET notes = new_notes.notes
+    FROM new_notes
+    WHERE legislators.govtrack_id = new_notes.govtrack_id
+    RETURNING legislators.govtrack_id, legislators.state, legislators.party
+"""
+
+def parse_bulk_notes(data):
+    """{govtrack_id: note} pairs of a bulk notes body, or an error message"""
+    if not isinstance(data, dict) or not data:
+        return None, 'Body must be a non-empty object of {govtrack_id: note} pairs'
+    if len(data) > MAX_PAGE_SIZE:
+        return None, f'At most {MAX_PAGE_SIZE} legislators per request'
+
+    notes = {}
+    for key, note in data.items():
+        try:
+            govtrack_id = int(key)
+        except ValueError:
+            return None, f'Invalid govtrack_id: {key}'
+        if note is not None and not isinstance(note, str):
+            return None, f'Note for {key} must be a string or null'
+        notes[govtrack_id] = note
+    return notes, None
+
+@api_view(['PATCH'])
+def bulk_update_notes(request):
+    """Set notes for many legislators ({govtrack_id: note}) with one UPDATE"""
+    notes, error = parse_bulk_notes(request.data)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+    values = ', '.join(['(%s, %s)'] * len(notes))
+    params = [value for pair in notes.items() for value in pair]
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(BULK_NOTES_SQL.format(values=values), params)
+            updated = cursor.fetchall()
+        if updated:
+            DatasetVersion.bump()
+
+    # One version bump and one invalidation for the whole batch
+    if updated:
+        dataset_validators.invalidate()
+        invalidate_legislators([row[0] for row in updated], {(state, party) for _, state, party in updated})
+
+    updated_ids = {row[0] for row in updated}
+    return Response({
+        'results': [
+            {'govtrack_id': govtrack_id, 'status': 'updated' if govtrack_id in updated_ids else 'not_found'}
+            for govtrack_id in notes
+        ],
+        'updated': len(updated_ids),
+        'message': 'Notes updated successfully'
+    })
+
+def to_dict_with_age(legislator, age):
+    return {
+        'govtrack_id': legislator.govtrack_id,
+        'first_name': legislator.first_name,
+        'last_name': legislator.last_name,
+        'birthday': str(legislator.birthday) if legislator.birthday else None,
+        'gender': legislator.gender,
+        'type': legislator.type,
+        'state': legislator.state,
+        'district': legislator.district,
+        'party': legislator.party,
+        'url': legislator.url,
+        'notes': legislator.notes,
+        'age': age  # calculated age
+    }
+
+def age_stats_from_engine(version=None):
+    snapshot, stats = legislator_snapshot.get_with_age_stats(version=version)
+    if not snapshot.rows:
+        return Response({'error': 'No legislators found'}, status=404)
+    if not stats:
+        return Response({'error': 'No valid birth dates found'}, status=404)
+
+    def row_with_age(govtrack_id, age):
+        row = snapshot.by_id[govtrack_id]
+        # same key order as to_dict_with_age: model fields, then age
+        data = {key: value for key, value in row.items() if key != 'age'}
+        data['age'] = age
+        return data
+
+    return Response({
+        'average_age': stats['average_age'],
+        'youngest_legislator': row_with_age(*stats['youngest']),
+        'oldest_legislator': row_with_age(*stats['oldest']),
+        'median_age': stats['median_age'],
+        'percentiles': stats['percentiles'],
+        'by_state': stats['by_state'],
+        'by_party': stats['by_party']
+    })
+
+AGE_STATS_SQL = """
+    WITH totals AS (
+        SELECT COUNT(*) AS total,
+               SUM(EXTRACT(YEAR FROM AGE(%(today)s::date, birthday))) AS age_sum
+        FROM legislators
+        WHERE birthday IS NOT NULL
+    ),
+    extremes AS (
+        (SELECT 'youngest' AS role, * FROM legislators WHERE birthday IS NOT NULL
+         ORDER BY birthday DESC, govtrack_id LIMIT 1)
+        UNION ALL
+        (SELECT 'oldest' AS role, * FROM legislators WHERE birthday IS NOT NULL
+         ORDER BY birthday, govtrack_id LIMIT 1)
+    )
+    SELECT extremes.*,
+           EXTRACT(YEAR FROM AGE(%(today)s::date, extremes.birthday))::integer AS age,
+           totals.total, totals.age_sum
+    FROM extremes CROSS JOIN totals
+"""
+
+def age_stats_from_sql():
+    # One statement against the birthday index instead of loading every row
+    with connection.cursor() as cursor:
+        cursor.execute(AGE_STATS_SQL, {'today': date.today()})
+        columns = [col[0] for col in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    if not rows:
+        return Response({'error': 'No legislators found'}, status=404)
+
+    fields = [field.attname for field in Legislator._meta.concrete_fields]
+    extremes = {
+        row['role']: to_dict_with_age(Legislator(**{f: row[f] for f in fields}), row['age'])
+        for row in rows
+    }
+
+    return Response({
+        'average_age': round(int(rows[0]['age_sum']) / rows[0]['total'], 2),
+        'youngest_legislator': extremes['youngest'],
+        'oldest_legislator': extremes['oldest']
+    })
+
+def age_stats_from_python():
     items = list(Legislator.objects.all())
     if not items:
         return Response({'error': 'No legislators found'}, status=404)
@@ -62,27 +372,11 @@ def age_stats(request):
     if not ages:
         return Response({'error': 'No valid birth dates found'}, status=404)
 
-    ages.sort(key=lambda x: x[0])
-    youngest_age, youngest = ages[0]
-    oldest_age, oldest = ages[-1]
+    # Ties resolve like the SQL backend: latest/earliest birthday, then lowest govtrack_id
+    youngest_age, youngest = min(ages, key=lambda x: (-x[1].birthday.toordinal(), x[1].govtrack_id))
+    oldest_age, oldest = min(ages, key=lambda x: (x[1].birthday, x[1].govtrack_id))
     average_age = sum(a for a, _ in ages) / len(ages)
 
-    def to_dict_with_age(legislator, age):
-        return {
-            'govtrack_id': legislator.govtrack_id,
-            'first_name': legislator.first_name,
-            'last_name': legislator.last_name,
-            'birthday': str(legislator.birthday) if legislator.birthday else None,
-            'gender': legislator.gender,
-            'type': legislator.type,
-            'state': legislator.state,
-            'district': legislator.district,
-            'party': legislator.party,
-            'url': legislator.url,
-            'notes': legislator.notes,
-            'age': age  # calculated age
-        }
-    
     youngest_data = to_dict_with_age(youngest, youngest_age)
     oldest_data = to_dict_with_age(oldest, oldest_age)
 
@@ -92,26 +386,27 @@ def age_stats(request):
         'oldest_legislator': oldest_data
     })
 
+AGE_STATS_BACKENDS = ('engine', 'sql', 'python')
+
+@dataset_condition
+@cached_response(stats_tags)
+@api_view(['GET'])
+def age_stats(request):
+    # ?backend= overrides settings.AGE_STATS_BACKEND for this request
+    backend = request.GET.get('backend', settings.AGE_STATS_BACKEND)
+    if backend not in AGE_STATS_BACKENDS:
+        return Response({'error': f'Unknown age stats backend: {backend}'}, status=400)
+
+    if backend == 'engine' and settings.LEGISLATORS_SNAPSHOT:
+        return age_stats_from_engine(request_validators(request)[0])
+    if backend == 'sql':
+        return age_stats_from_sql()
+    return age_stats_from_python()
+
 @api_view(['GET'])
 def weather_info(request, govtrack_id):
     legislator = get_object_or_404(Legislator, govtrack_id=govtrack_id)
 
-    STATE_CAPITALS = {
-        'AL': 'Montgomery', 'AK': 'Juneau', 'AZ': 'Phoenix', 'AR': 'Little Rock',
-        'CA': 'Sacramento', 'CO': 'Denver', 'CT': 'Hartford', 'DE': 'Dover',
-        'FL': 'Tallahassee', 'GA': 'Atlanta', 'HI': 'Honolulu', 'ID': 'Boise',
-        'IL': 'Springfield', 'IN': 'Indianapolis', 'IA': 'Des Moines', 'KS': 'Topeka',
-        'KY': 'Frankfort', 'LA': 'Baton Rouge', 'ME': 'Augusta', 'MD': 'Annapolis',
-        'MA': 'Boston', 'MI': 'Lansing', 'MN': 'Saint Paul', 'MS': 'Jackson',
-        'MO': 'Jefferson City', 'MT': 'Helena', 'NE': 'Lincoln', 'NV': 'Carson City',
-        'NH': 'Concord', 'NJ': 'Trenton', 'NM': 'Santa Fe', 'NY': 'Albany',
-        'NC': 'Raleigh', 'ND': 'Bismarck', 'OH': 'Columbus', 'OK': 'Oklahoma City',
-        'OR': 'Salem', 'PA': 'Harrisburg', 'RI': 'Providence', 'SC': 'Columbia',
-        'SD': 'Pierre', 'TN': 'Nashville', 'TX': 'Austin', 'UT': 'Salt Lake City',
-        'VT': 'Montpelier', 'VA': 'Richmond', 'WA': 'Olympia', 'WV': 'Charleston',
-        'WI': 'Madison', 'WY': 'Cheyenne'
-    }
-
     capital = STATE_CAPITALS.get(legislator.state)
     if not capital:
         return Response({'error': f'Capital city not found for state: {legislator.state}'}, status=404)
@@ -124,26 +419,64 @@ def weather_info(request, govtrack_id):
     if not weather_url:
         return Response({'error': 'Weather API URL not configured'}, status=500)
 
-    params = {
-        'q': capital,
-        'appid': weather_api_key,
-        'units': 'imperial'
-    }
-
     try:
-        response = requests.get(weather_url, params=params)
-        weather_data = response.json()
+        weather, age = capital_weather(capital)
 
         return Response({
             'legislator': LegislatorSerializer(legislator).data,
             'state_capital': capital,
-            'weather': {
-                'temperature': weather_data['main']['temp'],
-                'humidity': weather_data['main']['humidity'],
-                'wind_speed': weather_data['wind']['speed'],
-                'description': weather_data['weather'][0]['description']
-            }
+            'weather': weather,
+            'weather_age': round(age, 1)
         })
     
     except Exception as e:
-        return Response({'error': str(e)}, status=500)
\ No newline at end of file
+        return Response({'error': str(e)}, status=500)
+
+def weather_not_configured():
+    if not os.getenv('WEATHER_API_KEY'):
+        return Response({'error': 'Weather API key not configured'}, status=500)
+    if not os.getenv('WEATHER_API_URL'):
+        return Response({'error': 'Weather API URL not configured'}, status=500)
+    return None
+
+@api_view(['GET'])
+def weather_by_state(request):
+    """Current weather for the capitals of several states (?state=CA,TX)"""
+    error = weather_not_configured()
+    if error:
+        return error
+
+    states = [state.strip().upper() for state in request.query_params.get('state', '').split(',') if state.strip()]
+    if not states:
+        return Response({'error': 'state parameter is required (e.g. ?state=CA,TX)'}, status=400)
+
+    return Response({'states': states_weather(list(dict.fromkeys(states)))})
+
+@api_view(['POST'])
+def legislators_weather_batch(request):
+    """Capital-city weather for a list of legislators, resolved with one query"""
+    error = weather_not_configured()
+    if error:
+        return error
+
+    govtrack_ids = request.data.get('govtrack_ids') if isinstance(request.data, dict) else None
+    if (not isinstance(govtrack_ids, list) or not govtrack_ids
+            or not all(isinstance(i, int) and not isinstance(i, bool) for i in govtrack_ids)):
+        return Response({'error': 'govtrack_ids must be a non-empty list of integers'}, status=400)
+    if len(govtrack_ids) > MAX_PAGE_SIZE:
+        return Response({'error': f'At most {MAX_PAGE_SIZE} govtrack_ids per request'}, status=400)
+
+    govtrack_ids = list(dict.fromkeys(govtrack_ids))
+    legislators = {
+        row['govtrack_id']: row
+        for row in LegislatorSerializer(Legislator.objects.filter(govtrack_id__in=govtrack_ids), many=True).data
+    }
+    weather = states_weather(list(dict.fromkeys(row['state'] for row in legislators.values())))
+
+    return Response({
+        'legislators': [
+            {'legislator': legislators[govtrack_id], **weather[legislators[govtrack_id]['state']]}
+            for govtrack_id in govtrack_ids if govtrack_id in legislators
+        ],
+        'not_found': [govtrack_id for govtrack_id in govtrack_ids if govtrack_id not in legislators]
+    })
@@ -0,0 +1,92 @@
+import os
+
+from django.conf import settings
+from legislators_common.upstream import upstream
+from legislators_common.weather import WeatherCache, WeatherPrefetcher, fetch_concurrently
+
+STATE_CAPITALS = {
+    'AL': 'Montgomery', 'AK': 'Juneau', 'AZ': 'Phoenix', 'AR': 'Little Rock',
+    'CA': 'Sacramento', 'CO': 'Denver', 'CT': 'Hartford', 'DE': 'Dover',
+    'FL': 'Tallahassee', 'GA': 'Atlanta', 'HI': 'Honolulu', 'ID': 'Boise',
+    'IL': 'Springfield', 'IN': 'Indianapolis', 'IA': 'Des Moines', 'KS': 'Topeka',
+    'KY': 'Frankfort', 'LA': 'Baton Rouge', 'ME': 'Augusta', 'MD': 'Annapolis',
+    'MA': 'Boston', 'MI': 'Lansing', 'MN': 'Saint Paul', 'MS': 'Jackson',
+    'MO': 'Jefferson City', 'MT': 'Helena', 'NE': 'Lincoln', 'NV': 'Carson City',
+    'NH': 'Concord', 'NJ': 'Trenton', 'NM': 'Santa Fe', 'NY': 'Albany',
+    'NC': 'Raleigh', 'ND': 'Bismarck', 'OH': 'Columbus', 'OK': 'Oklahoma City',
+    'OR': 'Salem', 'PA': 'Harrisburg', 'RI': 'Providence', 'SC': 'Columbia',
+    'SD': 'Pierre', 'TN': 'Nashville', 'TX': 'Austin', 'UT': 'Salt Lake City',
+    'VT': 'Montpelier', 'VA': 'Richmond', 'WA': 'Olympia', 'WV': 'Charleston',
+    'WI': 'Madison', 'WY': 'Cheyenne'
+}
+
+
+def fetch_capital_weather(capital):
+    """Call OpenWeatherMap for a capital city and keep the fields we serve"""
+    params = {
+        'q': capital,
+        'appid': os.getenv('WEATHER_API_KEY'),
+        'units': 'imperial'
+    }
+    response = upstream.get(os.getenv('WEATHER_API_URL'), params=params)
+    response.raise_for_status()
+    weather_data = response.json()
+    return {
+        'temperature': weather_data['main']['temp'],
+        'humidity': weather_data['main']['humidity'],
+        'wind_speed': weather_data['wind']['speed'],
+        'description': weather_data['weather'][0]['description']
+    }
+
+
+weather_cache = WeatherCache(
+    fetch_capital_weather,
+    ttl=settings.WEATHER_CACHE_TTL,
+    stale_ttl=settings.WEATHER_STALE_TTL,
+)
+
+# Started by the WSGI/ASGI entry points, so management commands never run it
+weather_prefetcher = None
+if settings.WEATHER_PREFETCH_INTERVAL > 0 and os.getenv('WEATHER_API_KEY') and os.getenv('WEATHER_API_URL'):
+    weather_prefetcher = WeatherPrefetcher(
+        weather_cache,
+        sorted(set(STATE_CAPITALS.values())),
+        interval=settings.WEATHER_PREFETCH_INTERVAL,
+        max_workers=settings.WEATHER_PREFETCH_WORKERS,
+        rate=settings.WEATHER_PREFETCH_RATE,
+    )
+
+
+def capital_weather(capital):
+    """(weather, age in seconds) for a capital; with the prefetcher running, whatever
+    it last stored is served without waiting on the upstream"""
+    if weather_prefetcher is not None and weather_prefetcher.running:
+        cached = weather_cache.last_known(capital)
+        if cached is not None:
+            return cached
+    return weather_cache.get(capital)
+
+
+def states_weather(states):
+    """{state: {state_capital, weather, weather_age} or {error}} for several states.
+
+    Each capital is looked up once and cache misses go upstream concurrently,
+    so the whole call takes as long as the slowest capital.
+    """
+    capitals = {state: STATE_CAPITALS[state] for state in states if state in STATE_CAPITALS}
+    results = fetch_concurrently(capital_weather, capitals.values())
+
+    entries = {}
+    for state in states:
+        if state not in capitals:
+            entries[state] = {'error': f'Capital city not found for state: {state}'}
+            continue
+        result, error = results[capitals[state]]
+        entry = {'state_capital': capitals[state]}
+        if error is None:
+            entry['weather'], age = result
+            entry['weather_age'] = round(age, 1)
+        else:
+            entry['error'] = str(error)
+        entries[state] = entry
+    return entries
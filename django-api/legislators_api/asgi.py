@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "legislators_api.settings")
 
 application = get_asgi_application()
+
+# Imported after the application is set up, since it needs the app registry
+from django.conf import settings
+from legislators.weather import weather_prefetcher
+
+if weather_prefetcher is not None:
+    weather_prefetcher.start(lock_path=settings.WEATHER_PREFETCH_LOCK)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -53,6 +54,11 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Per-route latency, query and serialization histograms on /api/metrics/ (legislators/metrics.py)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'legislators.metrics.MetricsMiddleware')
+
 ROOT_URLCONF = "legislators_api.urls"
 
 TEMPLATES = [
@@ -85,6 +91,13 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('POSTGRES_HOST'),
         'PORT': os.getenv('POSTGRES_PORT'),
+        # Keep each worker thread's connection for DB_CONN_MAX_AGE seconds
+        # instead of reconnecting on every request (0 = close after each request)
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'true').lower() == 'true',
+        # Behind PgBouncer in transaction mode a cursor can't outlive its
+        # transaction, so streaming falls back to client-side cursors
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_TRANSACTION_POOLING', 'false').lower() == 'true',
     }
 }
 
@@ -131,14 +144,68 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # REST Framework settings
+# JSON encoding: orjson (same output, falls back to the stdlib when orjson is
+# not installed) or stdlib (DRF's JSONRenderer)
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'orjson')
+
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'legislators.renderers.ORJSONRenderer' if JSON_BACKEND == 'orjson'
+        else 'rest_framework.renderers.JSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
     ],
 }
 
+# Shared cache: Redis when REDIS_URL is set (one copy for every worker), else per-process memory
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds list/detail/stats responses stay in the shared cache (legislators/cache.py);
+# off by default without Redis, since per-process entries would not see other workers' writes
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '300' if REDIS_URL else '0'))
+
 # CORS settings
-CORS_ALLOW_ALL_ORIGINS = True
\ No newline at end of file
+CORS_ALLOW_ALL_ORIGINS = True
+
+# In-process snapshot of the legislators table (reloaded on dataset version change)
+LEGISLATORS_SNAPSHOT = os.getenv('LEGISLATORS_SNAPSHOT', 'true').lower() == 'true'
+SNAPSHOT_CHECK_INTERVAL = float(os.getenv('SNAPSHOT_CHECK_INTERVAL', '0'))
+
+# Age statistics backend: engine (in-memory), sql (single Postgres query) or python (ORM loop)
+AGE_STATS_BACKEND = os.getenv('AGE_STATS_BACKEND', 'engine')
+
+# Capital-city weather cache: fresh for WEATHER_CACHE_TTL seconds, then served
+# stale for up to WEATHER_STALE_TTL more while it is refreshed in the background
+WEATHER_CACHE_TTL = float(os.getenv('WEATHER_CACHE_TTL', '600'))
+WEATHER_STALE_TTL = float(os.getenv('WEATHER_STALE_TTL', '3600'))
+
+# Background refresh of every capital's weather (0 = disabled); when running,
+# the weather endpoint serves the last stored value and never waits on upstream
+WEATHER_PREFETCH_INTERVAL = float(os.getenv('WEATHER_PREFETCH_INTERVAL', '0'))
+WEATHER_PREFETCH_WORKERS = int(os.getenv('WEATHER_PREFETCH_WORKERS', '8'))
+WEATHER_PREFETCH_RATE = float(os.getenv('WEATHER_PREFETCH_RATE', '5'))
+# Only the worker holding this lock prefetches (empty = every worker does)
+WEATHER_PREFETCH_LOCK = os.getenv(
+    'WEATHER_PREFETCH_LOCK', os.path.join(tempfile.gettempdir(), 'django-api-weather-prefetch.lock'))
+
+# The upstream HTTP client (OpenWeatherMap, legislators CSV) is
+# legislators_common.upstream, configured from the UPSTREAM_* variables
+
+# Serve list/detail/stats/weather from legislators/async_views.py (run under uvicorn)
+ASYNC_VIEWS = os.getenv('DJANGO_ASYNC_VIEWS', 'false').lower() == 'true'
+# Database queries the async views may run at once per worker
+ASYNC_DB_CONCURRENCY = int(os.getenv('ASYNC_DB_CONCURRENCY', '20'))
@@ -1,24 +1,86 @@
 import os
 import requests
-from datetime import datetime, date
-from flask import Flask, request, jsonify
+import tempfile
+from bisect import bisect_right
+from datetime import datetime, date, timezone
+from flask import Flask, Response, g, has_request_context, request, jsonify, stream_with_context, url_for
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from cache import STATS, UNFILTERED, cached_response, make_response_cache
+from conditional import DatasetValidators, conditional
+from db_pool import engine_options, pool_stats, server_stats
+from json_provider import ORJSONProvider
+from legislators_common.metrics import render_metrics, request_metrics
+from legislators_common.upstream import upstream
+from legislators_common.weather import WeatherCache, WeatherPrefetcher, fetch_concurrently
+from metrics import init_app as init_metrics
+from snapshot import LegislatorSnapshot
 
 app = Flask(__name__)
 
+# JSON encoding: orjson (same output, falls back to the stdlib when orjson is
+# not installed) or stdlib (Flask's default provider)
+app.config['JSON_BACKEND'] = os.environ.get('JSON_BACKEND', 'orjson')
+if app.config['JSON_BACKEND'] == 'orjson':
+    app.json = ORJSONProvider(app)
+
 # Database configuration
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Connection pool per worker (see db_pool.py); DB_TRANSACTION_POOLING=true
+# behind PgBouncer in transaction mode, which then does the pooling
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', '5'))
+app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', '10'))
+app.config['DB_POOL_TIMEOUT'] = float(os.environ.get('DB_POOL_TIMEOUT', '30'))
+app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', '1800'))
+app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+app.config['DB_TRANSACTION_POOLING'] = os.environ.get('DB_TRANSACTION_POOLING', 'false').lower() == 'true'
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+    pool_size=app.config['DB_POOL_SIZE'],
+    max_overflow=app.config['DB_MAX_OVERFLOW'],
+    timeout=app.config['DB_POOL_TIMEOUT'],
+    recycle=app.config['DB_POOL_RECYCLE'],
+    pre_ping=app.config['DB_POOL_PRE_PING'],
+    transaction_pooling=app.config['DB_TRANSACTION_POOLING']
+)
+
+# In-process snapshot of the legislators table (reloaded on dataset version change)
+app.config['LEGISLATORS_SNAPSHOT'] = os.environ.get('LEGISLATORS_SNAPSHOT', 'true').lower() == 'true'
+app.config['SNAPSHOT_CHECK_INTERVAL'] = float(os.environ.get('SNAPSHOT_CHECK_INTERVAL', '0'))
+
+# Age statistics backend: engine (in-memory), sql (single Postgres query) or python (ORM loop)
+AGE_STATS_BACKENDS = ('engine', 'sql', 'python')
+app.config['AGE_STATS_BACKEND'] = os.environ.get('AGE_STATS_BACKEND', 'engine')
+
 db = SQLAlchemy(app)
 
+# Per-route latency, query and serialization histograms on /metrics (see metrics.py)
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+if app.config['METRICS_ENABLED']:
+    init_metrics(app)
+
 # Weather API configuration
 WEATHER_API_KEY = os.environ.get('WEATHER_API_KEY')
 WEATHER_API_URL = os.environ.get('WEATHER_API_URL')
 
+# Capital-city weather cache: fresh for WEATHER_CACHE_TTL seconds, then served
+# stale for up to WEATHER_STALE_TTL more while it is refreshed in the background
+app.config['WEATHER_CACHE_TTL'] = float(os.environ.get('WEATHER_CACHE_TTL', '600'))
+app.config['WEATHER_STALE_TTL'] = float(os.environ.get('WEATHER_STALE_TTL', '3600'))
+
+# Background refresh of every capital's weather (0 = disabled); when running,
+# the weather endpoint serves the last stored value and never waits on upstream
+app.config['WEATHER_PREFETCH_INTERVAL'] = float(os.environ.get('WEATHER_PREFETCH_INTERVAL', '0'))
+app.config['WEATHER_PREFETCH_WORKERS'] = int(os.environ.get('WEATHER_PREFETCH_WORKERS', '8'))
+app.config['WEATHER_PREFETCH_RATE'] = float(os.environ.get('WEATHER_PREFETCH_RATE', '5'))
+# Only the worker holding this lock prefetches (empty = every worker does)
+app.config['WEATHER_PREFETCH_LOCK'] = os.environ.get(
+    'WEATHER_PREFETCH_LOCK', os.path.join(tempfile.gettempdir(), 'flask-api-weather-prefetch.lock'))
+
 # State capitals mapping
 STATE_CAPITALS = {
     'AL': 'Montgomery', 'AK': 'Juneau', 'AZ': 'Phoenix', 'AR': 'Little Rock',
@@ -72,23 +134,234 @@ class Legislator(db.Model):
         today = date.today()
         return today.year - self.birthday.year - ((today.month, today.day) < (self.birthday.month, self.birthday.day))
 
+class DatasetVersion(db.Model):
+    __tablename__ = 'dataset_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+BUMP_DATASET_VERSION_SQL = text("""
+    INSERT INTO dataset_version (id, version, updated_at) VALUES (1, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (id) DO UPDATE
+    SET version = dataset_version.version + 1, updated_at = CURRENT_TIMESTAMP
+    RETURNING version
+""")
+
+def read_dataset_version_row():
+    """(version, updated_at) of the dataset_version row, or None if it cannot be read.
+
+    Read at most once per request: the conditional check and the snapshot
+    both need it, and one SELECT answers both.
+    """
+    if has_request_context() and 'dataset_version_row' in g:
+        return g.dataset_version_row
+    try:
+        row = db.session.execute(
+            db.select(DatasetVersion.version, DatasetVersion.updated_at).filter_by(id=1)
+        ).first()
+    except SQLAlchemyError:
+        db.session.rollback()
+        value = None
+    else:
+        value = (row.version, row.updated_at.replace(tzinfo=timezone.utc)) if row else (0, None)
+    if has_request_context():
+        g.dataset_version_row = value
+    return value
+
+def get_dataset_version():
+    """Return the current dataset version, or None if it cannot be read"""
+    row = read_dataset_version_row()
+    return None if row is None else row[0] or 0
+
+def bump_dataset_version():
+    """Increment the dataset version inside the current transaction"""
+    g.pop('dataset_version_row', None)
+    return db.session.execute(BUMP_DATASET_VERSION_SQL).scalar()
+
+def get_dataset_validators():
+    """Return (version, updated_at) for ETag/Last-Modified, or None if they cannot be read"""
+    return read_dataset_version_row()
+
+# Read endpoints answer If-None-Match/If-Modified-Since from this (see conditional.py)
+dataset_validators = DatasetValidators(
+    load=get_dataset_validators,
+    check_interval=app.config['SNAPSHOT_CHECK_INTERVAL']
+)
+
+# Shared response cache for list/detail/stats (see cache.py); off by default
+# without Redis, since per-process entries would not see other workers' writes
+app.config['REDIS_URL'] = os.environ.get('REDIS_URL')
+app.config['RESPONSE_CACHE_TTL'] = int(os.environ.get('RESPONSE_CACHE_TTL', '300' if app.config['REDIS_URL'] else '0'))
+response_cache = make_response_cache(app.config['REDIS_URL'], app.config['RESPONSE_CACHE_TTL'])
+
+def list_cache_tags():
+    state = request.args.get('state')
+    return [f'state:{state.upper()}'] if state else [UNFILTERED]
+
+def load_legislator_rows():
+    return [legislator.to_dict() for legislator in Legislator.query.order_by(Legislator.govtrack_id).all()]
+
+legislator_snapshot = LegislatorSnapshot(
+    load_rows=load_legislator_rows,
+    current_version=get_dataset_version,
+    check_interval=app.config['SNAPSHOT_CHECK_INTERVAL']
+)
+
+LEGISLATOR_FIELDS = (
+    'govtrack_id', 'first_name', 'last_name', 'birthday', 'gender', 'type',
+    'state', 'district', 'party', 'url', 'notes'
+)
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+def build_legislators_query(state=None, party=None, type=None, after=None, limit=None, columns=None):
+    """Build the filtered/paginated legislators query (entities, or only ``columns``)"""
+    if columns:
+        query = db.session.query(*[getattr(Legislator, column) for column in columns])
+    else:
+        query = Legislator.query
+    
+    if state:
+        query = query.filter(Legislator.state == state)
+    if party:
+        query = query.filter(Legislator.party.ilike(f'%{party}%'))
+    if type:
+        query = query.filter(Legislator.type == type)
+    if after is not None or limit is not None:
+        query = query.order_by(Legislator.govtrack_id)
+    if after is not None:
+        query = query.filter(Legislator.govtrack_id > after)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def column_row_to_dict(row):
+    row = row._asdict()
+    if row.get('birthday'):
+        row['birthday'] = row['birthday'].isoformat()
+    return row
+
+def query_legislators_sql(state=None, party=None, type=None, after=None, limit=None, columns=None):
+    """Filter legislators in Postgres and serialize the matching rows"""
+    query = build_legislators_query(state, party, type, after, limit, columns)
+    if not columns:
+        return [legislator.to_dict() for legislator in query.all()]
+    return [column_row_to_dict(row) for row in query.all()]
+
+def query_legislators_snapshot(state=None, party=None, type=None, after=None, limit=None, columns=None):
+    """Filter legislators using the in-memory snapshot's inverted indexes"""
+    rows = legislator_snapshot.get().filter(state, party, type)
+    if after is not None:
+        rows = rows[bisect_right(rows, after, key=lambda row: row['govtrack_id']):]
+    if limit is not None:
+        rows = rows[:limit]
+    if columns:
+        rows = [{column: row[column] for column in columns} for row in rows]
+    return rows
+
+def parse_list_params(args):
+    """Validate the ?after=&limit=&fields= list parameters"""
+    params = {}
+    try:
+        if args.get('after'):
+            params['after'] = int(args['after'])
+        if args.get('limit'):
+            params['limit'] = int(args['limit'])
+            if not 1 <= params['limit'] <= MAX_PAGE_SIZE:
+                raise ValueError
+    except ValueError:
+        return None, f'after must be an integer and limit between 1 and {MAX_PAGE_SIZE}'
+    
+    if args.get('fields'):
+        fields = [field.strip() for field in args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in LEGISLATOR_FIELDS]
+        if unknown:
+            return None, f'Unknown fields: {", ".join(unknown)}'
+        params['fields'] = fields
+    return params, None
+
+def wants_ndjson():
+    return request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
 @app.route('/api/legislators', methods=['GET'])
+@conditional(dataset_validators, variant=lambda: 'ndjson' if wants_ndjson() else 'json')
+@cached_response(response_cache, list_cache_tags)
 def get_legislators():
-    """Get all legislators with optional filtering by state and party"""
+    """Get legislators with optional filtering (state, party, type),
+    keyset pagination on govtrack_id (after, limit) and field projection (fields)"""
     state = request.args.get('state')
     party = request.args.get('party')
+    type_val = request.args.get('type')
     
-    query = Legislator.query
+    state = state.upper() if state else None
+    type_val = type_val.lower() if type_val else None
     
-    if state:
-        query = query.filter(Legislator.state == state.upper())
-    if party:
-        query = query.filter(Legislator.party.ilike(f'%{party}%'))
+    params, error = parse_list_params(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    fields = params.pop('fields', None)
+    if fields:
+        # govtrack_id is always fetched: it is the pagination cursor
+        params['columns'] = ['govtrack_id'] + [field for field in fields if field != 'govtrack_id']
+    
+    ndjson = wants_ndjson()
+    if ndjson or request.args.get('stream') in ('1', 'true'):
+        params.setdefault('columns', list(fields or LEGISLATOR_FIELDS))
+        return stream_legislators(build_legislators_query(state, party, type_val, **params), fields, ndjson)
+    
+    if app.config['LEGISLATORS_SNAPSHOT']:
+        legislators = query_legislators_snapshot(state, party, type_val, **params)
+    else:
+        legislators = query_legislators_sql(state, party, type_val, **params)
+    
+    next_after = None
+    if params.get('limit') and len(legislators) == params['limit']:
+        next_after = legislators[-1]['govtrack_id']
+    if fields and 'govtrack_id' not in fields:
+        legislators = [{field: row[field] for field in fields} for row in legislators]
     
-    legislators = query.all()
-    return jsonify([legislator.to_dict() for legislator in legislators])
+    response = jsonify(legislators)
+    if next_after is not None:
+        next_args = request.args.to_dict()
+        next_args['after'] = next_after
+        response.headers['Link'] = f'<{url_for("get_legislators", **next_args)}>; rel="next"'
+    return response
+
+def stream_legislators(query, fields, ndjson):
+    """Stream query results as NDJSON or a JSON array, encoding rows as they arrive.
+
+    Rows come from a server-side cursor in batches of STREAM_BATCH_SIZE, so
+    memory per request stays flat however large the table is.
+    """
+    def generate():
+        if not ndjson:
+            yield '['
+        first = True
+        chunk = []
+        for row in query.yield_per(STREAM_BATCH_SIZE):
+            row = column_row_to_dict(row)
+            if fields:
+                row = {field: row[field] for field in fields}
+            encoded = app.json.dumps(row, separators=(',', ':'))
+            if ndjson:
+                chunk.append(encoded + '\n')
+            else:
+                chunk.append(encoded if first else ',' + encoded)
+            first = False
+            if len(chunk) >= STREAM_BATCH_SIZE:
+                yield ''.join(chunk)
+                chunk = []
+        chunk.append('' if ndjson else ']')
+        yield ''.join(chunk)
+    
+    mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
 
 @app.route('/api/legislators/<int:govtrack_id>', methods=['GET'])
+@conditional(dataset_validators)
+@cached_response(response_cache, lambda govtrack_id: [f'legislator:{govtrack_id}'])
 def get_legislator(govtrack_id):
     """Get a specific legislator by govtrack_id"""
     legislator = Legislator.query.get(govtrack_id)
@@ -109,13 +382,95 @@ def update_legislator_notes(govtrack_id):
         return jsonify({'error': 'Note field is required'}), 400
     
     legislator.notes = data['note']
+    version = bump_dataset_version()
     db.session.commit()
+    legislator_snapshot.replace_rows(version, [legislator.to_dict()])
+    dataset_validators.invalidate()
+    if response_cache is not None:
+        response_cache.invalidate_legislators([govtrack_id], [legislator.state])
     
     return jsonify({'message': 'Notes updated successfully', 'legislator': legislator.to_dict()})
 
+BULK_NOTES_SQL = """
+    WITH new_notes (govtrack_id, notes) AS (VALUES {values})
+    UPDATE legislators SET notes = new_notes.notes
+    FROM new_notes
+    WHERE legislators.govtrack_id = new_notes.govtrack_id
+    RETURNING {columns}
+"""
+
+def parse_bulk_notes(data):
+    """Return ({govtrack_id: note}, error) for a bulk notes body"""
+    if not isinstance(data, dict) or not data:
+        return None, 'Body must be a non-empty object of {govtrack_id: note} pairs'
+    if len(data) > MAX_PAGE_SIZE:
+        return None, f'At most {MAX_PAGE_SIZE} legislators per request'
+
+    notes = {}
+    for key, note in data.items():
+        try:
+            govtrack_id = int(key)
+        except ValueError:
+            return None, f'Invalid govtrack_id: {key}'
+        if note is not None and not isinstance(note, str):
+            return None, f'Note for {key} must be a string or null'
+        notes[govtrack_id] = note
+    return notes, None
+
+@app.route('/api/legislators/notes', methods=['PATCH'])
+def update_legislators_notes():
+    """Update notes for many legislators ({govtrack_id: note}) with one UPDATE"""
+    notes, error = parse_bulk_notes(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
+
+    values = ', '.join(f'(:id{i}, :note{i})' for i in range(len(notes)))
+    params = {}
+    for i, (govtrack_id, note) in enumerate(notes.items()):
+        params[f'id{i}'], params[f'note{i}'] = govtrack_id, note
+    columns = ', '.join(f'legislators.{column.name}' for column in Legislator.__table__.columns)
+    statement = text(BULK_NOTES_SQL.format(values=values, columns=columns)).columns(*Legislator.__table__.columns)
+    rows = db.session.execute(statement, params).mappings().all()
+    updated = [Legislator(**row).to_dict() for row in rows]
+    version = bump_dataset_version() if updated else None
+    db.session.commit()
+
+    # One version bump and one invalidation for the whole batch
+    if updated:
+        legislator_snapshot.replace_rows(version, updated)
+        dataset_validators.invalidate()
+        if response_cache is not None:
+            response_cache.invalidate_legislators(
+                [row['govtrack_id'] for row in updated], {row['state'] for row in updated}
+            )
+
+    updated_ids = {row['govtrack_id'] for row in updated}
+    return jsonify({
+        'message': 'Notes updated successfully',
+        'updated': len(updated_ids),
+        'results': [
+            {'govtrack_id': govtrack_id, 'status': 'updated' if govtrack_id in updated_ids else 'not_found'}
+            for govtrack_id in notes
+        ]
+    })
+
 @app.route('/api/stats/age', methods=['GET'])
+@conditional(dataset_validators, dated=True)
+@cached_response(response_cache, lambda: [STATS])
 def get_age_stats():
-    """Get age statistics for all legislators"""
+    """Get age statistics for all legislators (?backend= overrides AGE_STATS_BACKEND)"""
+    backend = request.args.get('backend', app.config['AGE_STATS_BACKEND'])
+    if backend not in AGE_STATS_BACKENDS:
+        return jsonify({'error': f'Unknown age stats backend: {backend}'}), 400
+    
+    if backend == 'engine' and app.config['LEGISLATORS_SNAPSHOT']:
+        return age_stats_from_engine()
+    if backend == 'sql':
+        return age_stats_from_sql()
+    return age_stats_from_python()
+
+def age_stats_from_python():
+    """Compute age statistics by loading every legislator through the ORM"""
     legislators = Legislator.query.all()
     
     if not legislators:
@@ -130,10 +485,9 @@ def get_age_stats():
     if not ages:
         return jsonify({'error': 'No valid birth dates found'}), 404
     
-    ages.sort(key=lambda x: x[0])
-    
-    youngest_age, youngest_legislator = ages[0]
-    oldest_age, oldest_legislator = ages[-1]
+    # Ties resolve like the SQL backend: latest/earliest birthday, then lowest govtrack_id
+    youngest_age, youngest_legislator = min(ages, key=lambda x: (-x[1].birthday.toordinal(), x[1].govtrack_id))
+    oldest_age, oldest_legislator = min(ages, key=lambda x: (x[1].birthday, x[1].govtrack_id))
     average_age = sum(age for age, _ in ages) / len(ages)
     
     return jsonify({
@@ -148,6 +502,110 @@ def get_age_stats():
         }
     })
 
+AGE_STATS_SQL = text("""
+    WITH totals AS (
+        SELECT COUNT(*) AS total,
+               SUM(EXTRACT(YEAR FROM AGE(CAST(:today AS date), birthday))) AS age_sum
+        FROM legislators
+        WHERE birthday IS NOT NULL
+    ),
+    extremes AS (
+        (SELECT 'youngest' AS role, * FROM legislators WHERE birthday IS NOT NULL
+         ORDER BY birthday DESC, govtrack_id LIMIT 1)
+        UNION ALL
+        (SELECT 'oldest' AS role, * FROM legislators WHERE birthday IS NOT NULL
+         ORDER BY birthday, govtrack_id LIMIT 1)
+    )
+    SELECT extremes.*,
+           CAST(EXTRACT(YEAR FROM AGE(CAST(:today AS date), extremes.birthday)) AS integer) AS age,
+           totals.total, totals.age_sum
+    FROM extremes CROSS JOIN totals
+""")
+
+def age_stats_from_sql():
+    """Compute age statistics in Postgres with one statement (uses idx_legislators_birthday)"""
+    rows = db.session.execute(AGE_STATS_SQL, {'today': date.today()}).mappings().all()
+    if not rows:
+        return jsonify({'error': 'No legislators found'}), 404
+    
+    columns = [column.name for column in Legislator.__table__.columns]
+    extremes = {
+        row['role']: {'age': row['age'], 'legislator': Legislator(**{c: row[c] for c in columns}).to_dict()}
+        for row in rows
+    }
+    
+    return jsonify({
+        'average_age': round(int(rows[0]['age_sum']) / rows[0]['total'], 2),
+        'youngest_legislator': extremes['youngest'],
+        'oldest_legislator': extremes['oldest']
+    })
+
+def age_stats_from_engine():
+    """Serve /api/stats/age from the snapshot's incrementally maintained AgeStatsEngine"""
+    snapshot, stats = legislator_snapshot.get_with_age_stats()
+    if not snapshot.rows:
+        return jsonify({'error': 'No legislators found'}), 404
+    if not stats:
+        return jsonify({'error': 'No valid birth dates found'}), 404
+    
+    def legislator_entry(govtrack_id, age):
+        return {'age': age, 'legislator': snapshot.by_id[govtrack_id]}
+    
+    return jsonify({
+        'average_age': stats['average_age'],
+        'youngest_legislator': legislator_entry(*stats['youngest']),
+        'oldest_legislator': legislator_entry(*stats['oldest']),
+        'median_age': stats['median_age'],
+        'percentiles': stats['percentiles'],
+        'by_state': stats['by_state'],
+        'by_party': stats['by_party']
+    })
+
+def fetch_capital_weather(query):
+    """Call OpenWeatherMap for a "City,ST,US" query and keep the fields we serve"""
+    params = {
+        'q': query,
+        'appid': WEATHER_API_KEY,
+        'units': 'imperial'
+    }
+    
+    response = upstream.get(WEATHER_API_URL, params=params)
+    response.raise_for_status()
+    
+    weather_data = response.json()
+    return {
+        'temperature': weather_data['main']['temp'],
+        'description': weather_data['weather'][0]['description'],
+        'humidity': weather_data['main']['humidity'],
+        'wind_speed': weather_data['wind']['speed']
+    }
+
+weather_cache = WeatherCache(
+    fetch_capital_weather,
+    ttl=app.config['WEATHER_CACHE_TTL'],
+    stale_ttl=app.config['WEATHER_STALE_TTL']
+)
+
+# Started by the WSGI entry point (wsgi.py), so importing the app never runs it
+weather_prefetcher = None
+if app.config['WEATHER_PREFETCH_INTERVAL'] > 0 and WEATHER_API_KEY and WEATHER_API_URL:
+    weather_prefetcher = WeatherPrefetcher(
+        weather_cache,
+        [f"{capital},{state},US" for state, capital in STATE_CAPITALS.items()],
+        interval=app.config['WEATHER_PREFETCH_INTERVAL'],
+        max_workers=app.config['WEATHER_PREFETCH_WORKERS'],
+        rate=app.config['WEATHER_PREFETCH_RATE']
+    )
+
+def capital_weather(query):
+    """(weather, age in seconds) for a capital; with the prefetcher running, whatever
+    it last stored is served without waiting on the upstream"""
+    if weather_prefetcher is not None and weather_prefetcher.running:
+        cached = weather_cache.last_known(query)
+        if cached is not None:
+            return cached
+    return weather_cache.get(query)
+
 @app.route('/api/legislators/<int:govtrack_id>/weather', methods=['GET'])
 def get_legislator_weather(govtrack_id):
     """Get current weather for the capital city of a legislator's state"""
@@ -168,28 +626,13 @@ def get_legislator_weather(govtrack_id):
     capital_city = STATE_CAPITALS[state]
     
     try:
-        # Call OpenWeatherMap API
-        weather_url = WEATHER_API_URL
-        params = {
-            'q': f"{capital_city},{state},US",
-            'appid': WEATHER_API_KEY,
-            'units': 'imperial'
-        }
-        
-        response = requests.get(weather_url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        weather_data = response.json()
+        weather, age = capital_weather(f"{capital_city},{state},US")
         
         return jsonify({
             'legislator': legislator.to_dict(),
             'state_capital': capital_city,
-            'weather': {
-                'temperature': weather_data['main']['temp'],
-                'description': weather_data['weather'][0]['description'],
-                'humidity': weather_data['main']['humidity'],
-                'wind_speed': weather_data['wind']['speed']
-            }
+            'weather': weather,
+            'weather_age': round(age, 1)
         })
         
     except requests.exceptions.RequestException as e:
@@ -197,10 +640,120 @@ def get_legislator_weather(govtrack_id):
     except KeyError as e:
         return jsonify({'error': f'Unexpected weather API response format: {str(e)}'}), 500
 
+def weather_error_message(e):
+    if isinstance(e, KeyError):
+        return f'Unexpected weather API response format: {str(e)}'
+    return f'Failed to fetch weather data: {str(e)}'
+
+def states_weather(states):
+    """{state: {state_capital, weather, weather_age} or {error}} for several states.
+
+    Each capital is looked up once and cache misses go upstream concurrently,
+    so the whole call takes as long as the slowest capital.
+    """
+    queries = {state: f"{STATE_CAPITALS[state]},{state},US" for state in states if state in STATE_CAPITALS}
+    results = fetch_concurrently(capital_weather, queries.values())
+    
+    entries = {}
+    for state in states:
+        if state not in queries:
+            entries[state] = {'error': f'Capital city not found for state: {state}'}
+            continue
+        result, error = results[queries[state]]
+        entry = {'state_capital': STATE_CAPITALS[state]}
+        if error is None:
+            entry['weather'], age = result
+            entry['weather_age'] = round(age, 1)
+        else:
+            entry['error'] = weather_error_message(error)
+        entries[state] = entry
+    return entries
+
+@app.route('/api/weather', methods=['GET'])
+def get_states_weather():
+    """Get current weather for the capitals of several states (?state=CA,TX)"""
+    if not WEATHER_API_KEY:
+        return jsonify({'error': 'Weather API key not configured'}), 500
+    
+    if not WEATHER_API_URL:
+        return jsonify({'error': 'Weather API URL not configured'}), 500
+    
+    states = [state.strip().upper() for state in request.args.get('state', '').split(',') if state.strip()]
+    if not states:
+        return jsonify({'error': 'state parameter is required (e.g. ?state=CA,TX)'}), 400
+    
+    return jsonify({'states': states_weather(list(dict.fromkeys(states)))})
+
+@app.route('/api/legislators/weather:batch', methods=['POST'])
+def get_legislators_weather_batch():
+    """Get current capital-city weather for a list of legislators in one request"""
+    if not WEATHER_API_KEY:
+        return jsonify({'error': 'Weather API key not configured'}), 500
+    
+    if not WEATHER_API_URL:
+        return jsonify({'error': 'Weather API URL not configured'}), 500
+    
+    data = request.get_json(silent=True) or {}
+    govtrack_ids = data.get('govtrack_ids')
+    if (not isinstance(govtrack_ids, list) or not govtrack_ids
+            or not all(isinstance(i, int) and not isinstance(i, bool) for i in govtrack_ids)):
+        return jsonify({'error': 'govtrack_ids must be a non-empty list of integers'}), 400
+    if len(govtrack_ids) > MAX_PAGE_SIZE:
+        return jsonify({'error': f'At most {MAX_PAGE_SIZE} govtrack_ids per request'}), 400
+    
+    govtrack_ids = list(dict.fromkeys(govtrack_ids))
+    legislators = {
+        legislator.govtrack_id: legislator
+        for legislator in Legislator.query.filter(Legislator.govtrack_id.in_(govtrack_ids))
+    }
+    weather = states_weather(list(dict.fromkeys(legislator.state for legislator in legislators.values())))
+    
+    return jsonify({
+        'legislators': [
+            {'legislator': legislators[govtrack_id].to_dict(), **weather[legislators[govtrack_id].state]}
+            for govtrack_id in govtrack_ids if govtrack_id in legislators
+        ],
+        'not_found': [govtrack_id for govtrack_id in govtrack_ids if govtrack_id not in legislators]
+    })
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'timestamp': datetime.utcnow().isoformat()})
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': datetime.utcnow().isoformat(),
+        'weather_cache': weather_cache.stats(),
+        'weather_prefetch': weather_prefetcher.last_run if weather_prefetcher else None,
+        'upstream': upstream.stats()
+    })
+
+@app.route('/health/db', methods=['GET'])
+def database_health_check():
+    """Connection pool utilization of this worker and connection counts on the server"""
+    try:
+        server = server_stats(db.session)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({
+            'status': 'unhealthy',
+            'timestamp': datetime.utcnow().isoformat(),
+            'pool': pool_stats(db.engine.pool, app.config['DB_MAX_OVERFLOW']),
+            'error': str(e)
+        }), 503
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': datetime.utcnow().isoformat(),
+        'pool': pool_stats(db.engine.pool, app.config['DB_MAX_OVERFLOW']),
+        'server': server
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics of this worker"""
+    caches = {'weather': weather_cache.stats()}
+    if response_cache is not None:
+        caches['response'] = response_cache.stats()
+    return Response(render_metrics(request_metrics, upstream.stats(), caches), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Benchmark /api/legislators filtering: SQL (ILIKE) path vs in-memory indexes.
+
+Run inside the flask-api container (needs DATABASE_URL and loaded data):
+
+    python bench_filters.py --repeat 200
+"""
+import argparse
+import time
+
+from app import app, query_legislators_snapshot, query_legislators_sql
+
+FILTERS = [
+    {},
+    {'state': 'CA'},
+    {'party': 'dem'},
+    {'party': 'Republican'},
+    {'party': 'i_d%'},
+    {'state': 'TX', 'party': 'rep'},
+    {'state': 'NY', 'party': 'demo', 'type': 'rep'},
+    {'type': 'sen'},
+]
+
+def time_call(func, filters, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(**filters)
+    elapsed = time.perf_counter() - start
+    return result, elapsed / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=100, help='iterations per filter combination')
+    args = parser.parse_args()
+
+    with app.app_context():
+        # Warm the snapshot so its load is not counted against the index path
+        query_legislators_snapshot()
+
+        print(f"{'filters':<45} {'rows':>6} {'sql ms':>10} {'index ms':>10} {'speedup':>8}")
+        for filters in FILTERS:
+            sql_rows, sql_ms = time_call(query_legislators_sql, filters, args.repeat)
+            index_rows, index_ms = time_call(query_legislators_snapshot, filters, args.repeat)
+
+            sql_ids = sorted(row['govtrack_id'] for row in sql_rows)
+            index_ids = [row['govtrack_id'] for row in index_rows]
+            if sql_ids != index_ids:
+                print(f"MISMATCH for {filters}: sql={len(sql_ids)} index={len(index_ids)}")
+                return 1
+
+            label = ', '.join(f'{key}={value}' for key, value in filters.items()) or '(none)'
+            print(f"{label:<45} {len(index_rows):>6} {sql_ms:>10.3f} {index_ms:>10.3f} {sql_ms / index_ms:>7.1f}x")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Benchmark /api/legislators latency: Flask's stdlib JSON provider vs orjson.
+
+Run inside the flask-api container (needs DATABASE_URL and loaded data):
+
+    python bench_json.py --repeat 50
+"""
+import argparse
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import app
+from json_provider import ORJSONProvider, orjson
+
+QUERIES = [
+    '',
+    '?fields=govtrack_id,first_name,last_name,state',
+    '?limit=100',
+    '?state=CA',
+]
+
+def time_request(client, path, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        response = client.get(path)
+    elapsed = time.perf_counter() - start
+    return response.data, elapsed / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50, help='requests per query and provider')
+    args = parser.parse_args()
+
+    if orjson is None:
+        print('orjson is not installed')
+        return 1
+
+    providers = {'stdlib': DefaultJSONProvider(app), 'orjson': ORJSONProvider(app)}
+    client = app.test_client()
+
+    print(f"{'query':<50} {'bytes':>9} {'stdlib ms':>10} {'orjson ms':>10} {'speedup':>8}")
+    for query in QUERIES:
+        path = f'/api/legislators{query}'
+        client.get(path)  # warm the snapshot
+
+        results = {}
+        for name, provider in providers.items():
+            app.json = provider
+            results[name] = time_request(client, path, args.repeat)
+
+        (stdlib_body, stdlib_ms), (orjson_body, orjson_ms) = results['stdlib'], results['orjson']
+        if stdlib_body != orjson_body:
+            print(f'MISMATCH for {path}')
+            return 1
+
+        print(f"{query or '(all)':<50} {len(orjson_body):>9} {stdlib_ms:>10.2f} {orjson_ms:>10.2f} {stdlib_ms / orjson_ms:>7.1f}x")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
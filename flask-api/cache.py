@@ -0,0 +1,159 @@
+"""Response cache shared by every worker (Redis), with tag-based invalidation
+(see legislators_common.cache).
+
+A write bumps exactly the tags it affects: the legislator's detail, the list
+slices for its state, the slices without a state filter (UNFILTERED; party
+filters are substring matches, so they can't be narrowed further) and the age
+stats.
+"""
+import hashlib
+import json
+import threading
+import time
+from datetime import date
+from functools import wraps
+
+from flask import make_response, request
+from legislators_common.cache import ALL, MAX_TARGETED_ROWS, STATS, UNFILTERED, LookupCounter, new_tag_version, tag_digest
+
+try:
+    import redis
+except ImportError:  # only needed with REDIS_URL
+    redis = None
+
+# Response headers kept with a cached body
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Link')
+
+
+class MemoryBackend:
+    """In-process stand-in for Redis (tests, single-process runs)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}  # key -> (value, expires_at or None)
+
+    def _get(self, key, now):
+        value, expires_at = self._data.get(key, (None, None))
+        if expires_at is not None and expires_at <= now:
+            del self._data[key]
+            return None
+        return value
+
+    def mget(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            return [self._get(key, now) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._get(key, time.monotonic()) is not None:
+                return False
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+            return True
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._get(key, time.monotonic()) or 0) + 1
+            self._data[key] = (value, None)
+            return value
+
+
+class ResponseCache:
+    """Tag-versioned cache over a Redis client (or MemoryBackend)"""
+
+    def __init__(self, client, ttl=300, prefix='flask-api'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.lookups = LookupCounter()
+
+    def tag_key(self, tag):
+        return f'{self.prefix}:tag:{tag_digest(tag)}'
+
+    def tag_versions(self, tags):
+        keys = [self.tag_key(tag) for tag in tags]
+        versions = self.client.mget(keys)
+        for i, key in enumerate(keys):
+            if versions[i] is None:
+                self.client.set(key, new_tag_version(), nx=True)
+                versions[i] = self.client.mget([key])[0]
+        return [int(version) for version in versions]
+
+    def entry_key(self, key, tags):
+        versions = ':'.join(str(version) for version in self.tag_versions(tags))
+        return f'{self.prefix}:response:{key}:{versions}'
+
+    def get(self, entry_key):
+        """(body, {'status': ..., 'headers': {...}}) or None"""
+        value = self.client.mget([entry_key])[0]
+        self.lookups.record(value is not None)
+        if value is None:
+            return None
+        # A JSON header line, then the body bytes as they were sent
+        meta, _, body = value.partition(b'\n')
+        return body, json.loads(meta)
+
+    def set(self, entry_key, body, status, headers):
+        meta = json.dumps({'status': status, 'headers': headers}).encode()
+        self.client.set(entry_key, meta + b'\n' + body, ex=self.ttl)
+
+    def bump(self, tags):
+        for tag in set(tags):
+            self.client.incr(self.tag_key(tag))
+
+    def invalidate_legislators(self, govtrack_ids, states):
+        """Drop what a write to these legislators affects; ``states`` holds the
+        states the rows were in before and after the write"""
+        if len(govtrack_ids) > MAX_TARGETED_ROWS:
+            return self.invalidate_all()
+        tags = [f'legislator:{govtrack_id}' for govtrack_id in govtrack_ids]
+        tags += [f'state:{state}' for state in states]
+        self.bump(tags + [UNFILTERED, STATS])
+
+    def invalidate_all(self):
+        self.bump([ALL])
+
+    def stats(self):
+        return self.lookups.stats()
+
+
+def make_response_cache(redis_url, ttl):
+    """ResponseCache on Redis, or None when caching is off (ttl 0)"""
+    if not ttl:
+        return None
+    if not redis_url:
+        return ResponseCache(MemoryBackend(), ttl)
+    if redis is None:
+        raise RuntimeError('REDIS_URL is set but the redis package is not installed')
+    return ResponseCache(redis.Redis.from_url(redis_url), ttl)
+
+
+def cached_response(cache, tags):
+    """Serve a view's 200 responses from ``cache`` (no-op when it is None).
+
+    ``tags(*view_args)`` names what the response depends on (besides ALL);
+    streamed responses are never cached.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if cache is None:
+                return view(*args, **kwargs)
+
+            # Stats carry ages, so the date is part of every key like it is of their ETag
+            query = '&'.join(sorted(f'{name}={value}' for name, value in request.args.items(multi=True)))
+            accept = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+            digest = hashlib.sha1(f'{request.path}?{query}|{accept}|{date.today()}'.encode()).hexdigest()
+            entry_key = cache.entry_key(digest, [ALL] + tags(*args, **kwargs))
+            cached = cache.get(entry_key)
+            if cached is not None:
+                body, meta = cached
+                return make_response(body, meta['status'], meta['headers'])
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+                cache.set(entry_key, response.get_data(), response.status_code, headers)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,84 @@
+import threading
+import time
+from datetime import date, datetime, timezone
+from functools import wraps
+
+from flask import make_response, request
+
+
+class DatasetValidators:
+    """Cached (version, updated_at) of the dataset_version row.
+
+    Re-read at most every ``check_interval`` seconds (0 = on every call), so
+    with an interval a conditional request that matches is answered without
+    touching the database at all.
+    """
+
+    def __init__(self, load, check_interval=0.0):
+        self._load = load
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded_at = 0.0
+
+    def get(self):
+        """(version, updated_at as an aware UTC datetime or None), or None if unreadable"""
+        with self._lock:
+            if self._value is not None and time.monotonic() - self._loaded_at < self._check_interval:
+                return self._value
+        value = self._load()
+        if value is not None:
+            with self._lock:
+                self._value, self._loaded_at = value, time.monotonic()
+        return value
+
+    def invalidate(self):
+        """Forget the cached row, e.g. after this process bumped the version"""
+        with self._lock:
+            self._value = None
+
+
+def conditional(validators, dated=False, variant=None):
+    """Strong ETag and Last-Modified for a read endpoint, from the dataset version.
+
+    A matching If-None-Match (or, without one, If-Modified-Since) gets a 304
+    before the view runs. ``dated`` adds today's date for bodies that contain
+    ages; ``variant()`` names the representation when it depends on the Accept
+    header, and the 200 and 304 then say so with ``Vary: Accept``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            current = validators.get()
+            if current is None:
+                return view(*args, **kwargs)
+
+            version, updated_at = current
+            parts = [f'v{version}']
+            last_modified = updated_at or datetime.fromtimestamp(0, timezone.utc)
+            if dated:
+                today = date.today()
+                parts.append(today.isoformat())
+                last_modified = max(last_modified, datetime.combine(today, datetime.min.time()).astimezone(timezone.utc))
+            if variant is not None:
+                parts.append(variant())
+            etag = '-'.join(parts)
+            last_modified = last_modified.replace(microsecond=0)
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                not_modified = request.if_modified_since is not None and last_modified <= request.if_modified_since
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            if variant is not None:
+                response.vary.add('Accept')
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,59 @@
+"""SQLAlchemy connection pool options and utilization, for /health/db.
+
+Every gunicorn worker holds its own pool, so a deployment opens up to
+``workers * (pool_size + max_overflow)`` connections; /health/db reports that
+next to the server's max_connections. Behind a transaction-mode pooler
+(PgBouncer) the pooling happens there, and workers keep no connections open.
+"""
+from sqlalchemy import text
+from sqlalchemy.pool import NullPool, QueuePool
+
+SERVER_CONNECTIONS_SQL = text("""
+    SELECT current_setting('max_connections')::integer AS max_connections,
+           COUNT(*) AS connections,
+           COUNT(*) FILTER (WHERE datname = current_database()) AS database_connections,
+           COUNT(*) FILTER (WHERE datname = current_database() AND state = 'active') AS active,
+           COUNT(*) FILTER (WHERE datname = current_database() AND state = 'idle') AS idle
+    FROM pg_stat_activity
+    WHERE backend_type = 'client backend'
+""")
+
+
+def engine_options(pool_size, max_overflow, timeout, recycle, pre_ping, transaction_pooling):
+    """SQLALCHEMY_ENGINE_OPTIONS for the given pool settings"""
+    if transaction_pooling:
+        # A server connection belongs to us only for one transaction, so
+        # nothing is kept checked in between requests
+        return {'poolclass': NullPool, 'pool_pre_ping': pre_ping}
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': timeout,
+        'pool_recycle': recycle,
+        'pool_pre_ping': pre_ping,
+    }
+
+
+def pool_stats(pool, max_overflow):
+    """Connections this worker holds from ``pool``"""
+    if not isinstance(pool, QueuePool):
+        return {'class': type(pool).__name__}
+    capacity = pool.size() + max_overflow
+    return {
+        'class': type(pool).__name__,
+        'size': pool.size(),
+        'max_overflow': max_overflow,
+        'checked_out': pool.checkedout(),
+        'checked_in': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+        'utilization': round(pool.checkedout() / capacity, 3) if capacity else None,
+    }
+
+
+def server_stats(session):
+    """max_connections and current client connections (None off Postgres);
+    raises SQLAlchemyError when the database can't be reached"""
+    if session.get_bind().dialect.name != 'postgresql':
+        session.execute(text('SELECT 1'))
+        return None
+    return dict(session.execute(SERVER_CONNECTIONS_SQL).mappings().first())
@@ -1,41 +1,41 @@
 import os
+import io
 import csv
+import time
+import argparse
 import requests
 from datetime import datetime
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-
-# Create Flask app and database
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db = SQLAlchemy(app)
-
-# Define the Legislator model
-class Legislator(db.Model):
-    __tablename__ = 'legislators'
-    
-    govtrack_id = db.Column(db.Integer, primary_key=True)
-    first_name = db.Column(db.String(100), nullable=False)
-    last_name = db.Column(db.String(100), nullable=False)
-    birthday = db.Column(db.Date, nullable=False)
-    gender = db.Column(db.String(10), nullable=False)
-    type = db.Column(db.String(10), nullable=False)  # sen/rep
-    state = db.Column(db.String(2), nullable=False)
-    district = db.Column(db.String(10))
-    party = db.Column(db.String(50), nullable=False)
-    url = db.Column(db.String(500))
-    notes = db.Column(db.Text)
+from sqlalchemy import bindparam, insert, update
+from app import app, db, Legislator, bump_dataset_version, response_cache
+from legislator_csv import COLUMNS, diff_records, record_hash, validate_row
+from legislators_common.legislator_csv import InvalidRow, fetch_csv_lines, validate_shards
+from legislators_common.upstream import upstream
+
+# Entries of the API's shared response cache that a load makes stale are dropped
+def invalidate_all_responses():
+    if response_cache is not None:
+        response_cache.invalidate_all()
+
+CSV_PATH = 'legislators-current.csv'
+
+class IngestSource(db.Model):
+    """HTTP validators of the last CSV loaded from a URL, for conditional GETs"""
+    __tablename__ = 'ingest_source'
+
+    url = db.Column(db.String(500), primary_key=True)
+    etag = db.Column(db.String(200))
+    last_modified = db.Column(db.String(100))
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
 def download_legislators_data():
     url = os.environ.get('LEGISLATORS_CSV_URL')
     
     print("Downloading legislators data...")
     try:
-        response = requests.get(url, timeout=30)
+        response = upstream.get(url, timeout=30)
         response.raise_for_status()
         
-        with open('legislators-current.csv', 'w', newline='', encoding='utf-8') as f:
+        with open(CSV_PATH, 'w', newline='', encoding='utf-8') as f:
             f.write(response.text)
         
         print("Data downloaded successfully!")
@@ -50,110 +50,279 @@ def create_tables():
     db.create_all()
     print("Tables created successfully!")
 
-def parse_date(date_str):
-    if not date_str:
-        return None
-    
-    # Try different date formats
-    date_formats = ['%Y-%m-%d', '%m/%d/%Y', '%Y-%m-%d %H:%M:%S']
-    
-    for fmt in date_formats:
+def read_valid_rows(lines, stats):
+    """Yield validated records from CSV lines, counting skips in ``stats``"""
+    for row in csv.DictReader(lines):
         try:
-            return datetime.strptime(date_str, fmt).date()
-        except ValueError:
+            record = validate_row(row)
+        except InvalidRow as e:
+            print(e)
+            stats['skipped'] += 1
             continue
-    
-    print(f"Warning: Could not parse date: {date_str}")
-    return None
+        stats['added'] += 1
+        yield record
 
-def ingest_legislators():
-    if not os.path.exists('legislators-current.csv'):
+def read_sharded_rows(path, workers, stats):
+    """Yield validated records of a local CSV, validated in shards by ``workers`` processes.
+
+    Shards come back in file order, so the writer sees the same records as
+    with read_valid_rows. Each shard's skipped lines are reported as it arrives.
+    """
+    stats['shards'] = []
+    for index, (report, records) in enumerate(validate_shards(path, workers, validate_row), 1):
+        print(f"Shard {index}: lines {report['first_line']}-{report['last_line']} "
+              f"(bytes {report['start']}-{report['end']}), {report['valid']} valid, {report['skipped']} skipped")
+        for line, error in report['skips']:
+            print(f"  line {line}: {error}")
+        stats['skipped'] += report['skipped']
+        stats['shards'].append(report)
+        for record in records:
+            stats['added'] += 1
+            yield record
+
+def read_lines(path):
+    with open(path, 'r', encoding='utf-8', newline='') as csvfile:
+        yield from csvfile
+
+def read_records(lines, stats, workers=1):
+    """Validated records of ``lines``, or of the local CSV if None (downloaded
+    first if missing; None if that fails). The local CSV is validated in a
+    process pool when ``workers`` > 1."""
+    if lines is not None:
+        return read_valid_rows(lines, stats)
+    if not os.path.exists(CSV_PATH):
         print("CSV file not found. Downloading...")
         if not download_legislators_data():
-            return False
+            return None
+    if workers > 1:
+        return read_sharded_rows(CSV_PATH, workers, stats)
+    return read_valid_rows(read_lines(CSV_PATH), stats)
+
+def stream_csv_lines(force=False):
+    """Stream LEGISLATORS_CSV_URL with a conditional GET against the stored validators.
+
+    Returns (lines, validators), or (None, None) if the upstream file is unchanged.
+    """
+    url = os.environ.get('LEGISLATORS_CSV_URL')
+    source = None if force else db.session.get(IngestSource, url)
+    print(f"Streaming {url}...")
+    return fetch_csv_lines(
+        url,
+        etag=source.etag if source else None,
+        last_modified=source.last_modified if source else None
+    )
+
+def save_source_validators(validators):
+    url = os.environ.get('LEGISLATORS_CSV_URL')
+    source = db.session.get(IngestSource, url) or IngestSource(url=url)
+    source.etag = validators['etag']
+    source.last_modified = validators['last_modified']
+    source.updated_at = datetime.utcnow()
+    db.session.add(source)
+    db.session.commit()
+
+def ingest_legislators(lines=None, workers=1):
+    stats = {'added': 0, 'skipped': 0}
+    records = read_records(lines, stats, workers)
+    if records is None:
+        return False
     
     print("Starting data ingestion...")
     
-    # Clear existing data
-    Legislator.query.delete()
-    db.session.commit()
-    print("Cleared existing data")
+    # One transaction: readers keep seeing the old rows until the commit, and
+    # a dropped --stream download or a failed insert leaves them in place
+    try:
+        Legislator.query.delete()
+        
+        for record in records:
+            db.session.add(Legislator(notes=None, **record))
+            
+            # Flush in batches so the session does not hold every row
+            if stats['added'] % 100 == 0:
+                db.session.flush()
+                db.session.expunge_all()
+                print(f"Processed {stats['added']} legislators...")
+        
+        version = bump_dataset_version()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    invalidate_all_responses()
+    print(f"Dataset version bumped to {version}")
     
-    legislators_added = 0
-    legislators_skipped = 0
+    print(f"\nData ingestion completed!")
+    print(f"Legislators added: {stats['added']}")
+    print(f"Legislators skipped: {stats['skipped']}")
     
-    with open('legislators-current.csv', 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        
-        for row in reader:
-            try:
-                # Extract required fields
-                govtrack_id = int(row.get('govtrack_id', 0))
-                if not govtrack_id:
-                    legislators_skipped += 1
-                    continue
-                
-                first_name = row.get('first_name', '').strip()
-                last_name = row.get('last_name', '').strip()
-                birthday_str = row.get('birthday', '').strip()
-                gender = row.get('gender', '').strip()
-                type_val = row.get('type', '').strip()
-                state = row.get('state', '').strip()
-                district = row.get('district', '').strip()
-                party = row.get('party', '').strip()
-                url = row.get('url', '').strip()
-                
-                # Validate required fields
-                if not all([first_name, last_name, gender, type_val, state, party]):
-                    print(f"Skipping legislator {govtrack_id}: Missing required fields")
-                    legislators_skipped += 1
-                    continue
-                
-                # Parse birthday
-                birthday = parse_date(birthday_str)
-                if not birthday:
-                    print(f"Skipping legislator {govtrack_id}: Invalid birthday")
-                    legislators_skipped += 1
-                    continue
-                
-                # Create legislator record
-                legislator = Legislator(
-                    govtrack_id=govtrack_id,
-                    first_name=first_name,
-                    last_name=last_name,
-                    birthday=birthday,
-                    gender=gender,
-                    type=type_val,
-                    state=state,
-                    district=district if district else None,
-                    party=party,
-                    url=url if url else None,
-                    notes=None  # Default to None
-                )
-                
-                db.session.add(legislator)
-                legislators_added += 1
-                
-                # Commit in batches for better performance
-                if legislators_added % 100 == 0:
-                    db.session.commit()
-                    print(f"Processed {legislators_added} legislators...")
-                
-            except (ValueError, KeyError) as e:
-                print(f"Error processing row: {e}")
-                legislators_skipped += 1
-                continue
+    return True
+
+class CopyStream:
+    """File-like object feeding csv-encoded records to COPY FROM STDIN.
+
+    Records are encoded lazily in batches, so the CSV is never held in memory.
+    """
     
-    # Final commit
-    db.session.commit()
+    def __init__(self, records, batch_size=1000):
+        self._records = iter(records)
+        self._batch_size = batch_size
+        self._buffer = ''
+    
+    def _fill(self):
+        out = io.StringIO()
+        writer = csv.writer(out)
+        for _, record in zip(range(self._batch_size), self._records):
+            writer.writerow([record[column] for column in COLUMNS])
+        self._buffer += out.getvalue()
+        return out.tell() > 0
+    
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            if not self._fill():
+                break
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+    
+
+def ingest_legislators_copy(strategy='replace', lines=None, workers=1):
+    """Bulk load with COPY FROM STDIN into a staging table, then apply it in one transaction.
+
+    ``replace`` swaps the table contents (like the ORM mode), ``merge``
+    upserts by govtrack_id and keeps existing notes.
+    """
+    stats = {'added': 0, 'skipped': 0}
+    records = read_records(lines, stats, workers)
+    if records is None:
+        return False
+    
+    print(f"Starting COPY ingestion ({strategy})...")
+    start = time.perf_counter()
+    column_list = ', '.join(COLUMNS)
+    
+    # Raw DB-API cursor for copy_expert; closed on the way out, the session's
+    # connection and transaction stay open for the commit below. A COPY that
+    # fails mid-stream (dropped download, bad row) rolls everything back.
+    try:
+        with db.session.connection().connection.cursor() as cursor:
+            cursor.execute("CREATE TEMP TABLE legislators_staging (LIKE legislators INCLUDING DEFAULTS) ON COMMIT DROP")
+            cursor.copy_expert(
+                f"COPY legislators_staging ({column_list}) FROM STDIN WITH (FORMAT csv)",
+                CopyStream(records)
+            )
+            copied = time.perf_counter()
+            
+            # Last occurrence wins if the CSV repeats a govtrack_id
+            staged = (f"SELECT DISTINCT ON (govtrack_id) {column_list} FROM legislators_staging "
+                      f"ORDER BY govtrack_id, ctid DESC")
+            if strategy == 'merge':
+                updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in COLUMNS if column != 'govtrack_id')
+                cursor.execute(f"INSERT INTO legislators ({column_list}) {staged} "
+                               f"ON CONFLICT (govtrack_id) DO UPDATE SET {updates}")
+            else:
+                cursor.execute("DELETE FROM legislators")
+                cursor.execute(f"INSERT INTO legislators ({column_list}) {staged}")
+            written = cursor.rowcount
+        
+        version = bump_dataset_version()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    invalidate_all_responses()
+    elapsed = time.perf_counter() - start
     
     print(f"\nData ingestion completed!")
-    print(f"Legislators added: {legislators_added}")
-    print(f"Legislators skipped: {legislators_skipped}")
+    print(f"Legislators staged: {stats['added']} (COPY took {copied - start:.2f}s)")
+    print(f"Legislators written: {written}")
+    print(f"Legislators skipped: {stats['skipped']}")
+    print(f"Throughput: {stats['added'] / elapsed:,.0f} rows/s over {elapsed:.2f}s")
+    print(f"Dataset version bumped to {version}")
     
     return True
 
+def ingest_legislators_diff(lines=None, workers=1):
+    """Write only the rows that changed since the last load.
+
+    Incoming rows are hashed and compared with hashes of the stored rows, so
+    only inserts, updates and deletes are emitted and notes are never
+    touched. The dataset version is bumped only if something changed.
+    Returns the set of changed govtrack_ids, or None on failure.
+    """
+    stats = {'added': 0, 'skipped': 0}
+    records = read_records(lines, stats, workers)
+    if records is None:
+        return None
+    
+    print("Starting differential ingestion...")
+    start = time.perf_counter()
+    
+    table = Legislator.__table__
+    stored = db.session.query(*[table.c[column] for column in COLUMNS])
+    stored_hashes = {}
+    stored_states = {}
+    for row in stored:
+        stored_hashes[row.govtrack_id] = record_hash(row._asdict())
+        stored_states[row.govtrack_id] = row.state
+    # Last occurrence wins if the CSV repeats a govtrack_id
+    incoming = {record['govtrack_id']: record for record in records}
+    
+    inserts, updates, deletes = diff_records(stored_hashes, incoming)
+    
+    if inserts:
+        db.session.execute(insert(table), inserts)
+    if updates:
+        db.session.execute(
+            update(table)
+            .where(table.c.govtrack_id == bindparam('b_govtrack_id'))
+            .values({column: bindparam(column) for column in COLUMNS if column != 'govtrack_id'}),
+            [dict(record, b_govtrack_id=record['govtrack_id']) for record in updates]
+        )
+    if deletes:
+        db.session.execute(table.delete().where(table.c.govtrack_id.in_(deletes)))
+    
+    changed = {record['govtrack_id'] for record in inserts + updates} | set(deletes)
+    if changed:
+        version = bump_dataset_version()
+        print(f"Dataset version bumped to {version}")
+    db.session.commit()
+    if changed and response_cache is not None:
+        states = {stored_states[govtrack_id] for govtrack_id in changed if govtrack_id in stored_states}
+        states.update(record['state'] for record in inserts + updates)
+        response_cache.invalidate_legislators(changed, states)
+    
+    print(f"\nData ingestion completed in {time.perf_counter() - start:.2f}s!")
+    print(f"Legislators inserted: {len(inserts)}")
+    print(f"Legislators updated: {len(updates)}")
+    print(f"Legislators deleted: {len(deletes)}")
+    print(f"Legislators unchanged: {len(incoming) - len(inserts) - len(updates)}")
+    print(f"Legislators skipped: {stats['skipped']}")
+    
+    return changed
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load legislators-current.csv into the legislators table")
+    parser.add_argument('--mode', choices=['orm', 'copy', 'diff'], default=os.environ.get('INGEST_MODE', 'orm'),
+                        help="orm: row-by-row inserts; copy: bulk COPY FROM STDIN via a staging table; "
+                             "diff: write only changed rows and keep notes")
+    parser.add_argument('--strategy', choices=['replace', 'merge'], default='replace',
+                        help="copy mode only: replace the table or upsert and keep notes")
+    parser.add_argument('--stream', action='store_true',
+                        help="stream LEGISLATORS_CSV_URL straight into the pipeline (conditional GET, no local file)")
+    parser.add_argument('--force', action='store_true',
+                        help="with --stream: ignore the stored ETag/Last-Modified and always reload")
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('INGEST_WORKERS', '1')),
+                        help="validate the local CSV in byte-range shards across this many processes")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.stream and args.workers > 1:
+        parser.error("--workers needs a local file and cannot be combined with --stream")
+    return args
+
 def main():
+    args = parse_args()
     print("Starting legislators data ingestion...")
     
     try:
@@ -162,8 +331,23 @@ def main():
             # Create tables
             create_tables()
             
+            lines = validators = None
+            if args.stream:
+                lines, validators = stream_csv_lines(args.force)
+                if lines is None:
+                    print("Upstream CSV not modified since the last load, nothing to do")
+                    return True
+            
             # Ingest data
-            if ingest_legislators():
+            if args.mode == 'copy':
+                succeeded = ingest_legislators_copy(args.strategy, lines, args.workers)
+            elif args.mode == 'diff':
+                succeeded = ingest_legislators_diff(lines, args.workers) is not None
+            else:
+                succeeded = ingest_legislators(lines, args.workers)
+            if succeeded and validators:
+                save_source_validators(validators)
+            if succeeded:
                 print("Data ingestion completed successfully!")
             else:
                 print("Data ingestion failed!")
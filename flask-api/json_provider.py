@@ -0,0 +1,73 @@
+"""Flask JSON provider backed by orjson (optional; pip install orjson).
+
+Produces the same text as Flask's DefaultJSONProvider for what the API
+returns: sorted keys, non-ASCII escaped as \\uXXXX, compact separators (or
+two-space indents in debug mode). Dates and datetimes are encoded natively
+as ISO 8601 strings. Anything orjson can't reproduce exactly (other dumps
+options, non-string keys, integers over 64 bits, floats it formats
+differently) goes through the stdlib.
+"""
+import re
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# json.dumps(ensure_ascii=True) escapes DEL and everything above it; orjson
+# already escapes control characters the same way
+UNESCAPED = re.compile('[\x7f-\U0010ffff]')
+EXPONENT = re.compile('e[-0-9]')
+
+
+def escape_char(match):
+    code = ord(match.group())
+    if code < 0x10000:
+        return '\\u{0:04x}'.format(code)
+    code -= 0x10000
+    return '\\u{0:04x}\\u{1:04x}'.format(0xd800 | (code >> 10), 0xdc00 | (code & 0x3ff))
+
+
+def float_mismatch(text):
+    """Whether text may hold a float orjson writes differently from repr()
+    (1e-7 vs 1e-07, 1e16 vs 1e+16, 0.00001 vs 1e-05)"""
+    if '0.0000' in text:
+        return True
+    # A bare 'e' regex scans far faster than one that also matches the digit before it
+    return any(text[match.start() - 1:match.start()].isdigit() for match in EXPONENT.finditer(text))
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider that encodes with orjson when it can"""
+
+    def default(self, o):
+        if isinstance(o, date):
+            return o.isoformat()
+        return super().default(o)
+
+    def orjson_option(self, kwargs):
+        """orjson option matching these json.dumps arguments, or None if there isn't one"""
+        if orjson is None or not self.sort_keys or set(kwargs) - {'separators', 'indent'}:
+            return None
+        if kwargs.get('indent') is None:
+            return orjson.OPT_SORT_KEYS if kwargs.get('separators') == (',', ':') else None
+        if kwargs['indent'] == 2 and kwargs.get('separators') in (None, (',', ': ')):
+            return orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2
+        return None
+
+    def dumps(self, obj, **kwargs):
+        option = self.orjson_option(kwargs)
+        if option is None:
+            return super().dumps(obj, **kwargs)
+        try:
+            text = orjson.dumps(obj, default=self.default, option=option).decode()
+        except orjson.JSONEncodeError:
+            return super().dumps(obj, **kwargs)
+        if float_mismatch(text):
+            return super().dumps(obj, **kwargs)
+        if self.ensure_ascii and (not text.isascii() or '\x7f' in text):
+            text = UNESCAPED.sub(escape_char, text)
+        return text
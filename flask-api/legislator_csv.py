@@ -0,0 +1,59 @@
+"""Flask's side of the CSV ingest: rows become dicts keyed by COLUMNS (the
+shared reading and validation code is in legislators_common.legislator_csv)"""
+from legislators_common.legislator_csv import InvalidRow, parse_date, row_hash
+
+# Columns written by the ingesters, in table order (notes is never ingested)
+COLUMNS = (
+    'govtrack_id', 'first_name', 'last_name', 'birthday', 'gender', 'type',
+    'state', 'district', 'party', 'url'
+)
+
+def validate_row(row):
+    """Validate and convert one csv.DictReader row into a dict keyed by COLUMNS"""
+    try:
+        govtrack_id = int(row.get('govtrack_id') or 0)
+    except ValueError as e:
+        raise InvalidRow(f"Error processing row: {e}")
+    if not govtrack_id:
+        raise InvalidRow("Skipping row: Missing govtrack_id")
+
+    record = {
+        'govtrack_id': govtrack_id,
+        'first_name': (row.get('first_name') or '').strip(),
+        'last_name': (row.get('last_name') or '').strip(),
+        'gender': (row.get('gender') or '').strip(),
+        'type': (row.get('type') or '').strip(),
+        'state': (row.get('state') or '').strip(),
+        'district': (row.get('district') or '').strip() or None,
+        'party': (row.get('party') or '').strip(),
+        'url': (row.get('url') or '').strip() or None,
+    }
+
+    # Validate required fields
+    if not all([record['first_name'], record['last_name'], record['gender'],
+                record['type'], record['state'], record['party']]):
+        raise InvalidRow(f"Skipping legislator {govtrack_id}: Missing required fields")
+
+    # Parse birthday
+    record['birthday'] = parse_date((row.get('birthday') or '').strip())
+    if not record['birthday']:
+        raise InvalidRow(f"Skipping legislator {govtrack_id}: Invalid birthday")
+
+    return record
+
+def record_hash(record):
+    """Stable hash of the ingested columns of a record (notes are never hashed)"""
+    return row_hash([record[column] for column in COLUMNS])
+
+def diff_records(stored_hashes, incoming):
+    """Split incoming records (govtrack_id -> record) into inserts, updates and deletes
+    against the hashes of the stored rows (govtrack_id -> hash)"""
+    inserts, updates = [], []
+    for govtrack_id, record in incoming.items():
+        stored = stored_hashes.get(govtrack_id)
+        if stored is None:
+            inserts.append(record)
+        elif stored != record_hash(record):
+            updates.append(record)
+    deletes = [govtrack_id for govtrack_id in stored_hashes if govtrack_id not in incoming]
+    return inserts, updates, deletes
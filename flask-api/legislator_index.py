@@ -0,0 +1,73 @@
+import re
+from collections import defaultdict
+
+
+def like_to_regex(pattern):
+    """Compile a SQL LIKE pattern (backslash escapes) into an equivalent regex"""
+    parts = []
+    chars = iter(pattern)
+    for char in chars:
+        if char == '\\':
+            parts.append(re.escape(next(chars, '\\')))
+        elif char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts), re.DOTALL)
+
+
+class LegislatorIndex:
+    """Inverted indexes over a list of serialized legislators.
+
+    Filters are answered by intersecting id sets instead of scanning rows.
+    Party lookups keep the ILIKE '%x%' semantics of the SQL path: the pattern
+    is matched against the handful of distinct lower-cased party values and
+    the matching id sets are unioned.
+    """
+
+    MAX_CACHED_PATTERNS = 1024
+
+    def __init__(self, rows):
+        self.by_state = defaultdict(set)
+        self.by_party = defaultdict(set)
+        self.by_type = defaultdict(set)
+        self.all_ids = set()
+        for row in rows:
+            govtrack_id = row['govtrack_id']
+            self.all_ids.add(govtrack_id)
+            self.by_state[row['state']].add(govtrack_id)
+            self.by_party[row['party'].lower()].add(govtrack_id)
+            self.by_type[row['type']].add(govtrack_id)
+        self._party_matches = {}
+
+    def party_ids(self, party):
+        """Ids whose party matches ``ILIKE '%<party>%'``"""
+        key = party.lower()
+        ids = self._party_matches.get(key)
+        if ids is None:
+            regex = like_to_regex(f'%{key}%')
+            ids = set()
+            for value, value_ids in self.by_party.items():
+                if regex.fullmatch(value):
+                    ids |= value_ids
+            if len(self._party_matches) >= self.MAX_CACHED_PATTERNS:
+                self._party_matches.clear()
+            self._party_matches[key] = ids
+        return ids
+
+    def filter(self, state=None, party=None, type=None):
+        """Return the sorted ids matching every given filter"""
+        candidates = []
+        if state:
+            candidates.append(self.by_state.get(state, set()))
+        if type:
+            candidates.append(self.by_type.get(type, set()))
+        if party:
+            candidates.append(self.party_ids(party))
+
+        if not candidates:
+            return sorted(self.all_ids)
+        candidates.sort(key=len)
+        return sorted(candidates[0].intersection(*candidates[1:]))
@@ -0,0 +1,82 @@
+"""Per-request metrics, exposed in the Prometheus text format on /metrics.
+
+For every route: response time, database queries and the time spent in them
+(SQLAlchemy cursor events), and time spent encoding JSON. The histograms and
+the exposition format are in ``legislators_common.metrics``; this module
+hooks them into Flask.
+"""
+import time
+from functools import wraps
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from legislators_common.metrics import request_metrics
+
+
+def current_request():
+    """Counters of the request being handled, or None outside one"""
+    return g.get('metrics') if has_request_context() else None
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    state = current_request()
+    if state is not None:
+        state['db_queries'] += 1
+        state['db_time'] += time.perf_counter() - started
+
+
+def handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    if exception_context.connection is not None:
+        started = exception_context.connection.info.get('query_started')
+        if started:
+            started.pop()
+
+
+def timed_dumps(dumps):
+    """Wrap a JSON provider's ``dumps`` to add its time to the current request"""
+    @wraps(dumps)
+    def wrapper(obj, **kwargs):
+        state = current_request()
+        if state is None:
+            return dumps(obj, **kwargs)
+        started = time.perf_counter()
+        try:
+            return dumps(obj, **kwargs)
+        finally:
+            state['serialization'] = (state['serialization'] or 0.0) + time.perf_counter() - started
+    return wrapper
+
+
+def init_app(app, metrics=request_metrics):
+    """Record every request of ``app`` in ``metrics``.
+
+    Streamed bodies are produced after the response is recorded, so their
+    duration covers the time to the first byte only.
+    """
+    event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', after_cursor_execute)
+    event.listen(Engine, 'handle_error', handle_error)
+    app.json.dumps = timed_dumps(app.json.dumps)
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics = {'started': time.perf_counter(), 'db_queries': 0, 'db_time': 0.0, 'serialization': None}
+
+    @app.after_request
+    def record_request_metrics(response):
+        state = g.pop('metrics', None)
+        if state is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.record(
+                request.method, route, response.status_code, time.perf_counter() - state['started'],
+                state['db_queries'], state['db_time'], state['serialization']
+            )
+        return response
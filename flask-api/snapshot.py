@@ -0,0 +1,104 @@
+import threading
+import time
+
+from legislator_index import LegislatorIndex
+from legislators_common.age_stats import AgeStatsEngine
+
+
+class SnapshotState:
+    """Immutable view of the legislators table at a given dataset version"""
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.rows = rows
+        self.by_id = {row['govtrack_id']: row for row in rows}
+        self.index = LegislatorIndex(rows)
+
+    def filter(self, state=None, party=None, type=None):
+        """Return the rows matching the given filters, ordered by govtrack_id"""
+        if not (state or party or type):
+            return self.rows
+        return [self.by_id[govtrack_id] for govtrack_id in self.index.filter(state, party, type)]
+
+
+class LegislatorSnapshot:
+    """Per-worker cache of the serialized legislators table.
+
+    The snapshot is reloaded only when the dataset version stored in the
+    database moves on. Ingestion and the notes PATCH bump that version, so
+    every worker picks up writes made by any other process. Each reload is
+    also fed to ``age_stats``, which only applies the rows that changed.
+    """
+
+    def __init__(self, load_rows, current_version, check_interval=0.0):
+        self._load_rows = load_rows
+        self._current_version = current_version
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._state = None
+        self._checked_at = 0.0
+        self.age_stats = AgeStatsEngine()
+
+    def get(self):
+        """Return the current SnapshotState, reloading it if the version changed"""
+        state = self._state
+        now = time.monotonic()
+        if state is not None and now - self._checked_at < self._check_interval:
+            return state
+
+        version = self._current_version()
+        if version is None:
+            # Version table unavailable: never serve possibly stale data
+            return SnapshotState(None, self._load_rows())
+
+        self._checked_at = now
+        if state is not None and state.version == version:
+            return state
+
+        with self._lock:
+            state = self._state
+            if state is None or state.version != version:
+                state = SnapshotState(version, self._load_rows())
+                self.age_stats.sync(state.rows)
+                self._state = state
+        return state
+
+    def get_with_age_stats(self, today=None):
+        """Return (SnapshotState, age stats) computed from the same rows.
+
+        ``age_stats`` is synced to whatever state is current under the lock,
+        so the pair is read there, and every id in the stats has a row in the
+        returned state. A state that was never synced (version unreadable,
+        or dropped by invalidate()) gets its stats from a throwaway engine.
+        """
+        state = self.get()
+        if state.version is not None:
+            with self._lock:
+                if self._state is not None:
+                    state = self._state
+                    stats = self.age_stats.stats(today)
+                    if stats is None or {stats['youngest'][0], stats['oldest'][0]} <= state.by_id.keys():
+                        return state, stats
+        engine = AgeStatsEngine()
+        engine.sync(state.rows)
+        return state, engine.stats(today)
+
+    def replace_rows(self, version, rows):
+        """Apply a write of ``rows`` made by this worker at ``version``.
+
+        If the snapshot was current just before the write it is patched in
+        place instead of being reloaded on the next request.
+        """
+        replaced = {row['govtrack_id']: row for row in rows}
+        with self._lock:
+            state = self._state
+            if state is None or state.version != version - 1 or not replaced.keys() <= state.by_id.keys():
+                return
+            rows = [replaced.get(r['govtrack_id'], r) for r in state.rows]
+            self._state = SnapshotState(version, rows)
+            self.age_stats.sync(rows)
+
+    def invalidate(self):
+        """Drop the cached snapshot so the next get() reloads it"""
+        with self._lock:
+            self._state = None
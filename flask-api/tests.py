@@ -0,0 +1,725 @@
+"""Unit tests for the Flask API: ``python -m unittest tests`` from flask-api/.
+
+They run against TEST_DATABASE_URL, or a throwaway SQLite file when it is not
+set; tests of Postgres-only paths (COPY, AGE(), ILIKE escapes) are skipped on
+SQLite. Tables are emptied before every test, so never point TEST_DATABASE_URL
+at a database whose data you want to keep.
+"""
+import csv
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import contextmanager, redirect_stdout
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+os.environ['DATABASE_URL'] = os.environ.get('TEST_DATABASE_URL') or \
+    f'sqlite:///{tempfile.mkstemp(prefix="flask-api-tests-", suffix=".db")[1]}'
+os.environ.pop('REDIS_URL', None)
+os.environ.pop('WEATHER_PREFETCH_INTERVAL', None)
+
+import psycopg2
+import requests
+from flask import Flask, jsonify
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+import app as api
+import ingest_data
+from cache import MemoryBackend, ResponseCache, cached_response
+from legislator_csv import COLUMNS
+from legislators_common import legislator_csv, weather
+from legislators_common.age_stats import AgeStatsEngine
+from legislators_common.weather import WeatherCache, WeatherPrefetcher
+from snapshot import LegislatorSnapshot
+
+POSTGRES = os.environ['DATABASE_URL'].startswith('postgresql')
+
+
+def legislator_row(govtrack_id, **overrides):
+    row = {
+        'govtrack_id': govtrack_id,
+        'first_name': f'First{govtrack_id}',
+        'last_name': f'Last{govtrack_id}',
+        'birthday': date(1960, 5, 17),
+        'gender': 'F',
+        'type': 'rep',
+        'state': 'CA',
+        'district': '12',
+        'party': 'Democrat',
+        'url': 'https://example.gov',
+        'notes': None,
+    }
+    row.update(overrides)
+    return row
+
+
+def fixed_date(today):
+    """``date`` subclass whose today() is pinned, for patching a module's ``date``"""
+    class FixedDate(date):
+        @classmethod
+        def today(cls):
+            return today
+    return FixedDate
+
+
+class AppTestCase(unittest.TestCase):
+    """Empty tables, fresh per-process caches and a test client for every test"""
+
+    def setUp(self):
+        context = api.app.app_context()
+        context.push()
+        self.addCleanup(context.pop)
+        api.db.create_all()
+        api.db.session.execute(text('DELETE FROM legislators'))
+        api.db.session.execute(text('DELETE FROM dataset_version'))
+        api.db.session.commit()
+        api.legislator_snapshot.invalidate()
+        api.dataset_validators.invalidate()
+        self.client = api.app.test_client()
+
+    def add_legislators(self, rows):
+        """Insert rows and bump the dataset version, as an ingest in another process would"""
+        api.db.session.add_all(api.Legislator(**row) for row in rows)
+        api.bump_dataset_version()
+        api.db.session.commit()
+
+    def count_queries(self, fragment):
+        """List that collects the statements containing ``fragment`` until the test ends"""
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if fragment in statement:
+                statements.append(statement)
+
+        event.listen(api.db.engine, 'before_cursor_execute', record)
+        self.addCleanup(event.remove, api.db.engine, 'before_cursor_execute', record)
+        return statements
+
+
+class LegislatorSnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.version = 1
+        self.rows = [self.row(1), self.row(2)]
+        self.loads = 0
+
+    def row(self, govtrack_id, notes=None):
+        return {'govtrack_id': govtrack_id, 'state': 'CA', 'party': 'Democrat', 'type': 'rep', 'notes': notes}
+
+    def load_rows(self):
+        self.loads += 1
+        return [dict(row) for row in self.rows]
+
+    def snapshot(self):
+        return LegislatorSnapshot(self.load_rows, lambda: self.version)
+
+    def test_reloads_only_when_version_changes(self):
+        snapshot = self.snapshot()
+        first = snapshot.get()
+        self.assertIs(snapshot.get(), first)
+        self.assertEqual(self.loads, 1)
+
+        self.version = 2
+        self.rows.append(self.row(3))
+        second = snapshot.get()
+        self.assertEqual((second.version, len(second.rows), self.loads), (2, 3, 2))
+
+    def test_replace_rows_patches_current_snapshot(self):
+        snapshot = self.snapshot()
+        snapshot.get()
+        snapshot.replace_rows(2, [self.row(2, 'patched')])
+
+        self.version = 2
+        state = snapshot.get()
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(state.by_id[2]['notes'], 'patched')
+
+    def test_replace_rows_ignores_stale_snapshot(self):
+        snapshot = self.snapshot()
+        snapshot.get()
+        # Another process wrote version 2; our write is version 3
+        snapshot.replace_rows(3, [self.row(2, 'patched')])
+
+        self.version = 3
+        snapshot.get()
+        self.assertEqual(self.loads, 2)
+
+    def test_unreadable_version_loads_fresh_rows_every_time(self):
+        snapshot = self.snapshot()
+        snapshot.get()
+        self.version = None
+        self.rows[0]['notes'] = 'changed elsewhere'
+
+        state = snapshot.get()
+        self.assertIsNone(state.version)
+        self.assertEqual(state.by_id[1]['notes'], 'changed elsewhere')
+        snapshot.get()
+        self.assertEqual(self.loads, 3)
+
+
+    def test_age_stats_match_rows_of_the_same_state(self):
+        self.rows = [dict(self.row(1), birthday=date(1950, 1, 1)), dict(self.row(2), birthday=date(1970, 1, 1))]
+        snapshot = self.snapshot()
+        snapshot.get()
+        # Unreadable version: the rows are reloaded but the shared engine is not resynced
+        self.version = None
+        self.rows = [dict(self.row(3), birthday=date(1980, 1, 1))]
+
+        state, stats = snapshot.get_with_age_stats(date(2000, 1, 1))
+        self.assertEqual((stats['youngest'], stats['oldest']), ((3, 20), (3, 20)))
+        self.assertEqual(list(state.by_id), [3])
+
+
+class AgeStatsEngineTests(unittest.TestCase):
+    def member(self, govtrack_id, birthday, state='CA', party='Democrat'):
+        return {'govtrack_id': govtrack_id, 'birthday': birthday, 'state': state, 'party': party}
+
+    def stats(self, rows, today):
+        engine = AgeStatsEngine()
+        engine.sync(rows)
+        return engine.stats(today)
+
+    def test_leap_day_birthday_ages_on_march_first_in_common_years(self):
+        rows = [self.member(1, date(1960, 2, 29))]
+        self.assertEqual(self.stats(rows, date(2001, 2, 28))['max_age'], 40)
+        self.assertEqual(self.stats(rows, date(2001, 3, 1))['max_age'], 41)
+        self.assertEqual(self.stats(rows, date(2004, 2, 29))['max_age'], 44)
+
+    def test_average_counts_birthdays_not_yet_reached(self):
+        rows = [self.member(1, date(1960, 6, 1)), self.member(2, date(1970, 1, 1))]
+        # 39 (birthday still ahead) and 30
+        self.assertEqual(self.stats(rows, date(2000, 3, 1))['average_age'], 34.5)
+
+    def test_percentiles_interpolate_between_ages(self):
+        rows = [self.member(i, date(2000 - age, 1, 1)) for i, age in enumerate((30, 40, 50, 60, 70), 1)]
+        stats = self.stats(rows, date(2000, 6, 1))
+        self.assertEqual(stats['median_age'], 50)
+        self.assertEqual(stats['percentiles'], {'p10': 34.0, 'p25': 40.0, 'p75': 60.0, 'p90': 66.0})
+
+        stats = self.stats(rows[:4], date(2000, 6, 1))
+        self.assertEqual(stats['median_age'], 45.0)
+        self.assertEqual(stats['percentiles']['p25'], 37.5)
+
+    def test_ties_go_to_the_lowest_govtrack_id(self):
+        rows = [self.member(i, birthday) for i, birthday in
+                ((5, date(1950, 1, 1)), (3, date(1950, 1, 1)), (9, date(1980, 1, 1)), (4, date(1980, 1, 1)))]
+        stats = self.stats(rows, date(2000, 6, 1))
+        self.assertEqual((stats['oldest'], stats['youngest']), ((3, 50), (4, 20)))
+
+    def test_rows_without_birthday_are_ignored(self):
+        engine = AgeStatsEngine()
+        self.assertEqual(engine.sync([self.member(1, None)]), 0)
+        self.assertIsNone(engine.stats(date(2000, 1, 1)))
+        engine.sync([self.member(1, None), self.member(2, '1970-01-01')])
+        self.assertEqual(engine.stats(date(2000, 1, 1))['count'], 1)
+
+    def test_resync_applies_updates_and_deletes(self):
+        engine = AgeStatsEngine()
+        today = date(2000, 6, 1)
+        rows = [self.member(1, date(1950, 1, 1)), self.member(2, date(1960, 1, 1), state='TX', party='Republican'),
+                self.member(3, date(1970, 1, 1))]
+        self.assertEqual(engine.sync(rows), 3)
+        self.assertEqual(engine.sync(rows), 0)
+        first = engine.stats(today)
+
+        rows[1] = self.member(2, date(1990, 1, 1), state='TX', party='Republican')
+        del rows[0]
+        self.assertEqual(engine.sync(rows), 2)
+        stats = engine.stats(today)
+        self.assertIsNot(stats, first)
+        self.assertEqual((stats['count'], stats['oldest'], stats['youngest']), (2, (3, 30), (2, 10)))
+        self.assertEqual(stats['by_state']['CA']['count'], 1)
+        self.assertEqual(stats['by_party']['Republican']['max_age'], 10)
+
+        # Moving the last member out of a group drops the group
+        rows[1] = self.member(3, date(1970, 1, 1), state='TX')
+        engine.sync(rows)
+        self.assertEqual(list(engine.stats(today)['by_state']), ['TX'])
+
+
+class WeatherPrefetcherTests(unittest.TestCase):
+    def test_not_started_on_import(self):
+        code = 'import app; print(app.weather_prefetcher.running)'
+        env = dict(os.environ, WEATHER_PREFETCH_INTERVAL='60', WEATHER_API_KEY='key',
+                   WEATHER_API_URL='http://127.0.0.1:9')
+        output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), 'False')
+
+    def test_lock_holder_is_the_only_prefetching_process(self):
+        lock_path = os.path.join(tempfile.mkdtemp(), 'prefetch.lock')
+        prefetcher = WeatherPrefetcher(WeatherCache(lambda key: {}), ['Austin'], interval=60, rate=0)
+        self.addCleanup(prefetcher.stop)
+        self.assertTrue(prefetcher.start(lock_path=lock_path))
+        self.addCleanup(lambda: weather._held_locks.pop().close())
+        self.assertTrue(prefetcher.running)
+
+        # Another worker process finds the lock taken and leaves prefetching to us
+        code = f'from legislators_common import weather; print(weather.hold_lock({lock_path!r}))'
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), 'False')
+
+
+class SnapshotWiringTests(AppTestCase):
+    def test_list_follows_dataset_version(self):
+        self.add_legislators([legislator_row(1), legislator_row(2)])
+        self.assertEqual(len(self.client.get('/api/legislators').get_json()), 2)
+
+        # A write by another process is only visible through the version bump
+        self.add_legislators([legislator_row(3)])
+        self.assertEqual([row['govtrack_id'] for row in self.client.get('/api/legislators').get_json()], [1, 2, 3])
+
+    def test_notes_patch_updates_snapshot_in_place(self):
+        self.add_legislators([legislator_row(1), legislator_row(2)])
+        self.client.get('/api/legislators')
+
+        with mock.patch.object(api.legislator_snapshot, '_load_rows', wraps=api.load_legislator_rows) as load:
+            self.client.patch('/api/legislators/2/notes', json={'note': 'hello'})
+            rows = self.client.get('/api/legislators').get_json()
+        self.assertEqual(load.call_count, 0)
+        self.assertEqual(rows[1]['notes'], 'hello')
+
+    def test_unreadable_version_serves_rows_from_database(self):
+        self.add_legislators([legislator_row(1)])
+        self.client.get('/api/legislators')
+        api.db.session.execute(text("UPDATE legislators SET notes = 'direct'"))
+        api.db.session.commit()
+
+        with mock.patch.object(api, 'read_dataset_version_row', return_value=None):
+            rows = self.client.get('/api/legislators').get_json()
+        self.assertEqual(rows[0]['notes'], 'direct')
+
+    def test_engine_age_stats_with_unreadable_version(self):
+        self.add_legislators([legislator_row(1)])
+        self.client.get('/api/stats/age')
+        api.db.session.execute(text('DELETE FROM legislators'))
+        api.db.session.commit()
+        self.add_legislators([legislator_row(2, birthday=date(1980, 1, 1))])
+
+        with mock.patch.object(api, 'read_dataset_version_row', return_value=None):
+            response = self.client.get('/api/stats/age?backend=engine')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['youngest_legislator']['legislator']['govtrack_id'], 2)
+
+    def test_one_version_read_per_request(self):
+        self.add_legislators([legislator_row(1)])
+        reads = self.count_queries('dataset_version')
+
+        response = self.client.get('/api/legislators')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(reads), 1)
+
+
+class DatabaseHealthTests(AppTestCase):
+    def test_reports_pool_and_server_counts(self):
+        response = self.client.get('/health/db')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['status'], 'healthy')
+        self.assertIn('class', data['pool'])
+        if POSTGRES:
+            self.assertGreaterEqual(data['server']['max_connections'], data['server']['connections'])
+        else:
+            # No pg_stat_activity to read: healthy, without server counts
+            self.assertIsNone(data['server'])
+
+    def test_unreachable_database_is_unhealthy(self):
+        with mock.patch.object(api.db.session, 'execute', side_effect=OperationalError('SELECT 1', {}, 'down')):
+            response = self.client.get('/health/db')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()['status'], 'unhealthy')
+
+
+class AgeStatsBackendTests(AppTestCase):
+    # Tied oldest and youngest birthdays (inserted highest id first), a leap day and no birthday at all
+    BIRTHDAYS = {5: date(1950, 3, 1), 2: date(1950, 3, 1), 3: date(1972, 2, 29), 8: date(1980, 2, 28),
+                 6: date(1980, 2, 28), 9: None, 10: None}
+    DAYS = [date(2001, 2, 28), date(2001, 3, 1), date(2004, 2, 28), date(2004, 2, 29), date(2004, 3, 1)]
+
+    @unittest.skipUnless(POSTGRES, 'the sql backend uses Postgres AGE()')
+    def test_sql_and_python_backends_agree(self):
+        # Rolled back with the rows, so the schema is left as it was
+        self.addCleanup(api.db.session.rollback)
+        api.db.session.execute(text('ALTER TABLE legislators ALTER COLUMN birthday DROP NOT NULL'))
+        api.db.session.add_all(api.Legislator(**legislator_row(i, birthday=birthday))
+                               for i, birthday in self.BIRTHDAYS.items())
+        api.db.session.flush()
+
+        for today in self.DAYS:
+            with self.subTest(today=today), mock.patch.object(api, 'date', fixed_date(today)):
+                sql = api.age_stats_from_sql().get_json()
+                python = api.age_stats_from_python().get_json()
+                self.assertEqual(sql, python)
+                self.assertEqual((sql['oldest_legislator']['legislator']['govtrack_id'],
+                                  sql['youngest_legislator']['legislator']['govtrack_id']), (2, 6))
+
+
+class ListParamsTests(AppTestCase):
+    IDS = [3, 7, 10, 12, 20]
+
+    def setUp(self):
+        super().setUp()
+        self.add_legislators([legislator_row(i, state=('CA', 'TX')[i % 2]) for i in self.IDS])
+
+    @contextmanager
+    def backend(self, snapshot):
+        """Serve the list from the snapshot or from SQL inside the block"""
+        with self.subTest(snapshot=snapshot), mock.patch.dict(api.app.config, LEGISLATORS_SNAPSHOT=snapshot):
+            yield
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        return response
+
+    def ids(self, url):
+        return [row['govtrack_id'] for row in self.get(url).get_json()]
+
+    def next_link(self, response):
+        match = re.fullmatch(r'<(.+)>; rel="next"', response.headers.get('Link', ''))
+        return match and match.group(1)
+
+    def test_after_boundaries(self):
+        for snapshot in (True, False):
+            with self.backend(snapshot):
+                self.assertEqual(self.ids('/api/legislators?after=0'), self.IDS)
+                self.assertEqual(self.ids('/api/legislators?after=7'), [10, 12, 20])
+                self.assertEqual(self.ids('/api/legislators?after=8'), [10, 12, 20])
+                self.assertEqual(self.ids('/api/legislators?after=20'), [])
+                self.assertEqual(self.ids('/api/legislators?after=-5&limit=2'), [3, 7])
+
+    def test_limit_boundaries(self):
+        for snapshot in (True, False):
+            with self.backend(snapshot):
+                self.assertEqual(self.ids('/api/legislators?limit=1'), [3])
+                self.assertEqual(self.ids(f'/api/legislators?limit={api.MAX_PAGE_SIZE}'), self.IDS)
+                invalid = ('limit=0', f'limit={api.MAX_PAGE_SIZE + 1}', 'limit=-1', 'limit=two', 'after=x', 'after=1.5')
+                for query in invalid:
+                    response = self.client.get(f'/api/legislators?{query}')
+                    self.assertEqual(response.status_code, 400, query)
+                    self.assertIn('after must be an integer', response.get_json()['error'])
+
+    def test_link_header_walks_every_page(self):
+        for snapshot in (True, False):
+            with self.backend(snapshot):
+                url, pages = '/api/legislators?state=CA&limit=2&fields=last_name', []
+                while url:
+                    response = self.get(url)
+                    pages.append(response.get_json())
+                    url = self.next_link(response)
+                self.assertEqual(pages, [[{'last_name': 'Last10'}, {'last_name': 'Last12'}], [{'last_name': 'Last20'}]])
+
+    def test_full_last_page_links_to_an_empty_one(self):
+        for snapshot in (True, False):
+            with self.backend(snapshot):
+                response = self.get('/api/legislators?limit=5')
+                self.assertEqual(self.next_link(response), '/api/legislators?limit=5&after=20')
+                response = self.get(self.next_link(response))
+                self.assertEqual(response.get_json(), [])
+                self.assertNotIn('Link', response.headers)
+
+                self.assertNotIn('Link', self.get('/api/legislators').headers)
+
+    def test_fields_projection(self):
+        for snapshot in (True, False):
+            with self.backend(snapshot):
+                rows = self.get('/api/legislators?fields= state ,govtrack_id,&limit=1').get_json()
+                self.assertEqual(rows, [{'state': 'TX', 'govtrack_id': 3}])
+
+                rows = self.get('/api/legislators?fields=birthday,notes').get_json()
+                self.assertEqual(rows[0], {'birthday': '1960-05-17', 'notes': None})
+
+    def test_unknown_fields_are_rejected(self):
+        for query in ('fields=state,salary', 'fields=age', 'fields=State'):
+            response = self.client.get(f'/api/legislators?{query}')
+            self.assertEqual(response.status_code, 400, query)
+            self.assertTrue(response.get_json()['error'].startswith('Unknown fields: '))
+        response = self.client.get('/api/legislators?fields=salary,bonus')
+        self.assertEqual(response.get_json()['error'], 'Unknown fields: salary, bonus')
+
+
+class StreamingListTests(AppTestCase):
+    QUERIES = ['', 'state=CA', 'fields=last_name,state', 'state=TX&fields=party&after=2&limit=3', 'after=99']
+
+    def setUp(self):
+        super().setUp()
+        self.add_legislators([legislator_row(i, state=('CA', 'TX')[i % 2]) for i in range(1, 8)])
+        # Several chunks even for this small table
+        patcher = mock.patch.object(api, 'STREAM_BATCH_SIZE', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sort(self, rows):
+        # Streams are read in table order unless paginated
+        return sorted(rows, key=lambda row: json.dumps(row, sort_keys=True))
+
+    def expected(self, query):
+        return self.sort(self.client.get(f'/api/legislators?{query}').get_json())
+
+    def test_ndjson_is_one_object_per_line(self):
+        for query in self.QUERIES:
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/legislators?{query}', headers={'Accept': 'application/x-ndjson'})
+                self.assertTrue(response.is_streamed)
+                self.assertEqual(response.mimetype, 'application/x-ndjson')
+                body = response.get_data(as_text=True)
+                self.assertTrue(body == '' or body.endswith('\n'))
+                rows = [json.loads(line) for line in body.splitlines()]
+                self.assertTrue(all(isinstance(row, dict) for row in rows))
+                self.assertEqual(self.sort(rows), self.expected(query))
+
+    def test_stream_param_returns_a_json_array(self):
+        for query in self.QUERIES:
+            for stream in ('1', 'true'):
+                with self.subTest(query=query, stream=stream):
+                    response = self.client.get(f'/api/legislators?stream={stream}&{query}')
+                    self.assertTrue(response.is_streamed)
+                    self.assertEqual(response.mimetype, 'application/json')
+                    self.assertEqual(self.sort(response.get_json()), self.expected(query))
+
+    def test_paginated_stream_keeps_page_order(self):
+        response = self.client.get('/api/legislators?after=1&limit=4', headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual([json.loads(line)['govtrack_id'] for line in response.get_data(as_text=True).splitlines()],
+                         [2, 3, 4, 5])
+
+
+
+class ConditionalResponseTests(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_legislators([legislator_row(1), legislator_row(2)])
+
+    def test_list_varies_on_accept(self):
+        response = self.client.get('/api/legislators')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Accept', response.vary)
+        not_modified = self.client.get('/api/legislators', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertIn('Accept', not_modified.vary)
+
+    def test_ndjson_is_not_answered_with_the_json_etag(self):
+        response = self.client.get('/api/legislators', headers={'Accept': 'application/json, application/x-ndjson;q=0.1'})
+        self.assertEqual(response.mimetype, 'application/json')
+        ndjson = self.client.get('/api/legislators', headers={
+            'Accept': 'application/x-ndjson', 'If-None-Match': response.headers['ETag']})
+        self.assertEqual(ndjson.status_code, 200)
+        self.assertEqual(ndjson.mimetype, 'application/x-ndjson')
+
+    def test_errors_have_no_validators(self):
+        for path in ('/api/legislators/99', '/api/legislators?limit=0'):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertIn(response.status_code, (400, 404))
+                self.assertNotIn('ETag', response.headers)
+                self.assertNotIn('Last-Modified', response.headers)
+
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(MemoryBackend(), ttl=60)
+        self.calls = 0
+        app = Flask(__name__)
+
+        @app.route('/rows')
+        @cached_response(self.cache, lambda: ['rows'])
+        def rows():
+            self.calls += 1
+            response = jsonify([{'n': self.calls}])
+            response.headers['Link'] = '</rows?after=1>; rel="next"'
+            response.headers['X-Request-Id'] = str(self.calls)
+            return response
+
+        self.client = app.test_client()
+
+    def test_hit_replays_body_and_headers(self):
+        first = self.client.get('/rows')
+        second = self.client.get('/rows')
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.get_data(), first.get_data())
+        self.assertEqual(second.mimetype, 'application/json')
+        self.assertEqual(second.headers['Link'], first.headers['Link'])
+        # Only the headers that describe the body are kept
+        self.assertNotIn('X-Request-Id', second.headers)
+
+    def test_entries_are_json_and_bytes(self):
+        self.client.get('/rows')
+        [(value, _)] = [entry for key, entry in self.cache.client._data.items() if ':response:' in key]
+        meta, _, body = value.partition(b'\n')
+        self.assertEqual(json.loads(meta)['status'], 200)
+        self.assertEqual(json.loads(body), [{'n': 1}])
+
+    def test_bump_makes_entries_unreachable(self):
+        self.client.get('/rows')
+        self.cache.bump(['rows'])
+        self.client.get('/rows')
+        self.assertEqual(self.calls, 2)
+
+
+def csv_lines(rows):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue().splitlines(keepends=True)
+
+
+class CSVHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the upstream CSV host"""
+    body = b''
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StreamingCSVTests(unittest.TestCase):
+    def setUp(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), CSVHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = f'http://127.0.0.1:{server.server_port}/legislators-current.csv'
+
+    def test_quoted_multi_line_fields_match_the_file(self):
+        lines = csv_lines([
+            legislator_row(1, first_name='Zoë', last_name='Line\r\nbreak'),
+            legislator_row(2, last_name='Bare\rreturn\nand newline'),
+            legislator_row(3, last_name='Not\u2028a\x85break\x0cat all'),
+            legislator_row(4),
+        ])
+        CSVHandler.body = ''.join(lines).encode('utf-8')
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(os.unlink, path)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(CSVHandler.body)
+
+        stats = {'added': 0, 'skipped': 0}
+        from_file = list(ingest_data.read_valid_rows(ingest_data.read_lines(path), stats))
+        self.assertEqual([record['last_name'] for record in from_file],
+                         ['Line\r\nbreak', 'Bare\rreturn\nand newline', 'Not\u2028a\x85break\x0cat all', 'Last4'])
+        # Small reads split the multi-byte characters and \r\n pairs across chunks
+        for chunk_size in (1, 2, 3, 7, 64 * 1024):
+            with self.subTest(chunk_size=chunk_size):
+                with mock.patch.object(legislator_csv, 'FETCH_CHUNK_SIZE', chunk_size):
+                    streamed, _ = legislator_csv.fetch_csv_lines(self.url)
+                    self.assertEqual(list(ingest_data.read_valid_rows(streamed, stats)), from_file)
+
+
+class OrmIngestTests(AppTestCase):
+    def test_failed_download_keeps_the_old_rows(self):
+        self.add_legislators([legislator_row(1), legislator_row(2)])
+        version = api.get_dataset_version()
+
+        def dropped_stream():
+            yield from csv_lines([legislator_row(i) for i in range(10, 260)])
+            raise requests.exceptions.ChunkedEncodingError('Connection broken')
+
+        with ingest_data.app.app_context(), redirect_stdout(io.StringIO()):
+            with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+                ingest_data.ingest_legislators(dropped_stream())
+        api.db.session.rollback()
+        stored = api.Legislator.query.order_by('govtrack_id')
+        self.assertEqual([legislator.govtrack_id for legislator in stored], [1, 2])
+        self.assertEqual(api.get_dataset_version(), version)
+
+    def test_replaces_the_table_in_one_commit(self):
+        self.add_legislators([legislator_row(1, notes='dropped')])
+        with ingest_data.app.app_context(), redirect_stdout(io.StringIO()):
+            self.assertTrue(ingest_data.ingest_legislators(csv_lines([legislator_row(i) for i in range(2, 252)])))
+        api.db.session.rollback()
+        self.assertEqual(api.Legislator.query.count(), 250)
+        self.assertIsNone(api.db.session.get(api.Legislator, 1))
+
+
+@unittest.skipUnless(POSTGRES, 'COPY needs Postgres')
+class CopyIngestTests(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_legislators([legislator_row(1, notes='keep me'), legislator_row(2), legislator_row(3)])
+
+    def ingest(self, strategy, rows):
+        with ingest_data.app.app_context(), redirect_stdout(io.StringIO()):
+            self.assertTrue(ingest_data.ingest_legislators_copy(strategy, csv_lines(rows)))
+        # Start a new transaction to see the ingester's commit
+        api.db.session.rollback()
+        return {row.govtrack_id: row for row in api.Legislator.query.order_by(api.Legislator.govtrack_id)}
+
+    def test_replace_swaps_the_table(self):
+        version = api.get_dataset_version()
+        stored = self.ingest('replace', [legislator_row(1, first_name='Renamed'), legislator_row(4),
+                                         legislator_row(5, birthday='not a date')])
+        self.assertEqual(list(stored), [1, 4])
+        self.assertEqual((stored[1].first_name, stored[1].notes), ('Renamed', None))
+        self.assertEqual(api.get_dataset_version(), version + 1)
+
+    def test_merge_upserts_and_keeps_notes(self):
+        stored = self.ingest('merge', [legislator_row(1, first_name='Renamed'), legislator_row(4, first_name='Old'),
+                                       legislator_row(4, first_name='New')])
+        self.assertEqual(list(stored), [1, 2, 3, 4])
+        self.assertEqual((stored[1].first_name, stored[1].notes), ('Renamed', 'keep me'))
+        # The last occurrence of a repeated govtrack_id wins
+        self.assertEqual(stored[4].first_name, 'New')
+
+    def test_failed_copy_keeps_the_old_rows(self):
+        version = api.get_dataset_version()
+
+        def dropped_stream():
+            yield from csv_lines([legislator_row(i) for i in range(10, 2010)])
+            raise requests.exceptions.ChunkedEncodingError('Connection broken')
+
+        with ingest_data.app.app_context(), redirect_stdout(io.StringIO()):
+            # psycopg2 cancels the COPY and reports the read error
+            with self.assertRaises(psycopg2.errors.QueryCanceled):
+                ingest_data.ingest_legislators_copy('replace', dropped_stream())
+            # The session is usable again right away
+            self.assertEqual(api.Legislator.query.count(), 3)
+        self.assertEqual(api.get_dataset_version(), version)
+
+
+class LegislatorIndexTests(AppTestCase):
+    PARTIES = ['Democrat', 'Republican', 'Independent', 'Democratic-Farmer-Labor', '100% Party', 'A_B', 'AxB',
+               'Back\\slash', 'MiXeD Case']
+    PATTERNS = ['dem', 'DEM', 'Rep', '%', '_', 'i_d%', '100%', 'a_b', 'mixed c', 'e%a', 'nomatch', '']
+    # SQLite's LIKE has no escape character, so these only agree with Postgres' ILIKE
+    ESCAPED_PATTERNS = ['100\\%', 'a\\_b', 'back\\\\slash', 'back\\slash', '\\%', 'x\\']
+
+    def setUp(self):
+        super().setUp()
+        self.add_legislators([
+            legislator_row(i, party=party, state=('CA', 'TX')[i % 2], type=('rep', 'sen')[i % 3 == 0])
+            for i, party in enumerate(self.PARTIES * 2, 1)
+        ])
+
+    def assert_same_ids(self, patterns):
+        for party in patterns:
+            for state, type in ((None, None), ('CA', None), ('TX', 'sen')):
+                with self.subTest(party=party, state=state, type=type):
+                    indexed = api.query_legislators_snapshot(state, party, type)
+                    sql = api.query_legislators_sql(state, party, type)
+                    # The SQL path has no ORDER BY without pagination
+                    self.assertEqual([row['govtrack_id'] for row in indexed], sorted(row['govtrack_id'] for row in sql))
+
+    def test_party_filter_matches_ilike(self):
+        self.assert_same_ids(self.PATTERNS)
+
+    @unittest.skipUnless(POSTGRES, 'backslash escapes need Postgres ILIKE')
+    def test_escaped_party_filter_matches_ilike(self):
+        self.assert_same_ids(self.ESCAPED_PATTERNS)
+
+
+if __name__ == '__main__':
+    unittest.main()
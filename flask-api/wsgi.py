@@ -0,0 +1,9 @@
+"""WSGI entry point: ``gunicorn wsgi:app``.
+
+Starts the background weather prefetcher, which importing ``app`` (tests,
+ingest_data.py, ``flask shell``) never does.
+"""
+from app import app, weather_prefetcher
+
+if weather_prefetcher is not None:
+    weather_prefetcher.start(lock_path=app.config['WEATHER_PREFETCH_LOCK'])
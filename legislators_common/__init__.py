@@ -0,0 +1,6 @@
+"""Code shared by flask-api and django-api.
+
+Both apps import it as ``legislators_common``: each app directory has a
+symlink to it, and the Docker images copy it next to the app (see the
+Dockerfiles). Framework-specific wiring stays in the apps.
+"""
@@ -0,0 +1,155 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import date
+
+PERCENTILES = (10, 25, 75, 90)
+
+
+def age_on(birthday, today):
+    return today.year - birthday.year - ((today.month, today.day) < (birthday.month, birthday.day))
+
+
+class AgeDistribution:
+    """Birthdays kept sorted, plus the running sums needed to get ages in O(log n).
+
+    For a given day, the sum of all ages is
+    ``count * today.year - sum(birth years) - #(birthdays not yet reached this year)``
+    and the age order is the reverse of the birthday order, so min, max,
+    median and percentiles are positional lookups.
+    """
+
+    def __init__(self):
+        self.entries = []      # (birthday, govtrack_id), ascending
+        self.month_days = []   # (month, day) of every birthday, ascending
+        self.year_sum = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, govtrack_id, birthday):
+        insort(self.entries, (birthday, govtrack_id))
+        insort(self.month_days, (birthday.month, birthday.day))
+        self.year_sum += birthday.year
+
+    def remove(self, govtrack_id, birthday):
+        del self.entries[bisect_left(self.entries, (birthday, govtrack_id))]
+        del self.month_days[bisect_left(self.month_days, (birthday.month, birthday.day))]
+        self.year_sum -= birthday.year
+
+    def oldest(self):
+        """(birthday, govtrack_id) of the earliest birthday, lowest id on ties"""
+        return self.entries[0]
+
+    def youngest(self):
+        """(birthday, govtrack_id) of the latest birthday, lowest id on ties"""
+        return self.entries[bisect_left(self.entries, (self.entries[-1][0],))]
+
+    def total_age(self, today):
+        not_reached = len(self.month_days) - bisect_right(self.month_days, (today.month, today.day))
+        return len(self.entries) * today.year - self.year_sum - not_reached
+
+    def age_percentile(self, percent, today):
+        """Linearly interpolated age percentile (50 = median)"""
+        position = (len(self.entries) - 1) * percent / 100
+        lower = int(position)
+        upper = min(lower + 1, len(self.entries) - 1)
+        # entries are ordered by birthday, i.e. by descending age
+        lower_age = age_on(self.entries[-1 - lower][0], today)
+        upper_age = age_on(self.entries[-1 - upper][0], today)
+        return lower_age + (upper_age - lower_age) * (position - lower)
+
+    def summary(self, today):
+        count = len(self.entries)
+        return {
+            'count': count,
+            'average_age': round(self.total_age(today) / count, 2),
+            'median_age': self.age_percentile(50, today),
+            'min_age': age_on(self.youngest()[0], today),
+            'max_age': age_on(self.oldest()[0], today),
+        }
+
+
+class AgeStatsEngine:
+    """Incrementally maintained age statistics for the legislators table.
+
+    ``sync`` applies only the rows whose birthday, state or party changed,
+    and ``stats`` is cached per (day, generation), so a request costs a dict
+    lookup until the date rolls over or the data changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._members = {}
+        self._all = AgeDistribution()
+        self._by_state = defaultdict(AgeDistribution)
+        self._by_party = defaultdict(AgeDistribution)
+        self._generation = 0
+        self._cached_key = None
+        self._cached = None
+
+    def _add(self, govtrack_id, member):
+        birthday, state, party = member
+        self._members[govtrack_id] = member
+        self._all.add(govtrack_id, birthday)
+        self._by_state[state].add(govtrack_id, birthday)
+        self._by_party[party].add(govtrack_id, birthday)
+
+    def _remove(self, govtrack_id):
+        birthday, state, party = self._members.pop(govtrack_id)
+        self._all.remove(govtrack_id, birthday)
+        for groups, key in ((self._by_state, state), (self._by_party, party)):
+            groups[key].remove(govtrack_id, birthday)
+            if not groups[key]:
+                del groups[key]
+
+    def sync(self, rows):
+        """Bring the engine in line with serialized rows; returns the number of changes"""
+        incoming = {}
+        for row in rows:
+            if row.get('birthday'):
+                birthday = row['birthday']
+                if isinstance(birthday, str):
+                    birthday = date.fromisoformat(birthday)
+                incoming[row['govtrack_id']] = (birthday, row['state'], row['party'])
+
+        with self._lock:
+            changes = 0
+            for govtrack_id in [i for i in self._members if i not in incoming]:
+                self._remove(govtrack_id)
+                changes += 1
+            for govtrack_id, member in incoming.items():
+                current = self._members.get(govtrack_id)
+                if current == member:
+                    continue
+                if current is not None:
+                    self._remove(govtrack_id)
+                self._add(govtrack_id, member)
+                changes += 1
+            if changes:
+                self._generation += 1
+            return changes
+
+    def stats(self, today=None):
+        """Aggregates for ``today``, or None when there are no birthdays"""
+        today = today or date.today()
+        with self._lock:
+            key = (today, self._generation)
+            if self._cached_key != key:
+                self._cached = self._compute(today) if self._all else None
+                self._cached_key = key
+            return self._cached
+
+    def _compute(self, today):
+        distribution = self._all
+        youngest_birthday, youngest_id = distribution.youngest()
+        oldest_birthday, oldest_id = distribution.oldest()
+        summary = distribution.summary(today)
+        summary.update({
+            'youngest': (youngest_id, age_on(youngest_birthday, today)),
+            'oldest': (oldest_id, age_on(oldest_birthday, today)),
+            'percentiles': {f'p{p}': distribution.age_percentile(p, today) for p in PERCENTILES},
+            'by_state': {state: d.summary(today) for state, d in sorted(self._by_state.items())},
+            'by_party': {party: d.summary(today) for party, d in sorted(self._by_party.items())},
+        })
+        return summary
@@ -0,0 +1,46 @@
+"""Tags and counters of the response caches both apps keep in Redis.
+
+Each entry is tagged, and stored under the current version of every one of its
+tags, so bumping a tag makes the entries that used it unreachable (they expire
+after the TTL). The stores themselves are per app: a Redis client in Flask,
+Django's ``default`` cache in Django.
+"""
+import hashlib
+import threading
+import time
+
+ALL = 'legislators'         # on every entry; bumped by full reloads
+UNFILTERED = 'list:*'       # list slices with no filter a write can be narrowed to
+STATS = 'stats'
+
+# Past this many changed rows, a diff just drops everything
+MAX_TARGETED_ROWS = 500
+
+
+def tag_digest(tag):
+    # Tags carry query values; hashed to stay short, valid cache keys
+    return hashlib.sha1(tag.encode()).hexdigest()
+
+
+def new_tag_version():
+    # Never restarts from a small number, so an evicted tag can't bring old entries back
+    return time.time_ns() // 1000
+
+
+class LookupCounter:
+    """Hits and misses of this worker's lookups (the entries themselves are shared)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(('hits', 'misses'), 0)
+
+    def record(self, hit):
+        with self._lock:
+            self._counters['hits' if hit else 'misses'] += 1
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_ratio'] = round(counters['hits'] / lookups, 4) if lookups else None
+        return counters
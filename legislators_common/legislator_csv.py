@@ -0,0 +1,196 @@
+"""Reading the legislators CSV: date parsing, row hashing, streamed downloads
+and parallel validation of a local file in byte-range shards.
+
+What a valid row turns into differs per app, so validation takes a ``clean``
+function: it gets a csv.DictReader row and returns the values to keep, or
+raises InvalidRow.
+"""
+import codecs
+import csv
+import hashlib
+import io
+import mmap
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from legislators_common.upstream import upstream
+
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%Y-%m-%d %H:%M:%S')
+
+# Parallel validation splits the file into at least 4 shards per worker, each
+# between these sizes, so a slow shard does not leave the other workers idle
+MIN_SHARD_BYTES = 64 * 1024
+MAX_SHARD_BYTES = 32 * 1024 * 1024
+
+# Bytes read from the response at a time when streaming a CSV download
+FETCH_CHUNK_SIZE = 64 * 1024
+
+# Line endings recognised by open(..., newline=''), which is what csv.reader expects
+LINE_END = re.compile(r'\r\n|\r|\n')
+
+
+class InvalidRow(ValueError):
+    """Raised for CSV rows that fail validation and must be skipped"""
+
+
+def parse_date(date_str):
+    """The date in any of DATE_FORMATS, or None"""
+    if not date_str:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def row_hash(values):
+    """Stable hash of a row's ingested column values (notes are never hashed)"""
+    normalized = ['' if value is None else str(value) for value in values]
+    return hashlib.sha1('\x1f'.join(normalized).encode('utf-8')).hexdigest()
+
+
+def decode_lines(chunks):
+    """Decode UTF-8 byte chunks into lines with their endings, as a file opened
+    with newline='' would.
+
+    Unlike iter_lines(), only \\r\\n, \\r and \\n end a line and a \\r\\n split
+    across chunks stays one ending, so quoted multi-line fields reach
+    csv.reader intact.
+    """
+    # The upstream file is UTF-8 even when served without a charset
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    pending = ''
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        start = 0
+        for match in LINE_END.finditer(pending):
+            # A trailing \r may be the first half of a \r\n in the next chunk
+            if match.end() == len(pending) and match.group() == '\r':
+                break
+            yield pending[start:match.end()]
+            start = match.end()
+        pending = pending[start:]
+    pending += decoder.decode(b'', final=True)
+    start = 0
+    for match in LINE_END.finditer(pending):
+        yield pending[start:match.end()]
+        start = match.end()
+    if start < len(pending):
+        yield pending[start:]
+
+
+def fetch_csv_lines(url, etag=None, last_modified=None, timeout=30):
+    """Conditional, streaming GET of a CSV file.
+
+    Returns (lines, validators): ``lines`` lazily yields decoded lines as
+    chunks arrive and ``validators`` holds the response ETag/Last-Modified.
+    Both are None if the server answered 304 Not Modified.
+    """
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    response = upstream.get(url, headers=headers, stream=True, timeout=timeout)
+    if response.status_code == 304:
+        response.close()
+        return None, None
+    response.raise_for_status()
+
+    def lines():
+        try:
+            yield from decode_lines(response.iter_content(chunk_size=FETCH_CHUNK_SIZE))
+        finally:
+            response.close()
+
+    validators = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+    return lines(), validators
+
+
+def shard_ranges(path, workers):
+    """Split a CSV file into byte ranges for ``workers`` processes.
+
+    Returns (header, shards): the parsed header row and a list of
+    (start, end, first_line) tuples. Every range ends right after a newline
+    that is outside a quoted field, so each shard holds whole records.
+    """
+    if not os.path.getsize(path):
+        return [], []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        size = len(data)
+        # The header never has quoted newlines
+        start = data.find(b'\n') + 1 or size
+        header = next(csv.reader([data[:start].decode('utf-8-sig')]))
+        count = max(workers * 4, size // MAX_SHARD_BYTES)
+        step = max((size - start) // count, MIN_SHARD_BYTES)
+
+        shards = []
+        line = 2
+        while start < size:
+            end = min(start + step, size)
+            quotes = data[start:end].count(b'"')
+            # An odd number of quotes means the cut is inside a quoted field
+            while end < size and (quotes % 2 or data[end - 1] != ord('\n')):
+                newline = data.find(b'\n', end)
+                following = size if newline == -1 else newline + 1
+                quotes += data[end:following].count(b'"')
+                end = following
+            shards.append((start, end, line))
+            line += data[start:end].count(b'\n')
+            start = end
+    return header, shards
+
+
+def validate_shard(path, header, shard, clean):
+    """Validate one byte range of a CSV file in a pool worker.
+
+    Returns (report, rows): the report counts valid rows and lists every
+    skipped line with its reason; rows are what ``clean`` returned.
+    """
+    start, end, first_line = shard
+    with open(path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8')
+
+    rows = []
+    skips = []
+    reader = csv.DictReader(io.StringIO(text, newline=''), fieldnames=header)
+    line = first_line
+    for row in reader:
+        try:
+            rows.append(clean(row))
+        except InvalidRow as e:
+            skips.append((line, str(e)))
+        line = first_line + reader.line_num
+    report = {
+        'start': start, 'end': end, 'first_line': first_line, 'last_line': first_line + reader.line_num - 1,
+        'valid': len(rows), 'skipped': len(skips), 'skips': skips,
+    }
+    return report, rows
+
+
+def validate_shards(path, workers, clean, initializer=None):
+    """Validate ``path`` across ``workers`` processes, yielding (report, rows) per shard in file order.
+
+    ``clean`` must be a module-level function, as it is sent to the workers;
+    ``initializer`` runs once in each of them. At most two shards per worker
+    are in flight, so memory stays bounded however large the file is.
+    """
+    header, shards = shard_ranges(path, workers)
+    with ProcessPoolExecutor(workers, initializer=initializer) as pool:
+        pending = deque()
+        for shard in shards:
+            pending.append(pool.submit(validate_shard, path, header, shard, clean))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
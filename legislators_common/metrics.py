@@ -0,0 +1,120 @@
+"""Request, upstream and cache metrics in the Prometheus text format.
+
+Each app records its requests in ``request_metrics`` from its own hooks (see
+its metrics module) and renders /metrics with ``render_metrics``. Everything
+is per worker process; Prometheus sums the workers it scrapes.
+"""
+import threading
+from collections import Counter
+
+from legislators_common.upstream import LatencyHistogram
+
+
+class CountHistogram(LatencyHistogram):
+    """Histogram of per-request counts (queries) rather than seconds"""
+
+    BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250)
+
+
+class RequestMetrics:
+    """Histograms per (method, route) plus response counts per status"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}  # (method, route) -> {name: histogram}
+        self._responses = Counter()  # (method, route, status) -> count
+
+    def histograms(self, method, route):
+        with self._lock:
+            if (method, route) not in self._routes:
+                self._routes[(method, route)] = {
+                    'duration': LatencyHistogram(),
+                    'db_queries': CountHistogram(),
+                    'db_time': LatencyHistogram(),
+                    'serialization': LatencyHistogram(),
+                }
+            return self._routes[(method, route)]
+
+    def record(self, method, route, status, duration, db_queries, db_time, serialization=None):
+        histograms = self.histograms(method, route)
+        histograms['duration'].observe(duration)
+        histograms['db_queries'].observe(db_queries)
+        histograms['db_time'].observe(db_time)
+        if serialization is not None:
+            histograms['serialization'].observe(serialization)
+        with self._lock:
+            self._responses[(method, route, status)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            routes, responses = dict(self._routes), dict(self._responses)
+        histograms = {
+            key: {name: histogram.snapshot() for name, histogram in route.items()}
+            for key, route in routes.items()
+        }
+        return histograms, responses
+
+
+request_metrics = RequestMetrics()
+
+
+ROUTE_HISTOGRAMS = (
+    ('duration', 'http_request_duration_seconds', 'Time to produce a response'),
+    ('db_queries', 'http_request_db_queries', 'Database queries per request'),
+    ('db_time', 'http_request_db_duration_seconds', 'Time spent in database queries per request'),
+    ('serialization', 'http_request_serialization_seconds', 'Time spent encoding JSON per request'),
+)
+
+CACHE_RESULTS = (('hits', 'hit'), ('stale_hits', 'stale_hit'), ('misses', 'miss'))
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(**labels):
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in labels.items()) + '}'
+
+
+def histogram_lines(name, snapshot, **labels):
+    for bound, count in snapshot['buckets'].items():
+        yield f'{name}_bucket{format_labels(**labels, le=bound)} {count}'
+    yield f'{name}_sum{format_labels(**labels)} {snapshot["sum"]}'
+    yield f'{name}_count{format_labels(**labels)} {snapshot["count"]}'
+
+
+def render_metrics(metrics, upstream_stats, cache_stats):
+    """Prometheus text exposition of request, upstream and cache metrics.
+
+    ``upstream_stats`` is ``UpstreamClient.stats()``; ``cache_stats`` maps a
+    cache name to its ``stats()`` (hits/stale_hits/misses and hit_ratio).
+    """
+    histograms, responses = metrics.snapshot()
+    lines = []
+    for key, name, help_text in ROUTE_HISTOGRAMS:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for (method, route), route_histograms in sorted(histograms.items()):
+            lines += histogram_lines(name, route_histograms[key], method=method, route=route)
+
+    lines += ['# HELP http_responses_total Responses sent', '# TYPE http_responses_total counter']
+    for (method, route, status), count in sorted(responses.items()):
+        lines.append(f'http_responses_total{format_labels(method=method, route=route, status=status)} {count}')
+
+    name = 'upstream_request_duration_seconds'
+    lines += [f'# HELP {name} Upstream HTTP call latency', f'# TYPE {name} histogram']
+    for host, stats in upstream_stats.items():
+        lines += histogram_lines(name, stats['latency'], host=host)
+    lines += ['# HELP upstream_circuit_open Whether calls to the host fail fast', '# TYPE upstream_circuit_open gauge']
+    for host, stats in upstream_stats.items():
+        lines.append(f'upstream_circuit_open{format_labels(host=host)} {int(stats["circuit"] != "closed")}')
+
+    lines += ['# HELP cache_lookups_total Cache lookups by result', '# TYPE cache_lookups_total counter']
+    for cache, stats in sorted(cache_stats.items()):
+        for counter, result in CACHE_RESULTS:
+            if counter in stats:
+                lines.append(f'cache_lookups_total{format_labels(cache=cache, result=result)} {stats[counter]}')
+    lines += ['# HELP cache_hit_ratio Share of cache lookups answered from the cache', '# TYPE cache_hit_ratio gauge']
+    for cache, stats in sorted(cache_stats.items()):
+        if stats.get('hit_ratio') is not None:
+            lines.append(f'cache_hit_ratio{format_labels(cache=cache)} {stats["hit_ratio"]}')
+    return '\n'.join(lines) + '\n'
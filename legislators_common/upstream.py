@@ -0,0 +1,220 @@
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` failed calls in a row the circuit opens and
+    calls fail fast for ``reset_timeout`` seconds; then one trial call is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return 'open'
+            return 'half-open'
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram with Prometheus-style buckets (seconds)"""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.BUCKETS) + 1)
+        self._sum = 0.0
+
+    def observe(self, seconds):
+        with self._lock:
+            self._counts[bisect_left(self.BUCKETS, seconds)] += 1
+            self._sum += seconds
+
+    def snapshot(self):
+        with self._lock:
+            counts, total_time = list(self._counts), self._sum
+        buckets, running = {}, 0
+        for bound, count in zip(self.BUCKETS + ('+Inf',), counts):
+            running += count
+            buckets[str(bound)] = running
+        return {'buckets': buckets, 'count': running, 'sum': round(total_time, 6)}
+
+
+class RetryingCall:
+    """Retry, backoff and circuit-breaker bookkeeping for one logical call.
+
+    The caller sends the requests, so the policy is the same whatever the
+    transport (``UpstreamClient.get`` with requests, the async views with
+    httpx). Each attempt waits the next value of ``delays()``, then reports
+    a raised error to ``retry_after_error`` or an answer to ``done``.
+    """
+
+    def __init__(self, client, url):
+        host, self._breaker, self._latency = client.for_host(url)
+        if not self._breaker.allow():
+            raise CircuitOpenError(f'Circuit open for {host}, not calling upstream')
+        self._retries = client.retries
+        self._backoff = client.backoff
+        self._retry_statuses = client.RETRY_STATUSES
+        self._attempt = 0
+
+    def delays(self):
+        """Seconds to wait before each attempt: none, then jittered exponential backoff"""
+        for attempt in range(self._retries + 1):
+            self._attempt = attempt
+            yield random.uniform(0, self._backoff * 2 ** attempt) if attempt else 0
+
+    def retry_after_error(self, elapsed, transient):
+        """Record an attempt that raised; True to try again, False to re-raise.
+
+        Only transient errors (connection failures, timeouts) are retried.
+        """
+        if not transient:
+            self._breaker.record_failure()
+            return False
+        self._latency.observe(elapsed)
+        if self._attempt == self._retries:
+            self._breaker.record_failure()
+            return False
+        return True
+
+    def done(self, elapsed, status_code):
+        """Record an answer; True to return it, False to discard it and try again.
+
+        A retryable status on the last attempt is returned but counts as a
+        failure for the breaker.
+        """
+        self._latency.observe(elapsed)
+        if status_code not in self._retry_statuses:
+            self._breaker.record_success()
+            return True
+        if self._attempt == self._retries:
+            self._breaker.record_failure()
+            return True
+        return False
+
+
+class UpstreamClient:
+    """Shared HTTP client for third-party calls (OpenWeatherMap, the legislators CSV).
+
+    One keep-alive ``requests.Session`` with at most ``pool_maxsize``
+    connections per host, default timeouts, retries with jittered exponential
+    backoff on connection errors, timeouts and 5xx/429 answers, and a circuit
+    breaker plus latency histogram per host.
+    """
+
+    RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+    TRANSIENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+    def __init__(self, pool_maxsize=10, connect_timeout=3.05, read_timeout=10.0, retries=2,
+                 backoff=0.2, failure_threshold=5, reset_timeout=30.0):
+        self.pool_maxsize = pool_maxsize
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_maxsize, pool_block=True, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._lock = threading.Lock()
+        self._hosts = {}  # host -> (CircuitBreaker, LatencyHistogram)
+
+    def for_host(self, url):
+        """(host, CircuitBreaker, LatencyHistogram) shared by every call to ``url``'s host"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = (CircuitBreaker(self.failure_threshold, self.reset_timeout), LatencyHistogram())
+            return (host,) + self._hosts[host]
+
+    def call(self, url):
+        """RetryingCall for one request to ``url``; raises CircuitOpenError while the host is down"""
+        return RetryingCall(self, url)
+
+    def get(self, url, **kwargs):
+        """``requests.get`` through the pool; raises CircuitOpenError while the host is down.
+
+        A 5xx answer that survives the retries is returned (so callers can
+        ``raise_for_status``) but counts as a failure for the breaker.
+        """
+        call = self.call(url)
+        kwargs.setdefault('timeout', self.timeout)
+
+        for delay in call.delays():
+            time.sleep(delay)
+            started = time.monotonic()
+            try:
+                response = self.session.get(url, **kwargs)
+            except Exception as error:
+                if call.retry_after_error(time.monotonic() - started, isinstance(error, self.TRANSIENT_ERRORS)):
+                    continue
+                raise
+            if call.done(time.monotonic() - started, response.status_code):
+                return response
+            response.close()
+
+    def stats(self):
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {
+            host: {'circuit': breaker.state, 'latency': latency.snapshot()}
+            for host, (breaker, latency) in sorted(hosts.items())
+        }
+
+
+# The client both apps use, configured from the environment
+upstream = UpstreamClient(
+    pool_maxsize=int(os.environ.get('UPSTREAM_POOL_MAXSIZE', '10')),
+    read_timeout=float(os.environ.get('UPSTREAM_TIMEOUT', '10')),
+    retries=int(os.environ.get('UPSTREAM_RETRIES', '2')),
+    failure_threshold=int(os.environ.get('UPSTREAM_BREAKER_THRESHOLD', '5')),
+    reset_timeout=float(os.environ.get('UPSTREAM_BREAKER_RESET', '30')),
+)
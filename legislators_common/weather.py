@@ -0,0 +1,238 @@
+import fcntl
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class WeatherCache:
+    """TTL cache for upstream weather lookups with stale-while-revalidate.
+
+    - fresh entries (younger than ``ttl``) are served directly
+    - stale entries (up to ``ttl + stale_ttl``) are served immediately while
+      one background thread refreshes them
+    - on a miss, concurrent callers for the same key share a single upstream
+      call (request coalescing)
+    """
+
+    def __init__(self, fetch, ttl=600, stale_ttl=3600):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self._entries = {}    # key -> (value, fetched_at)
+        self._inflight = {}   # key -> Future of the running upstream call
+        self._counters = dict.fromkeys(
+            ('hits', 'stale_hits', 'misses', 'coalesced', 'refreshes', 'errors'), 0)
+
+    def _lookup(self, key):
+        """(value, age) if ``key`` can be served from the cache, starting a
+        background refresh when it is stale; None on a miss. Needs the lock."""
+        entry = self._entries.get(key)
+        age = time.monotonic() - entry[1] if entry else None
+        if entry and age < self.ttl:
+            self._counters['hits'] += 1
+            return entry[0], age
+        if entry and age < self.ttl + self.stale_ttl:
+            self._counters['stale_hits'] += 1
+            if key not in self._inflight:
+                self._counters['refreshes'] += 1
+                self._inflight[key] = Future()
+                threading.Thread(target=self._refresh, args=(key,), daemon=True).start()
+            return entry[0], age
+        self._counters['misses'] += 1
+        return None
+
+    def get(self, key):
+        """Return (value, age in seconds) for ``key``; upstream errors propagate on a miss"""
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+            future, leader = self._claim(key)
+        return self._wait(key, future, leader)
+
+    def get_nowait(self, key):
+        """Like ``get`` but returns None on a miss instead of calling upstream,
+        for callers that fetch by other means and ``put`` the result"""
+        with self._lock:
+            return self._lookup(key)
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+
+    def refresh(self, key):
+        """Fetch ``key`` from upstream now, joining a fetch already in flight, and store it"""
+        with self._lock:
+            self._counters['refreshes'] += 1
+            future, leader = self._claim(key)
+        return self._wait(key, future, leader)
+
+    def _claim(self, key):
+        future = self._inflight.get(key)
+        if future is not None:
+            self._counters['coalesced'] += 1
+            return future, False
+        future = self._inflight[key] = Future()
+        return future, True
+
+    def _wait(self, key, future, leader):
+        if leader:
+            self._refresh(key)
+        return future.result(), 0.0
+
+    def _refresh(self, key):
+        future = self._inflight[key]
+        try:
+            value = self._fetch(key)
+        except Exception as e:
+            with self._lock:
+                self._counters['errors'] += 1
+                del self._inflight[key]
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            del self._inflight[key]
+        future.set_result(value)
+
+    def peek(self, key):
+        """(value, age in seconds) of the cached entry, or None; never calls upstream"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry[0], time.monotonic() - entry[1]
+
+    def last_known(self, key):
+        """Like ``peek`` but counted as a (stale) hit; for callers that never wait on upstream"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            age = time.monotonic() - entry[1]
+            self._counters['hits' if age < self.ttl else 'stale_hits'] += 1
+            return entry[0], age
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            counters['entries'] = len(self._entries)
+        lookups = counters['hits'] + counters['stale_hits'] + counters['misses']
+        counters['hit_ratio'] = round((counters['hits'] + counters['stale_hits']) / lookups, 4) if lookups else None
+        return counters
+
+
+def fetch_concurrently(func, keys, max_workers=16):
+    """{key: (func(key), None)} for each distinct key, or (None, exception) if the
+    call failed; calls run on at most ``max_workers`` threads"""
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+
+    def call(key):
+        try:
+            return func(key), None
+        except Exception as e:
+            return None, e
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as executor:
+        return dict(zip(keys, executor.map(call, keys)))
+
+
+class RateLimiter:
+    """Spaces calls at least ``1 / rate`` seconds apart across threads (no limit when rate is 0)"""
+
+    def __init__(self, rate):
+        self._interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self._interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+_held_locks = []
+
+
+def hold_lock(path):
+    """Take an exclusive lock on ``path`` for the rest of this process's life.
+
+    False if another process holds it. The OS drops the lock when its holder
+    exits, so the next worker to start takes over.
+    """
+    lock_file = open(path, 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _held_locks.append(lock_file)
+    return True
+
+
+class WeatherPrefetcher:
+    """Refreshes every key of a WeatherCache every ``interval`` seconds.
+
+    Each run fans out over at most ``max_workers`` threads and starts no more
+    than ``rate`` upstream calls per second. A failed refresh keeps the last
+    value in the cache, so readers keep getting it (with a growing age).
+    """
+
+    def __init__(self, cache, keys, interval, max_workers=8, rate=5.0):
+        self.cache = cache
+        self.keys = list(keys)
+        self.interval = interval
+        self.max_workers = max_workers
+        self._limiter = RateLimiter(rate)
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run = None
+
+    def _refresh(self, key):
+        self._limiter.wait()
+        try:
+            self.cache.refresh(key)
+            return True
+        except Exception:
+            return False
+
+    def run_once(self):
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(self._refresh, self.keys))
+        self.last_run = {
+            'refreshed': sum(results),
+            'failed': len(results) - sum(results),
+            'duration': round(time.monotonic() - started, 3),
+            'finished_at': time.time(),
+        }
+        return self.last_run
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self, lock_path=None):
+        """Start refreshing in a background thread. With ``lock_path``, only the
+        process holding that file's lock does, so N server workers make one
+        prefetcher's worth of upstream calls; returns whether this one runs it."""
+        if self._thread is None:
+            if lock_path and not hold_lock(lock_path):
+                return False
+            self._thread = threading.Thread(target=self._run, name='weather-prefetch', daemon=True)
+            self._thread.start()
+        return True
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def stop(self):
+        self._stop.set()
@@ -25,3 +25,21 @@ CREATE INDEX IF NOT EXISTS idx_legislators_state ON legislators(state);
 CREATE INDEX IF NOT EXISTS idx_legislators_party ON legislators(party);
 CREATE INDEX IF NOT EXISTS idx_legislators_type ON legislators(type);
 CREATE INDEX IF NOT EXISTS idx_legislators_birthday ON legislators(birthday);
+
+-- Dataset version, bumped by ingestion and notes updates so API workers
+-- can tell when their in-memory snapshot is stale
+CREATE TABLE IF NOT EXISTS dataset_version (
+    id INTEGER PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO dataset_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+-- HTTP validators of the last loaded CSV, for conditional GETs during ingestion
+CREATE TABLE IF NOT EXISTS ingest_source (
+    url VARCHAR(500) PRIMARY KEY,
+    etag VARCHAR(200),
+    last_modified VARCHAR(100),
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);